@@ -9,128 +9,211 @@ import os
 import sys
 import json
 import time
-import re
+import asyncio
+from collections import Counter
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
-from openai import OpenAI
-from datasets import load_dataset
 from models_config import MODELS
+from core.cache import ResponseCache
+from core.checkpoint import CheckpointJournal
+from core.client import AsyncOpenRouterClient, sample_requests
+from core.costs import estimate_requests
+from core.dataset import load_instances
+from core.diffs import parse_patch
+from core.patches import DiffStreamExtractor, PatchDeduper, extract_patch
+from core.prompts import structured_messages
+from core.scheduler import DEFAULT_MAX_INFLIGHT_TOKENS, DEFAULT_PROVIDER_CONCURRENCY, FanOutScheduler
+from core.telemetry import Telemetry
+from evaluation.cloud import CloudJobs
 
 load_dotenv()
 
-STRUCTURED_PROMPT = """You are a software engineer fixing a bug. Provide a COMPLETE, VALID git diff patch.
+# Temperature for runs that draw several samples per problem
+SAMPLE_TEMPERATURE = 0.8
 
-Repository: {repo}
-Problem: {problem_statement}
 
-CRITICAL - Output Format:
-1. Brief explanation (1-2 sentences)
-2. Complete git diff patch in this EXACT format:
+async def _stream_completion(client, request):
+    """Stream a completion, stopping as soon as its diff block has closed.
+    
+    Output is mirrored to testing/partial/ as it arrives. Everything the
+    model would write after the closing fence is never generated; the text
+    up to it is what the response cache keeps. Requests
+    for several choices at once (n > 1) cannot be streamed and are sent as is.
+    """
+    if request.get("n", 1) > 1:
+        return await client.call_request(request)
+    partial_name = _sample_key(request['instance_id'], request.get('sample', 0))
+    extractor = DiffStreamExtractor(f"testing/partial/{request['model_key']}/{partial_name}.txt")
+    stream = await client.call_request(dict(request, stream=True))
+    try:
+        async for delta in stream:
+            if extractor.feed(delta):
+                stream.done = True  # cache the response up to the closing fence
+                break
+    finally:
+        await stream.aclose()
+        extractor.close()
+    return stream.to_response()
 
-```diff
-diff --git a/filename.py b/filename.py
---- a/filename.py
-+++ b/filename.py
-@@ -10,7 +10,7 @@
- context line
--old line
-+new line
- context line
-```
 
-Make the patch COMPLETE - do not truncate. End with newline."""
+def _sample_key(instance_id, sample):
+    """Journal key of one sample; sample 0 is keyed by the bare instance ID."""
+    return instance_id if sample == 0 else f"{instance_id}#{sample}"
 
 
-def generate_predictions_for_model(model_key, instances, num_problems=50):
-    """Generate predictions for a single model."""
+def _pending_requests(model_key, instances, journal, samples=1):
+    """Completion requests for the samples this model has not finished.
     
+    With samples > 1 each problem is sampled at SAMPLE_TEMPERATURE, with
+    the API's `n` parameter where the provider supports it and concurrent
+    requests otherwise. Without a journal every sample is pending.
+    """
     model_config = MODELS[model_key]
+    requests = []
+    for instance in instances:
+        pending = [
+            s for s in range(samples)
+            if journal is None or not journal.is_done(_sample_key(instance['instance_id'], s))
+        ]
+        if not pending:
+            continue
+        request = {
+            "model_id": model_config["id"],
+            "messages": structured_messages(model_config["id"], instance,
+                                            cache_prefix=len(pending) > 1),
+            "max_tokens": 4000,
+            "temperature": 0.1 if samples == 1 else SAMPLE_TEMPERATURE,
+            "run_id": _run_name(model_key, len(instances), samples),
+            "model_key": model_key,
+            "stage": "baseline",
+            "instance_id": instance['instance_id'],
+        }
+        requests.extend(sample_requests(request, pending))
+    return requests
+
+
+def estimate_run(model_keys, instances, samples=1, provider_concurrency=None):
+    """Predicted cost and duration of generating for these models and instances."""
+    requests = [
+        request
+        for model_key in model_keys
+        for request in _pending_requests(model_key, instances, None, samples)
+    ]
+    return estimate_requests(requests, provider_concurrency or DEFAULT_PROVIDER_CONCURRENCY)
+
+
+def _run_name(model_key, num_problems, samples=1):
+    name = f"baseline_{model_key}_{num_problems}problems"
+    return name if samples == 1 else f"{name}_k{samples}"
+
+
+def _open_journal(model_key, instances, num_problems, samples=1):
+    """Open the model's checkpoint journal and report what is already done."""
+    journal_file = f"testing/checkpoints/{_run_name(model_key, num_problems, samples)}.journal.jsonl"
+    journal = CheckpointJournal(journal_file)
+    resumed = len(journal.completed)
+    if resumed:
+        print(f"♻️  {model_key}: resuming, {resumed}/{len(instances) * samples} already done ({journal_file})")
+    return journal
+
+
+async def _collect_predictions(client, results, total, journals, errors):
+    """Record each finished completion in its model's journal."""
     
-    print(f"\n{'='*70}")
-    print(f"GENERATING PREDICTIONS: {model_config['name']}")
-    print(f"{'='*70}")
-    print(f"Model: {model_config['id']}")
-    print(f"Problems: {num_problems}")
-    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
-    )
-    
-    predictions = []
-    errors = []
+    done = 0
     
-    for i, instance in enumerate(instances[:num_problems], 1):
-        instance_id = instance['instance_id']
+    async for result in results:
+        done += 1
+        request = result["request"]
+        model_key = request["model_key"]
+        instance_id = request["instance_id"]
         
-        print(f"\n[{i}/{num_problems}] {instance_id}")
+        print(f"\n[{done}/{total}] {model_key} {instance_id} ({result['elapsed']:.1f}s)")
         
-        try:
-            prompt = STRUCTURED_PROMPT.format(
-                repo=instance['repo'],
-                problem_statement=instance['problem_statement']
-            )
-            
-            response = client.chat.completions.create(
-                model=model_config["id"],
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=4000,
-                temperature=0.1,
-                extra_headers={
-                    "HTTP-Referer": "http://localhost:3000",
-                    "X-Title": "Giga-Think-Baseline",
-                }
-            )
-            
-            solution = response.choices[0].message.content
-            tokens = response.usage.total_tokens
-            
-            # Extract diff
-            diff_match = re.search(r'```diff\n(.*?)```', solution, re.DOTALL)
-            if diff_match:
-                patch = diff_match.group(1).strip()
-            else:
-                patch = solution
-            
-            # Ensure patch ends with newline
-            if not patch.endswith('\n'):
-                patch += '\n'
-            
-            predictions.append({
-                "instance_id": instance_id,
-                "model_name_or_path": model_config["name"],
-                "model_patch": patch
-            })
-            
-            print(f"  ✅ {tokens} tokens, patch: {len(patch)} chars")
-            
-            # Rate limiting
-            time.sleep(0.5)
-            
-        except Exception as e:
-            error_msg = str(e)
+        if result["error"] is not None:
+            error_msg = str(result["error"])
             print(f"  ❌ Error: {error_msg[:100]}")
-            errors.append({
+            errors[model_key].append({
                 "instance_id": instance_id,
                 "error": error_msg,
                 "timestamp": datetime.now().isoformat()
             })
-            time.sleep(2)  # Longer delay after error
+            continue
+        
+        response = result["response"]
+        tokens = client.get_tokens_used(response)
+        cached = client.get_cached_tokens(response)
+        texts = client.get_response_texts(response)
+        
+        for sample, solution in zip(request.get("samples", [0]), texts):
+            patch = extract_patch(solution)
+            journals[model_key].record(_sample_key(instance_id, sample), {
+                "instance_id": instance_id,
+                "model_name_or_path": MODELS[model_key]["name"],
+                "model_patch": patch
+            })
+            label = f"sample {sample} " if len(texts) > 1 or sample else ""
+            if tokens:
+                print(f"  ✅ {label}{tokens} tokens ({cached} cached), patch: {len(patch)} chars")
+            else:
+                print(f"  ✅ {label}stopped after diff, patch: {len(patch)} chars")
+            parsed = parse_patch(patch)
+            if not parsed.valid:
+                problem = parsed.errors[0] if parsed.errors else "no hunks found"
+                print(f"  ⚠️  {label}malformed patch: {problem}")
+
+
+def _unique_samples(instances, journal, samples):
+    """Per-sample prediction lists with duplicate patches left out.
+    
+    A patch whose normalized diff matches an earlier sample of the same
+    problem is dropped, so it is never evaluated twice.
+    """
+    per_sample = [[] for _ in range(samples)]
+    duplicates = 0
+    for inst in instances:
+        deduper = PatchDeduper()
+        for sample in range(samples):
+            pred = journal.completed.get(_sample_key(inst['instance_id'], sample))
+            if pred is None:
+                continue
+            if deduper.add(pred["model_patch"], sample) is None:
+                per_sample[sample].append(pred)
+            else:
+                duplicates += 1
+    return per_sample, duplicates
+
+
+def _save_model_outputs(model_key, instances, num_problems, journal, errors, samples=1):
+    """Write the predictions file(s) (in dataset order) and the errors log.
+    
+    With samples > 1 there is one file per sample index, each holding only
+    the patches no earlier sample of the problem already produced.
+    """
+    
+    model_config = MODELS[model_key]
+    run_name = _run_name(model_key, num_problems, samples)
+    per_sample, duplicates = _unique_samples(instances, journal, samples)
+    predictions = per_sample[0]
     
     # Save predictions
-    output_file = f"testing/baseline_{model_key}_{num_problems}problems.jsonl"
-    with open(output_file, 'w') as f:
-        for pred in predictions:
-            f.write(json.dumps(pred) + '\n')
+    output_file = f"testing/{run_name}.jsonl"
+    sample_files = [output_file] + [
+        f"testing/{run_name}_sample{sample}.jsonl" for sample in range(1, samples)
+    ]
+    for sample_file, sample_predictions in zip(sample_files, per_sample):
+        with open(sample_file, 'w') as f:
+            for pred in sample_predictions:
+                f.write(json.dumps(pred) + '\n')
     
     # Save errors log
     if errors:
-        error_file = f"testing/errors_{model_key}_{num_problems}problems.json"
+        error_file = f"testing/errors_{run_name.replace('baseline_', '', 1)}.json"
         with open(error_file, 'w') as f:
             json.dump(errors, f, indent=2)
         print(f"\n  ⚠️  {len(errors)} errors logged to {error_file}")
@@ -139,37 +222,184 @@ def generate_predictions_for_model(model_key, instances, num_problems=50):
     print(f"COMPLETED: {model_config['name']}")
     print(f"{'='*70}")
     print(f"✅ Predictions: {len(predictions)}/{num_problems}")
+    if samples > 1:
+        unique = sum(len(preds) for preds in per_sample)
+        print(f"🎲 Samples: {unique} unique patches, {duplicates} duplicates skipped")
     print(f"❌ Errors: {len(errors)}")
     print(f"💾 Saved to: {output_file}")
+    for sample_file in sample_files[1:]:
+        print(f"💾 Saved to: {sample_file}")
     print(f"Finished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     return output_file, len(predictions), len(errors)
 
 
-def submit_to_cloud(predictions_file, model_key, run_id):
-    """Submit predictions to sb-cli cloud evaluation."""
+def _make_client(max_concurrency=8):
+    return AsyncOpenRouterClient(
+        title="Giga-Think-Baseline",
+        cache=ResponseCache.from_env(),
+        max_concurrency=max_concurrency,
+        telemetry=Telemetry.from_env("baseline"),
+    )
+
+
+def _print_telemetry(client):
+    """Per-model token, cost and latency table for the calls of this run."""
+    telemetry = getattr(client, "telemetry", None)
+    if telemetry is None or not telemetry.records:
+        return
+    print(f"\n{telemetry.format_summary(by=('model_key',))}")
+    if telemetry.path:
+        print(f"📈 Call metrics: {telemetry.path}")
+
+
+def generate_predictions_for_model(model_key, instances, num_problems=50, max_concurrency=8,
+                                   stream=True, client=None, samples=1):
+    """Generate predictions for a single model.
+    
+    Finished instances are journaled to testing/checkpoints/, so rerunning
+    after a crash only generates the instances that are still missing.
+    With stream=True each generation stops once its diff block closes.
+    `client` overrides the default AsyncOpenRouterClient. `samples` > 1
+    draws several patches per problem for pass@k (see _pending_requests).
+    """
+    
+    model_config = MODELS[model_key]
+    instances = instances[:num_problems]
     
     print(f"\n{'='*70}")
-    print(f"SUBMITTING TO CLOUD: {run_id}")
+    print(f"GENERATING PREDICTIONS: {model_config['name']}")
+    print(f"{'='*70}")
+    print(f"Model: {model_config['id']}")
+    print(f"Problems: {num_problems}")
+    if samples > 1:
+        print(f"Samples per problem: {samples}")
+    print(f"Concurrency: {max_concurrency}")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    client = client or _make_client(max_concurrency)
+    errors = {model_key: []}
+    
+    with _open_journal(model_key, instances, num_problems, samples) as journal:
+        requests = _pending_requests(model_key, instances, journal, samples)
+        results = client.complete_many(
+            requests, call=partial(_stream_completion, client) if stream else None
+        )
+        asyncio.run(_collect_predictions(
+            client, results, len(requests), {model_key: journal}, errors,
+        ))
+        _print_telemetry(client)
+        return _save_model_outputs(
+            model_key, instances, num_problems, journal, errors[model_key], samples
+        )
+
+
+async def _when_model_done(results, remaining, callback):
+    """Pass results through, calling callback(model_key) once the consumer
+    has handled the last pending result of that model."""
+    async for result in results:
+        yield result
+        model_key = result["request"]["model_key"]
+        remaining[model_key] -= 1
+        if remaining[model_key] == 0:
+            callback(model_key)
+
+
+def generate_predictions_all_models(model_keys, instances, num_problems=50,
+                                    provider_concurrency=None,
+                                    max_inflight_tokens=DEFAULT_MAX_INFLIGHT_TOKENS,
+                                    stream=True, samples=1, on_model_done=None):
+    """Generate predictions for several models at once.
+    
+    Requests from every model go through one FanOutScheduler, interleaved
+    across providers with per-provider concurrency limits. Each model's
+    outputs are saved as soon as its last request finishes, and
+    on_model_done(model_key, output) is called then, so slow models do not
+    hold up submitting fast ones. Returns
+    {model_key: (output_file, num_predictions, num_errors)}.
+    """
+    
+    instances = instances[:num_problems]
+    
+    print(f"\n{'='*70}")
+    print(f"GENERATING PREDICTIONS: {len(model_keys)} models in parallel")
     print(f"{'='*70}")
+    print(f"Models: {', '.join(model_keys)}")
+    print(f"Problems per model: {num_problems}")
+    if samples > 1:
+        print(f"Samples per problem: {samples}")
+    print(f"Max tokens in flight: {max_inflight_tokens:,}")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    client = _make_client()
+    scheduler = FanOutScheduler(client, provider_concurrency, max_inflight_tokens)
+    errors = {model_key: [] for model_key in model_keys}
+    journals = {}
+    outputs = {}
+    
+    def finish(model_key):
+        outputs[model_key] = _save_model_outputs(
+            model_key, instances, num_problems, journals[model_key], errors[model_key], samples
+        )
+        if on_model_done is not None:
+            on_model_done(model_key, outputs[model_key])
+    
+    try:
+        for model_key in model_keys:
+            journals[model_key] = _open_journal(model_key, instances, num_problems, samples)
+        
+        requests = [
+            request
+            for model_key in model_keys
+            for request in _pending_requests(model_key, instances, journals[model_key], samples)
+        ]
+        results = scheduler.run(
+            requests, call=partial(_stream_completion, client) if stream else None
+        )
+        remaining = Counter(request["model_key"] for request in requests)
+        asyncio.run(_collect_predictions(
+            client, _when_model_done(results, remaining, finish), len(requests), journals, errors,
+        ))
+        _print_telemetry(client)
+        
+        for model_key in model_keys:
+            if model_key not in outputs:  # nothing was pending (resumed run)
+                finish(model_key)
+        return {model_key: outputs[model_key] for model_key in model_keys}
+    finally:
+        for journal in journals.values():
+            journal.close()
+
+
+def submit_to_cloud(predictions_file, model_key, run_id, prefilter=True, jobs=None):
+    """Submit predictions to sb-cli cloud evaluation.
     
-    # Submit command
-    cmd = f"sb-cli submit swe-bench_lite test --predictions_path {predictions_file} --run_id {run_id}"
+    With prefilter=True, patches that are malformed or do not apply at
+    base_commit (evaluation.validate) are dropped first to save quota.
+    Given a CloudJobs, the run is queued and its EvalJob returned at once;
+    otherwise this blocks until the submission (not the evaluation) is done
+    and returns whether it went through.
+    """
     
-    print(f"Command: {cmd}")
-    print(f"Submitting...")
+    if jobs is not None:
+        print(f"☁️  Queued for cloud evaluation: {run_id}")
+        return jobs.submit(predictions_file, run_id, model_key, prefilter=prefilter)
     
-    result = os.system(f"export SWEBENCH_API_KEY={os.getenv('SWEBENCH_API_KEY')} && {cmd}")
+    print(f"\n{'='*70}")
+    print(f"SUBMITTING TO CLOUD: {run_id}")
+    print(f"{'='*70}")
     
-    if result == 0:
+    with CloudJobs.from_env() as own_jobs:
+        job = own_jobs.submit(predictions_file, run_id, model_key, prefilter=prefilter)
+    
+    if job.submitted:
         print(f"✅ Submitted successfully!")
-        return True
     else:
-        print(f"❌ Submission failed (exit code: {result})")
-        return False
+        print(f"❌ Submission {job.status}: {job.error or 'nothing to submit'}")
+    return job.submitted
 
 
-def main():
+def main(instances=None):
     """Run baseline tests for all 8 models overnight."""
     
     print("="*70)
@@ -181,29 +411,43 @@ def main():
     print("="*70)
     
     # Load dataset once
-    print("\nLoading SWE-bench Lite dataset...")
-    dataset = load_dataset("princeton-nlp/SWE-bench_Lite", split="test")
-    instances = list(dataset)[:50]  # First 50 problems
-    print(f"✅ Loaded {len(instances)} problems\n")
+    if instances is None:
+        print("\nLoading SWE-bench Lite dataset...")
+        instances = load_instances(50)  # First 50 problems, prompt columns only
+        print(f"✅ Loaded {len(instances)} problems\n")
     
     # Track results
     all_results = []
     
-    # Test each model
+    # Generate for all models at once; providers have independent quotas.
+    # Each model is submitted in the background as soon as it finishes.
+    jobs = CloudJobs.from_env()
+    
+    def submit_when_done(model_key, output):
+        submit_to_cloud(output[0], model_key, f"baseline_{model_key}_50problems", jobs=jobs)
+    
+    try:
+        outputs = generate_predictions_all_models(
+            list(MODELS), instances, num_problems=50, on_model_done=submit_when_done,
+        )
+        print(f"\n⏳ Waiting for cloud submissions and reports...")
+        jobs.close(wait_for_reports=True)
+    except BaseException:
+        jobs.close()
+        raise
+    
+    # Record each model's submission
     for i, (model_key, model_config) in enumerate(MODELS.items(), 1):
         print(f"\n\n{'#'*70}")
         print(f"MODEL {i}/8: {model_config['name']}")
         print(f"{'#'*70}")
         
         try:
-            # Generate predictions
-            predictions_file, num_preds, num_errors = generate_predictions_for_model(
-                model_key, instances, num_problems=50
-            )
+            predictions_file, num_preds, num_errors = outputs[model_key]
             
-            # Submit to cloud
             run_id = f"baseline_{model_key}_50problems"
-            submitted = submit_to_cloud(predictions_file, model_key, run_id)
+            job = jobs.jobs[run_id]
+            submitted = job.submitted
             
             all_results.append({
                 "model_key": model_key,
@@ -213,12 +457,11 @@ def main():
                 "num_errors": num_errors,
                 "submitted": submitted,
                 "run_id": run_id if submitted else None,
+                "cloud": job.to_dict(),
                 "timestamp": datetime.now().isoformat()
             })
             
             print(f"\n✅ Model {i}/8 complete!")
-            print(f"   Wait time before next model: 30 seconds...")
-            time.sleep(30)  # Rate limiting between models
             
         except Exception as e:
             print(f"\n❌ CRITICAL ERROR for {model_key}: {e}")
@@ -227,7 +470,6 @@ def main():
                 "error": str(e),
                 "timestamp": datetime.now().isoformat()
             })
-            time.sleep(60)  # Longer wait after critical error
     
     # Save master results
     master_file = f"testing/overnight_run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -253,21 +495,23 @@ def main():
     print(f"\n💾 Master log saved to: {master_file}")
     
     print(f"\n{'='*70}")
-    print("TO GET RESULTS:")
+    print("CLOUD EVALUATION:")
     print(f"{'='*70}")
-    print("Run this to see all your submissions:")
-    print("  export SWEBENCH_API_KEY=swb_7qXNMdZptY-e1eK-MlKwKUL8A_r_MSFL84RvJxhB_V4_68e1c2cd")
-    print("  sb-cli list-runs swe-bench_lite test")
-    print("\nThen get each report:")
-    print("  sb-cli get-report swe-bench_lite test baseline_MODEL_KEY_50problems")
+    print(jobs.format_status())
+    print("\nReports are saved in sb-cli-reports/. To resume polling unfinished runs:")
+    print("  python3 -m evaluation.cloud poll baseline_MODEL_KEY_50problems")
+    print("Then see all results:")
+    print("  ./scripts/show_results.sh")
     
     print(f"\n🎉 All baselines established! Ready to build reasoning pipeline!")
 
 
 if __name__ == "__main__":
-    print("\n⚠️  This will run for several hours!")
-    print("Estimated time: 4-6 hours (depending on rate limits)")
-    print("Cost estimate: ~$5-15 (400 predictions × avg $0.01-0.04 per prediction)")
+    instances = load_instances(50)
+    estimate = estimate_run(list(MODELS), instances)
+    print(f"\n⚠️  This will make {estimate.calls} paid API calls!")
+    print(estimate.format())
+    print("(list prices, no prompt-cache discount; all models run concurrently)")
     print("\nPress Ctrl+C within 5 seconds to cancel...")
     
     try:
@@ -277,4 +521,4 @@ if __name__ == "__main__":
         sys.exit(0)
     
     print("\n🚀 Starting overnight baseline run...\n")
-    main()
+    main(instances)
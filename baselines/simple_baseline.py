@@ -14,30 +14,19 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
-from openai import OpenAI
-from datasets import load_dataset
 from models_config import MODELS
+from core.cache import ResponseCache
+from core.client import OpenRouterClient
+from core.dataset import iter_instances, open_dataset
+from core.tokens import count_tokens, prompt_budget, truncate
 
 load_dotenv()
 
+PROMPT_TEMPLATE = """You are a software engineer tasked with fixing a bug.
 
-def load_swe_bench_lite(num_samples=5):
-    """Load first N samples from SWE-bench Lite for quick testing."""
-    print("Loading SWE-bench Lite dataset...")
-    dataset = load_dataset("princeton-nlp/SWE-bench_Lite", split="test")
-    print(f"✅ Loaded {len(dataset)} total problems")
-    print(f"   Testing on first {num_samples} samples\n")
-    # Convert to list for easier slicing
-    return list(dataset)[:num_samples]
-
-
-def format_problem_for_model(instance):
-    """Format a SWE-bench problem for the model."""
-    prompt = f"""You are a software engineer tasked with fixing a bug.
-
-**Repository**: {instance['repo']}
+**Repository**: {repo}
 **Problem Statement**:
-{instance['problem_statement']}
+{problem_statement}
 
 **Instructions**:
 1. Analyze the problem carefully
@@ -45,17 +34,40 @@ def format_problem_for_model(instance):
 3. Explain your reasoning
 
 Provide your solution as a complete patch."""
+
+
+def load_swe_bench_lite(num_samples=5):
+    """Load first N samples from SWE-bench Lite for quick testing."""
+    print("Loading SWE-bench Lite dataset...")
+    dataset = open_dataset()
+    print(f"✅ Loaded {len(dataset)} total problems")
+    print(f"   Testing on first {num_samples} samples\n")
+    # Only the first N rows and the prompt columns leave the Arrow table
+    return list(iter_instances(num_samples, dataset=dataset))
+
+
+def format_problem_for_model(instance, model_id=None, max_tokens=4000):
+    """Format a SWE-bench problem for the model.
+    
+    Given a model_id, the problem statement is cut (keeping its start and
+    end) so the prompt plus max_tokens of output fit the model's context.
+    """
+    problem_statement = instance['problem_statement']
+    budget = prompt_budget(model_id, max_tokens) if model_id else None
+    if budget is not None:
+        frame = count_tokens(PROMPT_TEMPLATE.format(repo=instance['repo'], problem_statement=""))
+        problem_statement = truncate(problem_statement, budget - frame)
     
-    return prompt
+    return PROMPT_TEMPLATE.format(repo=instance['repo'], problem_statement=problem_statement)
 
 
 def test_model_baseline(model_key, instances, max_problems=3):
     """Test a model on SWE-bench problems without any reasoning pipeline."""
     
     model_config = MODELS[model_key]
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=os.getenv("OPENROUTER_API_KEY"),
+    client = OpenRouterClient(
+        title="Giga-Think-SWE-Baseline",
+        cache=ResponseCache.from_env(),
     )
     
     print("="*70)
@@ -73,24 +85,20 @@ def test_model_baseline(model_key, instances, max_problems=3):
         print(f"Repo: {instance['repo']}")
         print(f"Problem: {instance['problem_statement'][:100]}...")
         
-        prompt = format_problem_for_model(instance)
+        prompt = format_problem_for_model(instance, model_config["id"])
         
         try:
             print(f"\n🔄 Querying {model_config['name']}...")
             
-            response = client.chat.completions.create(
-                model=model_config["id"],
+            response = client.complete(
+                model_id=model_config["id"],
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=4000,
                 temperature=0.1,
-                extra_headers={
-                    "HTTP-Referer": "http://localhost:3000",
-                    "X-Title": "Giga-Think-SWE-Baseline",
-                }
             )
             
-            solution = response.choices[0].message.content
-            tokens = response.usage.total_tokens
+            solution = client.get_response_text(response)
+            tokens = client.get_tokens_used(response)
             
             print(f"✅ Response received ({tokens} tokens)")
             print(f"\nSolution preview (first 200 chars):")
@@ -140,7 +148,7 @@ def quick_peek_at_dataset():
     print("PEEKING AT SWE-BENCH LITE DATASET")
     print("="*70)
     
-    dataset = load_dataset("princeton-nlp/SWE-bench_Lite", split="test")
+    dataset = open_dataset()
     
     print(f"\nDataset size: {len(dataset)} problems")
     print(f"\nFields in each problem:")
@@ -174,15 +182,15 @@ if __name__ == "__main__":
             test_model_baseline(model_key, instances, max_problems=num_problems)
     else:
         print("\nUsage:")
-        print("  python testing/swe_bench_baseline.py --peek")
+        print("  python baselines/simple_baseline.py --peek")
         print("    └─ Just look at the dataset structure")
         print()
-        print("  python testing/swe_bench_baseline.py --test [model_key] [num_problems]")
+        print("  python baselines/simple_baseline.py --test [model_key] [num_problems]")
         print("    └─ Test a model on N problems")
         print()
         print("Examples:")
-        print("  python testing/swe_bench_baseline.py --peek")
-        print("  python testing/swe_bench_baseline.py --test google_budget 2")
-        print("  python testing/swe_bench_baseline.py --test grok_best 5")
+        print("  python baselines/simple_baseline.py --peek")
+        print("  python baselines/simple_baseline.py --test google_budget 2")
+        print("  python baselines/simple_baseline.py --test grok_best 5")
         print()
         print("Available models:", ", ".join(MODELS.keys()))
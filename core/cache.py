@@ -0,0 +1,177 @@
+"""
+Content-addressed on-disk cache for model completions.
+
+Responses are keyed on a hash of (model_id, messages, max_tokens, temperature)
+and stored in a single SQLite file, so a crashed or repeated benchmark run
+never pays twice for the same completion.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = ".cache/responses.sqlite"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 3600
+
+# Eviction scans the table, so only run it every this many writes
+EVICT_EVERY = 50
+
+
+class CacheMiss(KeyError):
+    """Raised in replay mode when a request has no cached response."""
+
+
+class ResponseCache:
+    """SQLite-backed response store with size- and age-based eviction.
+
+    In replay mode the database is opened read-only: hits are served as
+    usual and misses raise CacheMiss instead of reaching the API.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age_seconds=DEFAULT_MAX_AGE_SECONDS, replay=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.replay = replay
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        if replay:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No response cache to replay at {path}")
+            self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True,
+                                       check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls):
+        """Build the cache configured in .env, or None when it is turned off.
+
+        RESPONSE_CACHE_MODE is one of "readwrite" (default), "replay" or "off".
+        """
+        mode = os.getenv("RESPONSE_CACHE_MODE", "readwrite").lower()
+        if mode == "off":
+            return None
+        return cls(
+            path=os.getenv("RESPONSE_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_bytes=int(float(os.getenv("RESPONSE_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2**20)) * 2**20),
+            max_age_seconds=float(os.getenv("RESPONSE_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_SECONDS / 86400)) * 86400,
+            replay=(mode == "replay"),
+        )
+
+    @staticmethod
+    def key(model_id, messages, max_tokens, temperature, n=1, sample=0):
+        """Hash the request parameters that determine a completion.
+
+        `n` and `sample` (the index of one of several independent samples of
+        the same request) only enter the key when set, so single-sample keys
+        stay the same.
+        """
+        params = [model_id, messages, max_tokens, temperature]
+        if n != 1 or sample:
+            params += [n, sample]
+        canonical = json.dumps(
+            params,
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached payload for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, created_at = row
+            if self.max_age_seconds and now - created_at > self.max_age_seconds:
+                return None
+            if not self.replay:
+                self._db.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                self._db.commit()
+        return payload
+
+    def put(self, key, model_id, payload):
+        """Store a payload (a JSON string) under key."""
+        if self.replay:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_id, payload, len(payload.encode("utf-8")), now, now),
+            )
+            self._db.commit()
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self._evict(now)
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones over the size cap."""
+        if self.replay:
+            return
+        with self._lock:
+            self._evict(time.time())
+
+    def _evict(self, now):
+        if self.max_age_seconds:
+            self._db.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (now - self.max_age_seconds,),
+            )
+        if self.max_bytes:
+            total = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                freed = 0
+                stale = []
+                for key, size in self._db.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed_at"
+                ):
+                    stale.append((key,))
+                    freed += size
+                    if freed >= excess:
+                        break
+                self._db.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self._db.commit()
+
+    def stats(self):
+        """Return the number of entries and their total size in bytes."""
+        with self._lock:
+            count, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": count, "bytes": total}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
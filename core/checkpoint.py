@@ -0,0 +1,64 @@
+"""
+Append-only checkpoint journal for long prediction runs.
+
+Every finished (model, instance) result is written as one JSON line and
+fsync'd before the run moves on, so a crash loses at most the requests that
+were in flight. Reopening the journal tells the run which instances to skip.
+"""
+import json
+import os
+
+
+class CheckpointJournal:
+    """JSONL journal mapping instance_id -> completed record."""
+
+    def __init__(self, path):
+        self.path = path
+        self.completed = {}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        for line_no, line in enumerate(lines, 1):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash mid-write leaves a torn final line; everything
+                # before it was fsync'd and is safe to keep.
+                if line_no == len(lines):
+                    self._truncate_torn_tail(len(lines) - 1)
+                    break
+                raise
+            self.completed[entry["instance_id"]] = entry["record"]
+
+    def _truncate_torn_tail(self, keep_lines):
+        with open(self.path, "r", encoding="utf-8") as f:
+            kept = [next(f) for _ in range(keep_lines)]
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.writelines(kept)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def is_done(self, instance_id):
+        return instance_id in self.completed
+
+    def record(self, instance_id, record):
+        """Durably append a finished result."""
+        self._file.write(json.dumps({"instance_id": instance_id, "record": record}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.completed[instance_id] = record
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,41 +1,514 @@
 """
 OpenRouter client wrapper for unified model access.
 """
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from core.cache import CacheMiss
+from core.costs import usage_cost
+from core.ratelimit import RetryPolicy, estimate_tokens, provider_for, shared_rate_limiter
+from core.telemetry import TAG_KEYS, CallTimer
+from core.tokens import count_message_tokens, count_tokens
 
 load_dotenv()
 
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+
+def default_base_url():
+    """OPENROUTER_BASE_URL from .env (e.g. a local mock server), else the real API."""
+    return os.getenv("OPENROUTER_BASE_URL") or OPENROUTER_BASE_URL
+
+
+# Keyword arguments of complete() that a batch request may carry
+COMPLETION_ARGS = ("model_id", "messages", "max_tokens", "temperature", "stream", "n", "sample")
+
+
+def request_tags(request):
+    """The telemetry tags (run_id, model_key, stage, instance_id) a batch request carries."""
+    return {k: request[k] for k in TAG_KEYS if k in request}
+
+
+# Providers that return several choices for one request with `n`; others
+# are sampled with concurrent requests instead
+N_PARAMETER_PROVIDERS = {"OpenAI"}
+
+# finish_reason values ChatCompletion accepts when rebuilt from a stream
+FINISH_REASONS = {"stop", "length", "tool_calls", "content_filter", "function_call"}
+
+
+def supports_n(model_id):
+    """True if the model's provider honours the `n` parameter."""
+    return provider_for(model_id) in N_PARAMETER_PROVIDERS
+
+
+def sample_requests(request, samples):
+    """Expand a batch request into requests for the given sample indices.
+
+    Providers that support `n` get one request for all of them; the rest
+    get one concurrent request per sample. Each request lists the sample
+    indices it answers under "samples".
+    """
+    samples = list(samples)
+    if len(samples) > 1 and supports_n(request["model_id"]):
+        return [dict(request, n=len(samples), samples=samples)]
+    return [dict(request, sample=s, samples=[s]) for s in samples]
+
+
+def estimated_usage(messages, text):
+    """Usage counted locally, for a stream closed before the provider reported any."""
+    prompt_tokens = count_message_tokens(messages)
+    completion_tokens = count_tokens(text)
+    return CompletionUsage(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           total_tokens=prompt_tokens + completion_tokens)
+
+
+# Header carrying the sample index (see complete()), which otherwise only enters the cache key
+SAMPLE_HEADER = "X-Sample-Index"
+
+
+def _extra_headers(title):
+    return {
+        "HTTP-Referer": "http://localhost:3000",
+        "X-Title": title,
+    }
+
+
+def _chunks_from_response(response):
+    """Replay a finished (e.g. cached) response as a single stream chunk."""
+    choice = response.choices[0]
+    yield ChatCompletionChunk.model_validate({
+        "id": response.id,
+        "object": "chat.completion.chunk",
+        "created": response.created,
+        "model": response.model,
+        "choices": [{
+            "index": 0,
+            "delta": {"role": "assistant", "content": choice.message.content},
+            "finish_reason": choice.finish_reason,
+        }],
+        "usage": response.usage.model_dump() if response.usage else None,
+    })
+
+
+class CompletionStream:
+    """Iterator over the text deltas of a streamed completion.
+
+    Stop reading and call close() to end the generation early. `text`,
+    `usage` and `finish_reason` fill in as chunks arrive; `usage` is only
+    sent at the very end, so it stays None for a stream closed early.
+    Set `done` before stopping when the text so far is a complete answer
+    (e.g. its diff block has closed); the client then caches it like a
+    response that ran to the end.
+    """
+
+    def __init__(self, chunks, model_id, on_finish=None):
+        self._chunks = chunks
+        self._on_finish = on_finish
+        self._finished = False
+        self.model_id = model_id
+        self.parts = []
+        self.usage = None
+        self.finish_reason = None
+        self.stopped_early = False
+        self.done = False
+        self.first_token_at = None  # time.monotonic() of the first text delta
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def _consume(self, chunk):
+        if chunk.usage is not None:
+            self.usage = chunk.usage
+        if not chunk.choices:
+            return None
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+        delta = choice.delta.content if choice.delta else None
+        if delta:
+            if self.first_token_at is None:
+                self.first_token_at = time.monotonic()
+            self.parts.append(delta)
+        return delta
+
+    def __iter__(self):
+        try:
+            for chunk in self._chunks:
+                delta = self._consume(chunk)
+                if delta:
+                    yield delta
+        finally:
+            self._finish()
+
+    def close(self):
+        """Stop the generation; whatever arrived so far is kept."""
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+        self._finish()
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        if self.finish_reason is None:
+            self.stopped_early = True
+        if self._on_finish is not None:
+            self._on_finish(self)
+
+    def to_response(self):
+        """Assemble what has been received into a ChatCompletion."""
+        finish_reason = self.finish_reason if self.finish_reason in FINISH_REASONS else "stop"
+        return ChatCompletion.model_validate({
+            "id": "stream",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": self.model_id,
+            "choices": [{
+                "index": 0,
+                "finish_reason": finish_reason,
+                "message": {"role": "assistant", "content": self.text},
+            }],
+            "usage": self.usage.model_dump() if self.usage else None,
+        })
+
+
+class AsyncCompletionStream(CompletionStream):
+    """Async-iterator flavour of CompletionStream."""
+
+    def __iter__(self):
+        raise TypeError("use 'async for' with AsyncCompletionStream")
+
+    async def __aiter__(self):
+        try:
+            if hasattr(self._chunks, "__aiter__"):
+                async for chunk in self._chunks:
+                    delta = self._consume(chunk)
+                    if delta:
+                        yield delta
+            else:
+                for chunk in self._chunks:
+                    delta = self._consume(chunk)
+                    if delta:
+                        yield delta
+        finally:
+            self._finish()
+
+    async def aclose(self):
+        """Stop the generation; whatever arrived so far is kept."""
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+        self._finish()
+
 
 class OpenRouterClient:
-    """Unified client for all OpenRouter models."""
-    
-    def __init__(self, api_key=None):
+    """Unified client for all OpenRouter models.
+
+    Pass a core.cache.ResponseCache as `cache` to serve repeated requests
+    from disk instead of the API. Calls are paced by a core.ratelimit
+    RateLimiter (the process-wide one by default) and retried according to
+    `retry_policy` only when the error is retryable. `base_url` points the
+    client at any OpenAI-compatible server, such as testing/mock_openrouter.py.
+    A core.telemetry.Telemetry passed as `telemetry` gets a record of every
+    call, tagged with the `tags` given to complete().
+    """
+
+    client_class = OpenAI
+
+    def __init__(self, api_key=None, title="Giga-Think", cache=None,
+                 rate_limiter=None, retry_policy=None, base_url=None, telemetry=None):
         self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
+        self.title = title
+        self.cache = cache
+        self.telemetry = telemetry
+        self.rate_limiter = rate_limiter or shared_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.base_url = base_url or default_base_url()
+        self.client = self.client_class(
+            base_url=self.base_url,
             api_key=self.api_key,
+            max_retries=0,  # retries are handled by retry_policy
         )
-    
-    def complete(self, model_id, messages, max_tokens=4000, temperature=0.1):
-        """Make a completion request."""
-        response = self.client.chat.completions.create(
-            model=model_id,
-            messages=messages,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            extra_headers={
-                "HTTP-Referer": "http://localhost:3000",
-                "X-Title": "Giga-Think",
-            }
-        )
+
+    def complete(self, model_id, messages, max_tokens=4000, temperature=0.1, stream=False,
+                 n=1, sample=0, tags=None):
+        """Make a completion request.
+
+        With stream=True a CompletionStream of text deltas is returned
+        instead of the finished response. `n` asks for several choices in
+        one response (see supports_n()); `sample` numbers independent
+        samples of the same request so each gets its own cache entry.
+        `tags` (model_key, stage, instance_id) label the telemetry record.
+        """
+        timer = CallTimer(model_id, tags)
+        cache_key, response = self._cached(model_id, messages, max_tokens, temperature, n, sample)
+        if response is not None:
+            timer.cache_hit = True
+            self._report(timer, response)
+            if stream:
+                return CompletionStream(_chunks_from_response(response), model_id)
+            return response
+
+        reserved = estimate_tokens(messages, max_tokens * n)
+        self.rate_limiter.acquire(model_id, reserved)
+        timer.send()
+        try:
+            for attempt in range(self.retry_policy.max_retries + 1):
+                timer.retries = attempt
+                try:
+                    response = self.client.chat.completions.create(
+                        **self._request_args(model_id, messages, max_tokens, temperature, stream, n, sample)
+                    )
+                    break
+                except Exception as e:
+                    time.sleep(self._retry_delay(model_id, e, attempt))
+                    self.rate_limiter.acquire(model_id)
+        except BaseException as e:
+            self.rate_limiter.settle(model_id, reserved, 0)
+            self._report(timer, error=e)
+            raise
+
+        if stream:
+            return CompletionStream(
+                response, model_id,
+                on_finish=lambda s: self._finish_stream(s, cache_key, reserved, timer, messages),
+            )
+        self.rate_limiter.settle(model_id, reserved, self._usage_tokens(response))
+        self._store(cache_key, model_id, response)
+        self._report(timer, response)
         return response
-    
+
+    def _request_args(self, model_id, messages, max_tokens, temperature, stream, n=1, sample=0):
+        if stream and n != 1:
+            raise ValueError("stream=True supports a single choice only (n=1)")
+        args = {
+            "model": model_id,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "extra_headers": _extra_headers(self.title),
+            # Ask OpenRouter to report the dollar cost in `usage`
+            "extra_body": {"usage": {"include": True}},
+        }
+        if n != 1:
+            args["n"] = n
+        if sample:
+            # Not used by the API; lets a replaying mock find this sample's cache entry
+            args["extra_headers"][SAMPLE_HEADER] = str(sample)
+        if stream:
+            args["stream"] = True
+            args["stream_options"] = {"include_usage": True}
+        return args
+
+    def _finish_stream(self, stream, cache_key, reserved, timer=None, messages=None):
+        """Settle the rate limiter and cache a stream that ran to completion.
+
+        A stream stopped early is cached only if the caller marked it done.
+        The key is the request's, so a later non-stream call gets the same
+        text.
+        """
+        used = self._usage_tokens(stream) if stream.usage is not None else reserved
+        self.rate_limiter.settle(stream.model_id, reserved, used)
+        if not stream.stopped_early or stream.done:
+            self._store(cache_key, stream.model_id, stream.to_response())
+        if timer is not None:
+            timer.first_token = stream.first_token_at
+            self._report(timer, stream, messages=messages)
+
+    def _report(self, timer, response=None, error=None, messages=None):
+        """Hand a finished call to telemetry, if the client has any.
+
+        The cost is the one OpenRouter reported, else priced from core.models.
+        A stream without usage (closed early) is counted from `messages` and
+        its text, and recorded as estimated.
+        """
+        if self.telemetry is not None:
+            usage = getattr(response, "usage", None)
+            estimated = usage is None and messages is not None and error is None
+            if estimated:
+                usage = estimated_usage(messages, response.text)
+            self.telemetry.record_call(timer, usage, usage_cost(timer.model_id, usage), error,
+                                       estimated)
+
+    def _retry_delay(self, model_id, error, attempt):
+        """Seconds to wait before retrying; re-raises errors not worth retrying."""
+        policy = self.retry_policy
+        if attempt >= policy.max_retries or not policy.is_retryable(error):
+            raise error
+        retry_after = policy.retry_after(error)
+        if retry_after:
+            self.rate_limiter.pause(model_id, retry_after)
+        return policy.delay(attempt, retry_after)
+
+    @staticmethod
+    def _usage_tokens(response):
+        usage = getattr(response, "usage", None)
+        return usage.total_tokens if usage is not None else 0
+
+    def _cached(self, model_id, messages, max_tokens, temperature, n=1, sample=0):
+        """Look a request up in the cache; returns (cache_key, response or None)."""
+        if self.cache is None:
+            return None, None
+        cache_key = self.cache.key(model_id, messages, max_tokens, temperature, n, sample)
+        payload = self.cache.get(cache_key)
+        if payload is not None:
+            return cache_key, ChatCompletion.model_validate_json(payload)
+        if self.cache.replay:
+            raise CacheMiss(f"No cached response for {model_id} (key {cache_key[:12]})")
+        return cache_key, None
+
+    def _store(self, cache_key, model_id, response):
+        if cache_key is not None:
+            self.cache.put(cache_key, model_id, response.model_dump_json())
+
     def get_response_text(self, response):
         """Extract text from response."""
         return response.choices[0].message.content
-    
+
+    def get_response_texts(self, response):
+        """Text of every choice, for responses requested with n > 1."""
+        return [choice.message.content or "" for choice in response.choices]
+
     def get_tokens_used(self, response):
-        """Get token usage from response."""
-        return response.usage.total_tokens
+        """Get token usage from response (0 if a stream was cut short)."""
+        return self._usage_tokens(response)
+
+    def get_cached_tokens(self, response):
+        """Prompt tokens served from the provider's prompt cache (0 if not reported)."""
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None) if usage is not None else None
+        return (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+
+    def get_cost(self, response):
+        """Dollar cost OpenRouter reported for the response, or None."""
+        usage = getattr(response, "usage", None)
+        return getattr(usage, "cost", None) if usage is not None else None
+
+
+class AsyncOpenRouterClient(OpenRouterClient):
+    """Asyncio client that runs many OpenRouter completions concurrently.
+
+    `max_concurrency` bounds the total number of in-flight requests and
+    `per_model_concurrency` maps a model ID to its own, tighter limit.
+    """
+
+    client_class = AsyncOpenAI
+
+    def __init__(self, api_key=None, title="Giga-Think", cache=None,
+                 rate_limiter=None, retry_policy=None, base_url=None,
+                 max_concurrency=16, per_model_concurrency=None, telemetry=None):
+        super().__init__(api_key, title, cache, rate_limiter, retry_policy, base_url, telemetry)
+        self.max_concurrency = max_concurrency
+        self.per_model_concurrency = per_model_concurrency or {}
+
+    async def complete(self, model_id, messages, max_tokens=4000, temperature=0.1, stream=False,
+                       n=1, sample=0, tags=None):
+        """Make a completion request.
+
+        With stream=True an AsyncCompletionStream of text deltas is returned
+        instead of the finished response. `n`, `sample` and `tags` work as
+        in OpenRouterClient.complete().
+        """
+        timer = CallTimer(model_id, tags)
+        cache_key, response = self._cached(model_id, messages, max_tokens, temperature, n, sample)
+        if response is not None:
+            timer.cache_hit = True
+            self._report(timer, response)
+            if stream:
+                return AsyncCompletionStream(_chunks_from_response(response), model_id)
+            return response
+
+        reserved = estimate_tokens(messages, max_tokens * n)
+        await self.rate_limiter.acquire_async(model_id, reserved)
+        timer.send()
+        try:
+            for attempt in range(self.retry_policy.max_retries + 1):
+                timer.retries = attempt
+                try:
+                    response = await self.client.chat.completions.create(
+                        **self._request_args(model_id, messages, max_tokens, temperature, stream, n, sample)
+                    )
+                    break
+                except Exception as e:
+                    await asyncio.sleep(self._retry_delay(model_id, e, attempt))
+                    await self.rate_limiter.acquire_async(model_id)
+        except BaseException as e:
+            self.rate_limiter.settle(model_id, reserved, 0)
+            self._report(timer, error=e)
+            raise
+
+        if stream:
+            return AsyncCompletionStream(
+                response, model_id,
+                on_finish=lambda s: self._finish_stream(s, cache_key, reserved, timer, messages),
+            )
+        self.rate_limiter.settle(model_id, reserved, self._usage_tokens(response))
+        self._store(cache_key, model_id, response)
+        self._report(timer, response)
+        return response
+
+    async def call_request(self, request):
+        """complete() with the arguments held in a batch request dict."""
+        return await self.complete(
+            **{k: request[k] for k in COMPLETION_ARGS if k in request},
+            tags=request_tags(request),
+        )
+
+    async def complete_many(self, requests, max_concurrency=None, call=None):
+        """Run a batch of completions, yielding results as they finish.
+
+        Each request is a dict holding the keyword arguments of complete();
+        any other keys (instance IDs, model keys, ...) are passed through
+        untouched. Every yielded result is a dict with the original
+        "request", the "response" (or None), the "error" (or None) and the
+        "elapsed" seconds spent on the call. Failures never abort the batch.
+
+        `call` replaces call_request() for each request, e.g. to consume a
+        stream and return the assembled response.
+        """
+        call = call or self.call_request
+        global_limit = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        model_limits = {}
+
+        async def run(request):
+            model_id = request["model_id"]
+            if model_id not in model_limits:
+                limit = self.per_model_concurrency.get(model_id, self.max_concurrency)
+                model_limits[model_id] = asyncio.Semaphore(limit)
+
+            # Wait on the model's own limit first so a saturated model never
+            # holds global slots that other models could be using.
+            async with model_limits[model_id], global_limit:
+                start_time = time.monotonic()
+                try:
+                    response = await call(request)
+                    error = None
+                except Exception as e:
+                    response, error = None, e
+                elapsed = time.monotonic() - start_time
+
+            return {
+                "request": request,
+                "response": response,
+                "error": error,
+                "elapsed": elapsed,
+            }
+
+        tasks = [asyncio.create_task(run(request)) for request in requests]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # The consumer may stop early; don't leave requests running.
+            for task in tasks:
+                task.cancel()
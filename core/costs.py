@@ -0,0 +1,176 @@
+"""
+Cost and duration estimates from the pricing and throughput in core.models.
+
+usage_cost() prices a finished call from its token usage when OpenRouter
+did not report the cost itself. estimate_requests() predicts the cost and
+wall-clock time of a batch before anything is sent: prompt tokens are
+counted from the messages, each completion is assumed to be
+`completion_tokens` long (max_tokens is a ceiling, not the typical size),
+and every provider works through its share of the calls at its
+concurrency limit while the providers run side by side, as in
+core.scheduler.FanOutScheduler. Rate-limit waits and retries are not
+modelled, so treat durations as a lower bound.
+"""
+from collections import OrderedDict
+
+from core.models import MODELS, get_model_key
+from core.ratelimit import estimate_tokens, provider_for
+
+PER_MILLION = 1_000_000
+
+# Typical length of a structured-diff answer; most stop well before max_tokens
+DEFAULT_COMPLETION_TOKENS = 1500
+
+
+def model_config(model):
+    """The MODELS entry for a model key or OpenRouter model ID, or None."""
+    return MODELS.get(model) or MODELS.get(get_model_key(model))
+
+
+def token_cost(model, prompt_tokens, completion_tokens, cached_tokens=0, cache_write_tokens=0):
+    """Dollar cost of a call, or None for a model without pricing.
+
+    `cached_tokens` and `cache_write_tokens` are the parts of
+    `prompt_tokens` read from and written to the provider's prompt cache.
+    """
+    config = model_config(model)
+    if config is None:
+        return None
+    prices = config["pricing"]
+    cache_read = prices["cache_read"] if prices["cache_read"] is not None else prices["input"]
+    cache_write = prices["cache_write"] if prices["cache_write"] is not None else prices["input"]
+    uncached = max(0, prompt_tokens - cached_tokens - cache_write_tokens)
+    return (
+        uncached * prices["input"]
+        + cached_tokens * cache_read
+        + cache_write_tokens * cache_write
+        + completion_tokens * prices["output"]
+    ) / PER_MILLION
+
+
+def usage_cost(model, usage):
+    """Cost of a finished call: the one OpenRouter reported, else priced from usage."""
+    if usage is None:
+        return None
+    reported = getattr(usage, "cost", None)
+    if reported is not None:
+        return reported
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or 0
+    return token_cost(model, usage.prompt_tokens or 0, usage.completion_tokens or 0, cached)
+
+
+def call_seconds(model, completion_tokens=DEFAULT_COMPLETION_TOKENS):
+    """Expected duration of one call, or None for a model without throughput hints."""
+    config = model_config(model)
+    if config is None:
+        return None
+    throughput = config["throughput"]
+    return throughput["first_token_seconds"] + completion_tokens / throughput["tokens_per_second"]
+
+
+def max_completion_tokens(model, prompt_tokens, max_tokens):
+    """`max_tokens`, lowered if needed so prompt and completion fit the context window.
+
+    Raises ValueError if the prompt alone does not fit.
+    """
+    config = model_config(model)
+    if config is None:
+        return max_tokens
+    room = config["context_tokens"] - prompt_tokens
+    if room <= 0:
+        raise ValueError(
+            f"Prompt of ~{prompt_tokens:,} tokens exceeds the "
+            f"{config['context_tokens']:,}-token context of {config['id']}"
+        )
+    return min(max_tokens, room)
+
+
+def expected_completion_tokens(request, completion_tokens=DEFAULT_COMPLETION_TOKENS):
+    """Completion tokens a batch request is expected to produce (all `n` choices)."""
+    return min(request.get("max_tokens", 4000), completion_tokens) * request.get("n", 1)
+
+
+def request_seconds(request, completion_tokens=DEFAULT_COMPLETION_TOKENS):
+    """Expected duration of a batch request (0 for unknown models)."""
+    # The n choices of one request are generated side by side
+    per_choice = min(request.get("max_tokens", 4000), completion_tokens)
+    return call_seconds(request["model_id"], per_choice) or 0.0
+
+
+class RunEstimate:
+    """Predicted calls, tokens, cost and duration of a batch, per model."""
+
+    def __init__(self, concurrency=8):
+        self.concurrency = concurrency
+        self.models = OrderedDict()
+
+    def add(self, model_key, provider, prompt_tokens, completion_tokens, cost, seconds):
+        row = self.models.setdefault(model_key, {
+            "model_key": model_key, "provider": provider, "calls": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "call_seconds": 0.0,
+        })
+        row["calls"] += 1
+        row["prompt_tokens"] += prompt_tokens
+        row["completion_tokens"] += completion_tokens
+        row["cost"] += cost
+        row["call_seconds"] += seconds
+
+    def limit_for(self, provider):
+        if isinstance(self.concurrency, dict):
+            return self.concurrency.get(provider, self.concurrency.get("default", 4))
+        return self.concurrency
+
+    @property
+    def cost(self):
+        return sum(row["cost"] for row in self.models.values())
+
+    @property
+    def calls(self):
+        return sum(row["calls"] for row in self.models.values())
+
+    @property
+    def seconds(self):
+        """Wall-clock estimate: the busiest provider sets the pace."""
+        by_provider = {}
+        for row in self.models.values():
+            by_provider[row["provider"]] = by_provider.get(row["provider"], 0) + row["call_seconds"]
+        return max(
+            (total / self.limit_for(provider) for provider, total in by_provider.items()),
+            default=0.0,
+        )
+
+    def format(self):
+        """Per-model table plus a total line."""
+        lines = [f"{'model':<16}{'calls':>7}{'prompt tok':>13}{'output tok':>13}{'cost':>11}"]
+        for row in self.models.values():
+            lines.append(
+                f"{row['model_key']:<16}{row['calls']:>7}{row['prompt_tokens']:>13,}"
+                f"{row['completion_tokens']:>13,}{'$' + format(row['cost'], '.2f'):>11}"
+            )
+        lines.append(f"{'total':<16}{self.calls:>7}{'':>26}{'$' + format(self.cost, '.2f'):>11}")
+        lines.append(f"Estimated duration: ~{self.seconds / 60:.0f} min")
+        return "\n".join(lines)
+
+
+def estimate_requests(requests, concurrency=8, completion_tokens=DEFAULT_COMPLETION_TOKENS):
+    """Estimate a batch of requests (dicts holding complete() arguments).
+
+    `concurrency` is a single limit, or a {provider: limit} dict with an
+    optional "default" entry like core.scheduler.DEFAULT_PROVIDER_CONCURRENCY.
+    Cached prompt tokens are not assumed, so the cost errs on the high side.
+    """
+    estimate = RunEstimate(concurrency)
+    for request in requests:
+        model_id = request["model_id"]
+        prompt = estimate_tokens(request["messages"])
+        completion = expected_completion_tokens(request, completion_tokens)
+        estimate.add(
+            get_model_key(model_id) or model_id,
+            provider_for(model_id),
+            prompt,
+            completion,
+            token_cost(model_id, prompt, completion) or 0.0,
+            request_seconds(request, completion_tokens),
+        )
+    return estimate
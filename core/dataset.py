@@ -0,0 +1,194 @@
+"""
+Lazy access to SWE-bench datasets.
+
+Rows are selected and column-projected on the Arrow-backed dataset before
+anything is turned into Python objects, so taking the first N problems never
+materializes the whole split (or its large unused columns).
+
+Run `python -m core.dataset snapshot` once to export a split to a local
+Arrow file with an instance_id index. open_dataset() memory-maps that file
+when it exists, so loaders start in milliseconds without touching the
+network or importing `datasets`.
+"""
+import argparse
+import json
+import os
+
+DEFAULT_DATASET = "princeton-nlp/SWE-bench_Lite"
+DEFAULT_SPLIT = "test"
+
+# The only fields the prompts need
+PROMPT_COLUMNS = ("instance_id", "repo", "problem_statement")
+
+DEFAULT_SNAPSHOT_DIR = ".cache/datasets"
+
+
+def snapshot_path(name=DEFAULT_DATASET, split=DEFAULT_SPLIT, directory=None):
+    """Where the snapshot of name/split lives (SWE_BENCH_SNAPSHOT_DIR overrides the directory)."""
+    directory = directory or os.getenv("SWE_BENCH_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)
+    return os.path.join(directory, f"{name.replace('/', '__')}__{split}.arrow")
+
+
+def _index_path(path):
+    return path + ".index.json"
+
+
+class SnapshotDataset:
+    """Memory-mapped Arrow snapshot of one split.
+
+    Implements the small part of the datasets.Dataset API the loaders use
+    (len, indexing, iteration, select_columns, select), plus get() for
+    lookups by instance_id.
+    """
+
+    def __init__(self, table, index=None, index_file=None):
+        self.table = table
+        self._index = index
+        self._index_file = index_file
+
+    @classmethod
+    def open(cls, path):
+        import pyarrow as pa
+
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        return cls(table, index_file=_index_path(path))
+
+    @property
+    def column_names(self):
+        return self.table.column_names
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return self.table.slice(row, 1).to_pylist()[0]
+
+    def __iter__(self):
+        for batch in self.table.to_batches(max_chunksize=256):
+            yield from batch.to_pylist()
+
+    def select_columns(self, columns):
+        return SnapshotDataset(self.table.select(list(columns)), self._index, self._index_file)
+
+    def select(self, indices):
+        if isinstance(indices, range) and indices.step == 1:
+            table = self.table.slice(indices.start, len(indices))
+        else:
+            table = self.table.take(list(indices))
+        # Row numbers change, so the instance_id index no longer applies
+        return SnapshotDataset(table)
+
+    @property
+    def index(self):
+        """instance_id -> row number, read from the sidecar file or built on demand."""
+        if self._index is None:
+            if self._index_file and os.path.exists(self._index_file):
+                with open(self._index_file, "r") as f:
+                    self._index = json.load(f)
+            else:
+                ids = self.table.column("instance_id").to_pylist()
+                self._index = {instance_id: row for row, instance_id in enumerate(ids)}
+        return self._index
+
+    def get(self, instance_id):
+        """The row for instance_id, or None if it is not in the split."""
+        row = self.index.get(instance_id)
+        return None if row is None else self[row]
+
+
+def write_snapshot(name=DEFAULT_DATASET, split=DEFAULT_SPLIT, path=None):
+    """Download name/split once and write it as an Arrow IPC file plus index.
+
+    Returns the snapshot path and the number of rows.
+    """
+    import pyarrow as pa
+    from datasets import load_dataset
+
+    path = path or snapshot_path(name, split)
+    dataset = load_dataset(name, split=split)
+    table = dataset.flatten_indices().data.table.combine_chunks()
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=256)
+    ids = table.column("instance_id").to_pylist()
+    with open(_index_path(path) + ".tmp", "w") as f:
+        json.dump({instance_id: row for row, instance_id in enumerate(ids)}, f)
+    os.replace(_index_path(path) + ".tmp", _index_path(path))
+    os.replace(tmp_path, path)
+    return path, table.num_rows
+
+
+def open_dataset(name=DEFAULT_DATASET, split=DEFAULT_SPLIT):
+    """Open a dataset split without converting any rows.
+
+    Uses the local snapshot if there is one, else Hugging Face.
+    """
+    path = snapshot_path(name, split)
+    if os.path.exists(path):
+        return SnapshotDataset.open(path)
+    from datasets import load_dataset
+    return load_dataset(name, split=split)
+
+
+def get_instance(instance_id, name=DEFAULT_DATASET, split=DEFAULT_SPLIT, dataset=None):
+    """Look up one instance (all columns) by instance_id, or None."""
+    if dataset is None:
+        dataset = open_dataset(name, split)
+    if isinstance(dataset, SnapshotDataset):
+        return dataset.get(instance_id)
+    for row, candidate in enumerate(dataset["instance_id"]):
+        if candidate == instance_id:
+            return dataset[row]
+    return None
+
+
+def select_instances(dataset, num_samples=None, columns=PROMPT_COLUMNS, start=0):
+    """Slice rows [start, start + num_samples) and keep only `columns`.
+
+    Both steps stay on the Arrow table; pass columns=None to keep all fields.
+    """
+    if columns:
+        dataset = dataset.select_columns(list(columns))
+    stop = len(dataset) if num_samples is None else min(len(dataset), start + num_samples)
+    return dataset.select(range(start, stop))
+
+
+def iter_instances(num_samples=None, columns=PROMPT_COLUMNS, start=0,
+                   name=DEFAULT_DATASET, split=DEFAULT_SPLIT, dataset=None):
+    """Yield instances one at a time as plain dicts."""
+    if dataset is None:
+        dataset = open_dataset(name, split)
+    yield from select_instances(dataset, num_samples, columns, start)
+
+
+def load_instances(num_samples=None, columns=PROMPT_COLUMNS, start=0,
+                   name=DEFAULT_DATASET, split=DEFAULT_SPLIT, dataset=None):
+    """Like iter_instances(), but returns a list for callers that slice or re-read."""
+    return list(iter_instances(num_samples, columns, start, name, split, dataset))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SWE-bench dataset utilities")
+    commands = parser.add_subparsers(dest="command", required=True)
+    snap = commands.add_parser("snapshot", help="Export a split to a local memory-mapped Arrow file")
+    snap.add_argument("--name", default=DEFAULT_DATASET)
+    snap.add_argument("--split", default=DEFAULT_SPLIT)
+    snap.add_argument("--dir", help=f"Snapshot directory (default: $SWE_BENCH_SNAPSHOT_DIR or {DEFAULT_SNAPSHOT_DIR})")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        print(f"📥 Exporting {args.name} [{args.split}]...")
+        path, rows = write_snapshot(args.name, args.split, snapshot_path(args.name, args.split, args.dir))
+        print(f"✅ Wrote {rows} instances to {path}")
+        print(f"   Index: {_index_path(path)}")
+
+
+if __name__ == "__main__":
+    main()
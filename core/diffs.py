@@ -0,0 +1,219 @@
+"""
+Structural parsing of unified diffs.
+
+parse_patch() reads a diff (or a whole model response) line by line,
+once, and returns a Patch of FilePatch objects, each holding its Hunks.
+Text that is not part of a diff, such as prose around the patch or
+`index` lines, is skipped or kept as file header lines, never an error.
+Each hunk's header counts are checked against its body. Problems are
+collected in Patch.errors instead of raised, so callers can reject or
+repair malformed patches before they reach evaluation.
+
+Model patches are often slightly damaged, and the parser tolerates
+what `git apply` tolerates:
+- a blank line inside a hunk is read as an empty context line;
+- a body line after a hunk whose header under-counts it still belongs to
+  that hunk, and the miscount is reported.
+"""
+import re
+
+HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$')
+
+BODY_PREFIXES = (" ", "-", "+")
+NO_NEWLINE = "\\"  # "\ No newline at end of file"
+
+# Extended header lines between "diff --git" and "---"
+GIT_HEADER_PREFIXES = (
+    "index ", "old mode ", "new mode ", "deleted file mode ", "new file mode ",
+    "similarity index ", "dissimilarity index ", "rename from ", "rename to ",
+    "copy from ", "copy to ", "Binary files ",
+)
+
+
+def _strip_path(path):
+    """The repository path in a ---/+++ line: no timestamp, no a/ or b/ prefix."""
+    path = path.split("\t", 1)[0].strip()
+    if path == "/dev/null":
+        return None
+    return path[2:] if path[:2] in ("a/", "b/") else path
+
+
+class Hunk:
+    """One @@ block: header numbers as written plus the body lines."""
+
+    def __init__(self, old_start, old_count, new_start, new_count, section="", raw_header=None):
+        self.raw_header = raw_header  # the @@ line as written
+        self.old_start = old_start
+        self.old_count = old_count
+        self.new_start = new_start
+        self.new_count = new_count
+        self.section = section
+        self.lines = []  # body lines without "\n", each starting with " ", "-", "+" or "\"
+
+    @property
+    def old_lines(self):
+        """Number of source lines the body covers (context plus removals)."""
+        return sum(1 for line in self.lines if line[:1] in (" ", "-"))
+
+    @property
+    def new_lines(self):
+        """Number of result lines the body produces (context plus additions)."""
+        return sum(1 for line in self.lines if line[:1] in (" ", "+"))
+
+    @property
+    def counts_match(self):
+        return (self.old_count, self.new_count) == (self.old_lines, self.new_lines)
+
+    def header(self, recount=False):
+        """The @@ line, as written unless `recount` takes the counts from the body."""
+        if not recount and self.raw_header is not None:
+            return self.raw_header
+        old_count, new_count = (self.old_lines, self.new_lines) if recount else (self.old_count, self.new_count)
+        section = f" {self.section}" if self.section else ""
+        return f"@@ -{self.old_start},{old_count} +{self.new_start},{new_count} @@{section}"
+
+    def text(self, recount=False):
+        return "\n".join([self.header(recount)] + self.lines) + "\n"
+
+
+class FilePatch:
+    """The changes to one file: its header lines and hunks."""
+
+    def __init__(self, git_header=None):
+        self.git_header = git_header  # "diff --git a/x b/x", or None for a plain ---/+++ diff
+        self.extended = []  # index, mode and rename lines
+        self.old_path = None
+        self.new_path = None
+        self.path_lines = []  # the "---" and "+++" lines as written
+        self.hunks = []
+
+    @property
+    def path(self):
+        """The file's path in the repository (the old path for deletions)."""
+        if self.new_path or self.old_path:
+            return self.new_path or self.old_path
+        if self.git_header:
+            return _strip_path(self.git_header.rsplit(" ", 1)[-1])
+        return None
+
+    @property
+    def has_paths(self):
+        return bool(self.path_lines)
+
+    @property
+    def is_new(self):
+        return self.has_paths and self.old_path is None
+
+    @property
+    def is_deleted(self):
+        return self.has_paths and self.new_path is None
+
+    def text(self, recount=False):
+        lines = []
+        if self.git_header:
+            lines.append(self.git_header)
+        lines.extend(self.extended)
+        lines.extend(self.path_lines)
+        return "".join(line + "\n" for line in lines) + "".join(hunk.text(recount) for hunk in self.hunks)
+
+
+class Patch:
+    """A parsed diff: its files and everything found wrong with it."""
+
+    def __init__(self):
+        self.files = []
+        self.errors = []
+
+    @property
+    def valid(self):
+        """True if there is at least one hunk and no errors."""
+        return not self.errors and any(f.hunks for f in self.files)
+
+    def text(self, recount=False):
+        """The diff rendered back to text, headers recounted from the bodies when `recount`."""
+        return "".join(f.text(recount) for f in self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+
+def parse_patch(text):
+    """Parse unified-diff text, ignoring non-diff lines around it; returns a Patch."""
+    patch = Patch()
+    current = None  # FilePatch being read
+    hunk = None  # Hunk being read
+    old_left = new_left = 0  # body lines the hunk header still promises
+    pending_old = None  # "---" line waiting for its "+++"
+
+    def close_hunk():
+        if hunk is not None and not hunk.counts_match:
+            patch.errors.append(
+                f"{current.path}: hunk @@ -{hunk.old_start},{hunk.old_count} "
+                f"+{hunk.new_start},{hunk.new_count} @@ has "
+                f"{hunk.old_lines} old and {hunk.new_lines} new lines"
+            )
+
+    for line in text.splitlines():
+        if hunk is not None:
+            if old_left > 0 or new_left > 0:
+                # The header still expects lines: trust it, as git apply does
+                if line == "":
+                    line = " "
+                prefix = line[:1]
+                if prefix in BODY_PREFIXES or prefix == NO_NEWLINE:
+                    hunk.lines.append(line)
+                    old_left -= prefix in (" ", "-")
+                    new_left -= prefix in (" ", "+")
+                    continue
+            elif line[:1] == NO_NEWLINE or (
+                line[:1] in BODY_PREFIXES and line.strip() and not line.startswith(("--- ", "+++ "))
+            ):
+                # Past the header's counts but still a body line: the header under-counted
+                hunk.lines.append(line)
+                continue
+            close_hunk()
+            hunk = None
+
+        if line.startswith("diff --git "):
+            current = FilePatch(line)
+            patch.files.append(current)
+            pending_old = None
+        elif line.startswith("--- "):
+            pending_old = line
+        elif line.startswith("+++ ") and pending_old is not None:
+            if current is None or current.has_paths or current.hunks:
+                current = FilePatch()
+                patch.files.append(current)
+            current.old_path = _strip_path(pending_old[4:])
+            current.new_path = _strip_path(line[4:])
+            current.path_lines = [pending_old, line]
+            pending_old = None
+        elif line.startswith("@@"):
+            match = HUNK_HEADER.match(line)
+            if match is None:
+                patch.errors.append(f"unreadable hunk header: {line[:80]}")
+                continue
+            if current is None:
+                patch.errors.append(f"hunk without a file header: {line[:80]}")
+                current = FilePatch()
+                patch.files.append(current)
+            old_start, old_count, new_start, new_count, section = match.groups()
+            hunk = Hunk(
+                int(old_start), 1 if old_count is None else int(old_count),
+                int(new_start), 1 if new_count is None else int(new_count),
+                section.strip(), line,
+            )
+            current.hunks.append(hunk)
+            old_left, new_left = hunk.old_count, hunk.new_count
+        elif current is not None and current.git_header and not current.has_paths \
+                and line.startswith(GIT_HEADER_PREFIXES):
+            current.extended.append(line)
+
+    if hunk is not None:
+        close_hunk()
+    for f in patch.files:
+        if not f.hunks and f.git_header is None:
+            patch.errors.append(f"{f.path}: file header without hunks")
+        elif f.hunks and not f.path:
+            patch.errors.append("hunks without a file path")
+    return patch
@@ -8,6 +8,14 @@ Check https://openrouter.ai/models for current availability.
 
 # Model configurations: 8 total (2 per provider)
 # Models marked with 'available': True are confirmed working
+#
+# context_tokens: prompt + completion limit in tokens
+# pricing: OpenRouter list prices in dollars per million tokens. cache_read
+#   is charged for prompt tokens served from the provider's prompt cache;
+#   cache_write (Anthropic, Google) for tokens written at a cache_control
+#   breakpoint, None where writes cost the normal input price.
+# throughput: rough output speed and time to first token, used only to
+#   estimate run durations (see core/costs.py)
 MODELS = {
     # Grok (xAI) - 1M free BYOK requests per month
     "grok_best": {
@@ -16,6 +24,9 @@ MODELS = {
         "provider": "xAI",
         "tier": "best",
         "context_window": "256K tokens",
+        "context_tokens": 256_000,
+        "pricing": {"input": 3.00, "output": 15.00, "cache_read": 0.75, "cache_write": None},
+        "throughput": {"tokens_per_second": 40, "first_token_seconds": 8.0},
         "notes": "Latest reasoning model, supports tool calling & structured outputs",
         "available": True,
     },
@@ -25,6 +36,9 @@ MODELS = {
         "provider": "xAI",
         "tier": "budget",
         "context_window": "128K tokens",
+        "context_tokens": 131_072,
+        "pricing": {"input": 0.30, "output": 0.50, "cache_read": 0.075, "cache_write": None},
+        "throughput": {"tokens_per_second": 100, "first_token_seconds": 3.0},
         "notes": "Lightweight thinking model, fast and smart for logic tasks",
         "available": True,
     },
@@ -36,6 +50,9 @@ MODELS = {
         "provider": "OpenAI",
         "tier": "best",
         "context_window": "400K tokens",
+        "context_tokens": 400_000,
+        "pricing": {"input": 1.25, "output": 10.00, "cache_read": 0.125, "cache_write": None},
+        "throughput": {"tokens_per_second": 50, "first_token_seconds": 15.0},
         "notes": "OpenAI's most advanced model, major improvements in reasoning & code quality",
         "available": True,
     },
@@ -45,6 +62,9 @@ MODELS = {
         "provider": "OpenAI",
         "tier": "budget",
         "context_window": "400K tokens",
+        "context_tokens": 400_000,
+        "pricing": {"input": 0.25, "output": 2.00, "cache_read": 0.025, "cache_write": None},
+        "throughput": {"tokens_per_second": 80, "first_token_seconds": 8.0},
         "notes": "Compact GPT-5 for lighter reasoning, reduced latency & cost, 1M free BYOK/month",
         "available": True,
     },
@@ -56,6 +76,9 @@ MODELS = {
         "provider": "Anthropic",
         "tier": "best",
         "context_window": "1M tokens",
+        "context_tokens": 1_000_000,
+        "pricing": {"input": 3.00, "output": 15.00, "cache_read": 0.3, "cache_write": 3.75},
+        "throughput": {"tokens_per_second": 60, "first_token_seconds": 2.0},
         "notes": "Most advanced Sonnet, SOTA on coding & agentic workflows (SWE-bench leader)",
         "available": True,
     },
@@ -65,6 +88,9 @@ MODELS = {
         "provider": "Anthropic",
         "tier": "budget",
         "context_window": "200K tokens",
+        "context_tokens": 200_000,
+        "pricing": {"input": 15.00, "output": 75.00, "cache_read": 1.5, "cache_write": 18.75},
+        "throughput": {"tokens_per_second": 35, "first_token_seconds": 3.0},
         "notes": "Flagship model, 74.5% on SWE-bench, extended thinking (64K), 1M free BYOK/month",
         "available": True,
     },
@@ -76,6 +102,9 @@ MODELS = {
         "provider": "Google",
         "tier": "best",
         "context_window": "1M tokens",
+        "context_tokens": 1_048_576,
+        "pricing": {"input": 1.25, "output": 10.00, "cache_read": 0.31, "cache_write": 1.625},
+        "throughput": {"tokens_per_second": 80, "first_token_seconds": 10.0},
         "notes": "SOTA reasoning model with thinking capability, #1 on LMArena leaderboard",
         "available": True,
     },
@@ -85,6 +114,9 @@ MODELS = {
         "provider": "Google",
         "tier": "budget",
         "context_window": "1M tokens",
+        "context_tokens": 1_048_576,
+        "pricing": {"input": 0.30, "output": 2.50, "cache_read": 0.075, "cache_write": 0.3833},
+        "throughput": {"tokens_per_second": 150, "first_token_seconds": 3.0},
         "notes": "Workhorse model with thinking capability, optimized for speed & cost",
         "available": True,
     },
@@ -102,6 +134,14 @@ def get_model_id(key: str):
     return model["id"] if model else None
 
 
+def get_model_key(model_id: str):
+    """Get the key of the model with this OpenRouter ID"""
+    for key, model in MODELS.items():
+        if model["id"] == model_id:
+            return key
+    return None
+
+
 def get_available_models():
     """Get only models marked as available"""
     return {k: v for k, v in MODELS.items() if v.get("available", True)}
@@ -144,6 +184,8 @@ def list_all_models():
             print(f"     Key: {key}")
             print(f"     ID: {model['id']}")
             print(f"     Context: {model['context_window']}")
+            print(f"     Price: ${model['pricing']['input']:.2f} in / "
+                  f"${model['pricing']['output']:.2f} out per 1M tokens")
             print(f"     Notes: {model['notes']}")
 
 
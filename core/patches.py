@@ -0,0 +1,184 @@
+"""
+Patch extraction from model output, and patch deduplication.
+"""
+import hashlib
+import os
+import re
+
+from core.diffs import parse_patch
+
+DIFF_OPEN = "```diff\n"
+DIFF_CLOSE = "```"
+FENCE = "```"
+
+HUNK_HEADER = re.compile(r'^@@ .*? @@.*$')
+
+
+def _looks_like_diff(block):
+    return block.startswith(("diff --git ", "--- ", "@@ ")) or "\n@@ " in block or "\n--- " in block
+
+
+def find_diff_block(solution):
+    """Body of the first ```diff block, else of the first fenced block holding a diff.
+
+    Fences are located with str.find, so the response is scanned once
+    whatever its length; returns None if no block qualifies.
+    """
+    start = solution.find(DIFF_OPEN)
+    if start != -1:
+        start += len(DIFF_OPEN)
+        end = solution.find(DIFF_CLOSE, start)
+        return solution[start:] if end == -1 else solution[start:end]
+
+    position = 0
+    while True:
+        open_at = solution.find(FENCE, position)
+        if open_at == -1:
+            return None
+        body_at = solution.find("\n", open_at)
+        if body_at == -1:
+            return None
+        close_at = solution.find(FENCE, body_at)
+        block = solution[body_at + 1:] if close_at == -1 else solution[body_at + 1:close_at]
+        if _looks_like_diff(block):
+            return block
+        if close_at == -1:
+            return None
+        position = close_at + len(FENCE)
+
+
+def extract_patch(solution):
+    """Pull the diff out of a model response.
+
+    Takes the first ```diff block (or other fenced block holding a diff).
+    Without one, the diff lines found anywhere in the response are used,
+    and failing that the whole response.
+    """
+    patch = find_diff_block(solution)
+    if patch is None:
+        parsed = parse_patch(solution)
+        patch = parsed.text() if any(f.hunks for f in parsed.files) else solution
+    patch = patch.strip()
+
+    # Ensure patch ends with newline
+    if not patch.endswith('\n'):
+        patch += '\n'
+    return patch
+
+
+class DiffStreamExtractor:
+    """Incrementally find the first ```diff block in a streamed response.
+
+    feed() returns True as soon as the block's closing fence has arrived, so
+    the caller can stop the generation there. Chunks are kept in a list and
+    each call searches only the new chunk plus the last few characters
+    before it (enough to catch a fence split across chunks), so a whole
+    response costs time linear in its length. If `partial_path` is given,
+    every chunk is appended to that file as it arrives.
+    """
+
+    def __init__(self, partial_path=None):
+        self.parts = []
+        self.length = 0
+        self.tail = ""  # end of the text so far that a split fence may start in
+        self.body_start = None
+        self.body_end = None
+        self._partial = None
+        if partial_path:
+            os.makedirs(os.path.dirname(partial_path) or ".", exist_ok=True)
+            self._partial = open(partial_path, "w", encoding="utf-8")
+
+    @property
+    def closed(self):
+        return self.body_end is not None
+
+    @property
+    def text(self):
+        """Everything fed so far."""
+        if len(self.parts) > 1:
+            self.parts = ["".join(self.parts)]
+        return self.parts[0] if self.parts else ""
+
+    def feed(self, chunk):
+        """Add a chunk of streamed text; True once the diff block is complete."""
+        if self.closed or not chunk:
+            return self.closed
+        if self._partial is not None:
+            self._partial.write(chunk)
+            self._partial.flush()
+
+        window = self.tail + chunk
+        offset = self.length - len(self.tail)  # position of window[0] in the text
+        self.parts.append(chunk)
+        self.length += len(chunk)
+
+        if self.body_start is None:
+            found = window.find(DIFF_OPEN)
+            if found == -1:
+                self.tail = window[-(len(DIFF_OPEN) - 1):]
+                return False
+            self.body_start = offset + found + len(DIFF_OPEN)
+
+        start = max(0, self.body_start - offset)
+        found = window.find(DIFF_CLOSE, start)
+        if found == -1:
+            self.tail = window[max(start, len(window) - (len(DIFF_CLOSE) - 1)):]
+            return False
+        self.body_end = offset + found
+        return True
+
+    def patch(self):
+        """The extracted patch, with the same rules as extract_patch()."""
+        if self.closed:
+            patch = self.text[self.body_start:self.body_end].strip()
+            return patch if patch.endswith('\n') else patch + '\n'
+        return extract_patch(self.text)
+
+    def close(self):
+        if self._partial is not None:
+            self._partial.close()
+            self._partial = None
+
+
+def normalize_patch(patch):
+    """Canonical form of a patch for comparing candidates.
+
+    Line endings, trailing whitespace, blank lines, `index` lines and hunk
+    header line numbers are dropped, so patches that make the same edit
+    normalize to the same text even if the model got the counts wrong.
+    """
+    lines = []
+    for line in patch.replace("\r\n", "\n").split("\n"):
+        line = line.rstrip()
+        if not line.strip() or line.startswith("index "):
+            continue
+        if HUNK_HEADER.match(line):
+            line = "@@"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def patch_hash(patch):
+    """Short stable hash of normalize_patch(patch)."""
+    return hashlib.sha256(normalize_patch(patch).encode("utf-8")).hexdigest()[:16]
+
+
+class PatchDeduper:
+    """Remembers which patches have been seen, by normalized hash.
+
+    add() returns None for a new patch and the key it was first seen under
+    for a duplicate, so callers can skip verifying or evaluating it again.
+    """
+
+    def __init__(self):
+        self.seen = {}
+
+    def add(self, patch, key=None):
+        digest = patch_hash(patch)
+        if digest in self.seen:
+            return self.seen[digest]
+        self.seen[digest] = key if key is not None else digest
+        return None
+
+    def __len__(self):
+        return len(self.seen)
@@ -0,0 +1,146 @@
+"""
+Prompt templates and cache-friendly message construction.
+
+Messages are built stable-first so providers can reuse the prompt prefix:
+1. instructions shared by every request (system message);
+2. per-problem context shared by repeated calls on the same problem, such
+   as the repository, problem statement and the patch under review;
+3. the small query that changes from call to call.
+
+OpenAI, xAI and most other providers cache a repeated prefix on their
+own, so ordering is all they need. Anthropic and Google only cache at
+explicit cache_control breakpoints, and writing to their cache costs more
+than plain input (Opus: $18.75 vs $15 per million). So breakpoints are
+added only when the caller says the prefix will be reused (cache_prefix=True:
+several samples of one problem, verify/correct passes) and only at the end
+of a stable segment whose prefix reaches the provider's minimum (1024
+tokens for Anthropic); a single-shot call is sent without any.
+
+Per-problem context is given as core.tokens Sections and packed into what
+is left of the model's context window after the instructions, the query
+and max_tokens of output; the problem statement is cut before the patch.
+Truncation depends only on the problem and the model, so the packed
+context is identical across calls and stays cacheable.
+"""
+from core.ratelimit import provider_for
+from core.tokens import MESSAGE_OVERHEAD, Section, count_tokens, pack_sections, prompt_budget
+
+# Providers that need explicit cache_control breakpoints on OpenRouter
+CACHE_CONTROL_PROVIDERS = {"Anthropic", "Google"}
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Shortest prefix (in tokens) a breakpoint can cache
+MIN_CACHE_TOKENS = 1024
+
+DIFF_FORMAT = """```diff
+diff --git a/filename.py b/filename.py
+--- a/filename.py
++++ b/filename.py
+@@ -10,7 +10,7 @@
+ context line
+-old line
++new line
+ context line
+```
+
+Make the patch COMPLETE - do not truncate. End with newline."""
+
+STRUCTURED_INSTRUCTIONS = f"""You are a software engineer fixing a bug. Provide a COMPLETE, VALID git diff patch.
+
+CRITICAL - Output Format:
+1. Brief explanation (1-2 sentences)
+2. Complete git diff patch in this EXACT format:
+
+{DIFF_FORMAT}"""
+
+PROBLEM_CONTEXT = """Repository: {repo}
+Problem: {problem_statement}"""
+
+# Problem statements are cut first, but never to less than this
+MIN_PROBLEM_TOKENS = 256
+
+
+def uses_cache_control(model_id):
+    """True if the model's provider only caches at cache_control breakpoints."""
+    return provider_for(model_id) in CACHE_CONTROL_PROVIDERS
+
+
+def _text_part(text, cache):
+    part = {"type": "text", "text": text}
+    if cache:
+        part["cache_control"] = CACHE_CONTROL
+    return part
+
+
+def pack_context(model_id, sections, instructions="", query="", max_tokens=4000,
+                 max_prompt_tokens=None):
+    """Join context sections into the prompt budget left by the other segments."""
+    budget = prompt_budget(model_id, max_tokens, max_prompt_tokens)
+    if budget is None:
+        return "\n\n".join(section.text for section in sections)
+    budget -= count_tokens(instructions) + count_tokens(query) + MESSAGE_OVERHEAD
+    return pack_sections(sections, budget)
+
+
+def build_messages(model_id, instructions, context="", query="", max_tokens=4000,
+                   max_prompt_tokens=None, cache_prefix=False):
+    """Chat messages with the stable segments first.
+
+    `instructions` become the system message; `context` and `query` form
+    the user message. A list of Sections as `context` is packed to fit the
+    model's context window with room for `max_tokens` of output (see
+    pack_context()). With cache_prefix=True, for CACHE_CONTROL_PROVIDERS,
+    the instructions and the context each end with a cache breakpoint once
+    the prefix up to them is long enough to be cached.
+    """
+    if isinstance(context, list):
+        context = pack_context(model_id, context, instructions, query, max_tokens,
+                               max_prompt_tokens)
+    if not (cache_prefix and uses_cache_control(model_id)):
+        user = "\n\n".join(segment for segment in (context, query) if segment)
+        return [
+            {"role": "system", "content": instructions},
+            {"role": "user", "content": user},
+        ]
+    prefix_tokens = count_tokens(instructions)
+    system = [_text_part(instructions, cache=prefix_tokens >= MIN_CACHE_TOKENS)]
+    user = []
+    if context:
+        prefix_tokens += count_tokens(context)
+        user.append(_text_part(context, cache=prefix_tokens >= MIN_CACHE_TOKENS))
+    if query:
+        user.append(_text_part(query, cache=False))
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
+def problem_context(instance):
+    """The per-problem segment: repository and problem statement."""
+    return PROBLEM_CONTEXT.format(
+        repo=instance["repo"],
+        problem_statement=instance["problem_statement"],
+    )
+
+
+def problem_sections(instance):
+    """problem_context() as a Section the packer may cut (keeping head and tail)."""
+    return [Section("problem", problem_context(instance), priority=0,
+                    min_tokens=MIN_PROBLEM_TOKENS)]
+
+
+def patch_sections(instance, patch):
+    """The problem plus a patch under review; the patch is cut only as a last resort."""
+    return problem_sections(instance) + [
+        Section("patch", f"Patch under review:\n```diff\n{patch}```", priority=1),
+    ]
+
+
+def structured_messages(model_id, instance, max_tokens=4000, cache_prefix=False):
+    """Messages asking for a structured diff for one SWE-bench instance.
+
+    Pass cache_prefix=True when the same problem is sampled several times.
+    """
+    return build_messages(model_id, STRUCTURED_INSTRUCTIONS, problem_sections(instance),
+                          max_tokens=max_tokens, cache_prefix=cache_prefix)
@@ -0,0 +1,196 @@
+"""
+Shared rate limiting and retry policy for OpenRouter calls.
+
+Each provider gets a request bucket and a token bucket. Callers reserve
+capacity before a call and settle the token bucket with real usage after it,
+so bursts are smoothed out before they turn into 429s. When a 429 does come
+back, its Retry-After pauses the whole provider, not just the one request.
+"""
+import asyncio
+import email.utils
+import json
+import random
+import threading
+import time
+
+import openai
+
+# Conservative defaults; tune to the limits on your OpenRouter key.
+DEFAULT_PROVIDER_LIMITS = {
+    "xAI": {"requests_per_minute": 120, "tokens_per_minute": 400_000},
+    "OpenAI": {"requests_per_minute": 120, "tokens_per_minute": 400_000},
+    "Anthropic": {"requests_per_minute": 60, "tokens_per_minute": 200_000},
+    "Google": {"requests_per_minute": 120, "tokens_per_minute": 400_000},
+    "default": {"requests_per_minute": 60, "tokens_per_minute": 200_000},
+}
+
+# OpenRouter model ID prefix -> provider name used in MODELS
+PROVIDER_PREFIXES = {
+    "x-ai": "xAI",
+    "openai": "OpenAI",
+    "anthropic": "Anthropic",
+    "google": "Google",
+}
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def provider_for(model_id):
+    """Map an OpenRouter model ID like "x-ai/grok-4" to its provider."""
+    return PROVIDER_PREFIXES.get(model_id.split("/", 1)[0], "default")
+
+
+def estimate_tokens(messages, max_tokens=0):
+    """Rough upper bound on the tokens a request will use (~4 chars/token)."""
+    return len(json.dumps(messages)) // 4 + max_tokens
+
+
+class TokenBucket:
+    """Thread-safe token bucket that lets callers go into debt.
+
+    reserve() always takes the amount immediately and returns how long the
+    caller must wait before using it. Concurrent callers therefore queue up
+    in order instead of racing for the same refill.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level -= amount
+            return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount):
+        """Return unused capacity (or charge more with a negative amount)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Per-provider request and token budgets shared by every client."""
+
+    def __init__(self, limits=None):
+        self.limits = DEFAULT_PROVIDER_LIMITS if limits is None else limits
+        self._buckets = {}
+        self._paused_until = {}
+        self._lock = threading.Lock()
+
+    def _buckets_for(self, provider):
+        with self._lock:
+            if provider not in self._buckets:
+                limit = self.limits.get(provider, self.limits.get("default", {}))
+                rpm = limit.get("requests_per_minute")
+                tpm = limit.get("tokens_per_minute")
+                self._buckets[provider] = (
+                    TokenBucket(rpm / 60, rpm) if rpm else None,
+                    TokenBucket(tpm / 60, tpm) if tpm else None,
+                )
+            return self._buckets[provider]
+
+    def reserve(self, model_id, tokens=0):
+        """Reserve one request and `tokens` tokens; returns seconds to wait."""
+        provider = provider_for(model_id)
+        requests, token_budget = self._buckets_for(provider)
+        wait = max(0.0, self._paused_until.get(provider, 0.0) - time.monotonic())
+        if requests is not None:
+            wait = max(wait, requests.reserve(1))
+        if token_budget is not None and tokens:
+            wait = max(wait, token_budget.reserve(tokens))
+        return wait
+
+    def acquire(self, model_id, tokens=0):
+        wait = self.reserve(model_id, tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, model_id, tokens=0):
+        wait = self.reserve(model_id, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def settle(self, model_id, reserved, used):
+        """Correct a token reservation once the real usage is known."""
+        token_budget = self._buckets_for(provider_for(model_id))[1]
+        if token_budget is not None and reserved != used:
+            token_budget.refund(reserved - used)
+
+    def pause(self, model_id, seconds):
+        """Hold every request to this model's provider for `seconds`."""
+        provider = provider_for(model_id)
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._paused_until[provider] = max(self._paused_until.get(provider, 0.0), until)
+
+
+class RetryPolicy:
+    """Jittered exponential backoff for errors that are worth retrying."""
+
+    def __init__(self, max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def is_retryable(self, error):
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in RETRYABLE_STATUS_CODES
+        return False
+
+    def retry_after(self, error):
+        """Seconds requested by the server's Retry-After header, if any."""
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        headers = response.headers
+        if headers.get("retry-after-ms"):
+            try:
+                return float(headers["retry-after-ms"]) / 1000
+            except ValueError:
+                pass
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def delay(self, attempt, retry_after=None):
+        """Full-jitter backoff, never shorter than what the server asked for."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(backoff, retry_after or 0.0)
+
+
+_shared_rate_limiter = None
+
+
+def shared_rate_limiter():
+    """The process-wide limiter, so separate clients share one budget."""
+    global _shared_rate_limiter
+    if _shared_rate_limiter is None:
+        _shared_rate_limiter = RateLimiter()
+    return _shared_rate_limiter
+
+
+def configure_shared_rate_limiter(limits):
+    """Replace the process-wide limiter, e.g. with {} to disable limits."""
+    global _shared_rate_limiter
+    _shared_rate_limiter = RateLimiter(limits)
+    return _shared_rate_limiter
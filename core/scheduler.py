@@ -0,0 +1,138 @@
+"""
+Cross-model fan-out scheduler.
+
+Runs completions for many models at once. Requests are interleaved across
+providers, each provider gets its own concurrency limit, and a global cap
+on in-flight tokens keeps the total load bounded. Wall-clock time is set by
+the slowest provider instead of the sum of all of them.
+
+Within each provider the calls expected to take longest (by the throughput
+hints in core.models) start first, so a few slow calls are not left
+running alone at the end of the batch. max_tokens is lowered where needed
+to keep prompt plus completion inside the model's context window.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+from core.costs import max_completion_tokens, request_seconds
+from core.ratelimit import estimate_tokens, provider_for
+
+DEFAULT_PROVIDER_CONCURRENCY = {
+    "xAI": 8,
+    "OpenAI": 8,
+    "Anthropic": 4,
+    "Google": 8,
+    "default": 4,
+}
+DEFAULT_MAX_INFLIGHT_TOKENS = 200_000
+
+
+def fit_context(request):
+    """The request with max_tokens lowered to fit its model's context window.
+
+    Raises ValueError if the prompt alone is too long for the model.
+    """
+    max_tokens = request.get("max_tokens", 4000)
+    fitted = max_completion_tokens(
+        request["model_id"], estimate_tokens(request["messages"]), max_tokens
+    )
+    return request if fitted == max_tokens else dict(request, max_tokens=fitted)
+
+
+def interleave(requests, key):
+    """Round-robin requests across the groups given by key(request)."""
+    groups = OrderedDict()
+    for request in requests:
+        groups.setdefault(key(request), []).append(request)
+    queues = [iter(group) for group in groups.values()]
+    while queues:
+        for queue in list(queues):
+            request = next(queue, None)
+            if request is None:
+                queues.remove(queue)
+            else:
+                yield request
+
+
+class TokenBudget:
+    """Asyncio counter that caps the number of tokens in flight."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, tokens):
+        # A single oversized request is allowed through on its own
+        tokens = min(tokens, self.limit)
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight + tokens <= self.limit)
+            self.in_flight += tokens
+        return tokens
+
+    async def release(self, tokens):
+        async with self._condition:
+            self.in_flight -= tokens
+            self._condition.notify_all()
+
+
+class FanOutScheduler:
+    """Schedule a mixed batch of requests over an AsyncOpenRouterClient."""
+
+    def __init__(self, client, provider_concurrency=None,
+                 max_inflight_tokens=DEFAULT_MAX_INFLIGHT_TOKENS):
+        self.client = client
+        self.provider_concurrency = provider_concurrency or DEFAULT_PROVIDER_CONCURRENCY
+        self.max_inflight_tokens = max_inflight_tokens
+
+    async def run(self, requests, call=None):
+        """Yield results as they finish, in the same shape as complete_many().
+
+        `call` optionally replaces client.call_request() for each request.
+        """
+        call = call or self.client.call_request
+        budget = TokenBudget(self.max_inflight_tokens)
+        provider_limits = {}
+
+        def limit_for(provider):
+            if provider not in provider_limits:
+                limit = self.provider_concurrency.get(
+                    provider, self.provider_concurrency.get("default", 4)
+                )
+                provider_limits[provider] = asyncio.Semaphore(limit)
+            return provider_limits[provider]
+
+        async def run_one(request):
+            model_id = request["model_id"]
+            tokens = estimate_tokens(request["messages"],
+                                     request.get("max_tokens", 4000) * request.get("n", 1))
+            async with limit_for(provider_for(model_id)):
+                held = await budget.acquire(tokens)
+                start_time = time.monotonic()
+                try:
+                    response = await call(fit_context(request))
+                    error = None
+                except Exception as e:
+                    response, error = None, e
+                finally:
+                    await budget.release(held)
+                elapsed = time.monotonic() - start_time
+
+            return {
+                "request": request,
+                "response": response,
+                "error": error,
+                "elapsed": elapsed,
+            }
+
+        # Longest first within each provider (sorted() is stable for ties)
+        longest_first = sorted(requests, key=request_seconds, reverse=True)
+        ordered = interleave(longest_first, key=lambda r: provider_for(r["model_id"]))
+        tasks = [asyncio.create_task(run_one(request)) for request in ordered]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
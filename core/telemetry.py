@@ -0,0 +1,215 @@
+"""
+Per-call metrics for every completion a client makes.
+
+A Telemetry instance attached to OpenRouterClient (telemetry=...) receives
+one record per call with its token counts (prompt, completion, cached,
+reasoning), time waiting on the rate limiter, time to first token, total
+latency, retries, dollar cost and whether it was served from the response
+cache. A stream closed before the provider sent usage is counted from its
+messages and streamed text instead, and its record is marked "estimated".
+Records carry the caller's tags (run_id, model_key, stage, instance_id),
+are appended to a JSONL file as they arrive and can be summarized as a
+table at the end of a run, or later with:
+
+    python -m core.telemetry testing/metrics/baseline_20250101_120000.jsonl --by model_key,stage
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+DEFAULT_METRICS_DIR = "testing/metrics"
+
+# Tags a batch request may carry into its telemetry record
+TAG_KEYS = ("run_id", "model_key", "stage", "instance_id")
+
+
+class CallTimer:
+    """Timestamps of one call, filled in by the client as it progresses."""
+
+    def __init__(self, model_id, tags=None):
+        self.model_id = model_id
+        self.tags = tags or {}
+        self.started = time.monotonic()
+        self.sent = None
+        self.first_token = None
+        self.retries = 0
+        self.cache_hit = False
+
+    def send(self):
+        """Mark the moment the rate limiter let the request through."""
+        self.sent = time.monotonic()
+
+
+def _usage_fields(usage):
+    """Token counts from a usage object (None where not reported)."""
+    if usage is None:
+        return {"prompt_tokens": None, "completion_tokens": None,
+                "cached_tokens": None, "reasoning_tokens": None}
+    prompt_details = getattr(usage, "prompt_tokens_details", None)
+    completion_details = getattr(usage, "completion_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "cached_tokens": getattr(prompt_details, "cached_tokens", None) or 0,
+        "reasoning_tokens": getattr(completion_details, "reasoning_tokens", None) or 0,
+    }
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+class Telemetry:
+    """Thread-safe collector of call records, mirrored to a JSONL file."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.records = []
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+
+    @classmethod
+    def from_env(cls, run_name="run"):
+        """Write to METRICS_DIR/<run_name>_<time>.jsonl; METRICS_DIR=off keeps records in memory."""
+        directory = os.getenv("METRICS_DIR", DEFAULT_METRICS_DIR)
+        if directory.lower() == "off":
+            return cls()
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return cls(os.path.join(directory, f"{run_name}_{stamp}.jsonl"))
+
+    def record_call(self, timer, usage=None, cost=None, error=None, estimated=False):
+        """Build and store the record for a finished (or failed) call.
+
+        `estimated` marks token counts (and the cost priced from them) that
+        were counted locally because the provider reported no usage.
+        """
+        now = time.monotonic()
+        sent = timer.sent or timer.started
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "model_id": timer.model_id,
+            **{key: timer.tags.get(key) for key in TAG_KEYS},
+            **_usage_fields(usage),
+            "cost": cost,
+            "wait_seconds": round(sent - timer.started, 4),
+            "ttft_seconds": (round(timer.first_token - sent, 4)
+                             if timer.first_token is not None else None),
+            "latency_seconds": round(now - sent, 4),
+            "retries": timer.retries,
+            "cache_hit": timer.cache_hit,
+            "estimated": estimated,
+            "error": f"{type(error).__name__}: {error}" if error is not None else None,
+        }
+        self.add(record)
+        return record
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+            if self._file is not None:
+                self._file.write(json.dumps(record) + "\n")
+                self._file.flush()
+
+    def summary(self, by=("model_key", "stage")):
+        """One aggregate row per distinct combination of the `by` fields."""
+        return summarize(self.records, by)
+
+    def format_summary(self, by=("model_key", "stage")):
+        return format_table(self.summary(by), by)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def summarize(records, by=("model_key", "stage")):
+    groups = OrderedDict()
+    for record in records:
+        groups.setdefault(tuple(record.get(key) for key in by), []).append(record)
+
+    rows = []
+    for key, group in groups.items():
+        ok = [r for r in group if r["error"] is None]
+        live = [r for r in ok if not r["cache_hit"]]
+        latencies = [r["latency_seconds"] for r in live]
+        ttfts = [r["ttft_seconds"] for r in live if r["ttft_seconds"] is not None]
+        costs = [r["cost"] for r in ok if r["cost"] is not None]
+        rows.append({
+            **dict(zip(by, key)),
+            "calls": len(group),
+            "errors": len(group) - len(ok),
+            "cache_hits": len(ok) - len(live),
+            "estimated": sum(1 for r in ok if r.get("estimated")),
+            "retries": sum(r["retries"] for r in group),
+            "prompt_tokens": sum(r["prompt_tokens"] or 0 for r in ok),
+            "cached_tokens": sum(r["cached_tokens"] or 0 for r in ok),
+            "completion_tokens": sum(r["completion_tokens"] or 0 for r in ok),
+            "reasoning_tokens": sum(r["reasoning_tokens"] or 0 for r in ok),
+            "cost": round(sum(costs), 6) if costs else None,
+            "wait_seconds": round(sum(r["wait_seconds"] for r in group), 2),
+            "latency_p50": _percentile(latencies, 50),
+            "latency_p90": _percentile(latencies, 90),
+            "ttft_p50": _percentile(ttfts, 50),
+        })
+    return rows
+
+
+def format_table(rows, by=("model_key", "stage")):
+    """Render summary rows as a fixed-width text table."""
+    columns = list(by) + ["calls", "errors", "cache_hits", "estimated", "retries", "prompt_tokens",
+                          "cached_tokens", "completion_tokens", "reasoning_tokens", "cost",
+                          "latency_p50", "latency_p90", "ttft_p50"]
+    headers = {"cache_hits": "cached", "estimated": "est", "prompt_tokens": "prompt",
+               "cached_tokens": "cached_tok", "completion_tokens": "completion", "reasoning_tokens": "reasoning",
+               "latency_p50": "p50 s", "latency_p90": "p90 s", "ttft_p50": "ttft s"}
+
+    def cell(value):
+        if value is None:
+            return "-"
+        if isinstance(value, float):
+            return f"{value:.4f}" if value < 1 else f"{value:.2f}"
+        return str(value)
+
+    table = [[headers.get(c, c) for c in columns]]
+    table += [[cell(row.get(c)) for c in columns] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+    lines = ["  ".join(text.rjust(width) for text, width in zip(line, widths)) for line in table]
+    lines.insert(1, "-" * len(lines[0]))
+    return "\n".join(lines)
+
+
+def load_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a telemetry JSONL file")
+    parser.add_argument("path")
+    parser.add_argument("--by", default="model_key,stage",
+                        help="Comma-separated fields to group by")
+    args = parser.parse_args()
+    by = tuple(args.by.split(","))
+    print(format_table(summarize(load_records(args.path), by), by))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Token counting and context-window budgeting for prompts.
+
+A prompt is packed from Sections. When they do not fit the budget, the
+lowest-priority sections are cut first, each down to its `min_tokens`,
+keeping the start and end of the text (where problem statements put the
+summary and the traceback) and marking the gap. Token counts are cached
+per text chunk, so the stable segments repeated across calls on the same
+problem are only counted once.
+
+Counts use tiktoken's o200k_base encoding when tiktoken is installed and
+~4 characters per token otherwise. Providers tokenize differently, so
+prompt_budget() leaves a safety margin below each model's context window.
+"""
+import functools
+
+from core.costs import model_config
+
+try:
+    import tiktoken
+except ImportError:  # optional; fall back to a character estimate
+    tiktoken = None
+
+# Fraction of the context window kept free for tokenizer differences
+SAFETY_MARGIN = 0.1
+
+# Tokens taken by chat-message framing (roles, separators) per request
+MESSAGE_OVERHEAD = 16
+
+TRUNCATION_MARKER = "\n[... {tokens} tokens truncated ...]\n"
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    return tiktoken.get_encoding("o200k_base") if tiktoken is not None else None
+
+
+@functools.lru_cache(maxsize=4096)
+def count_tokens(text):
+    """Number of tokens in `text` (cached per distinct chunk)."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is None:
+        return -(-len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages):
+    """Prompt tokens of chat messages, whether their content is a string or text parts."""
+    total = 0
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content)
+        total += count_tokens(content) + MESSAGE_OVERHEAD
+    return total
+
+
+def truncate(text, max_tokens):
+    """`text` cut to at most `max_tokens`, keeping its head and tail."""
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+    if max_tokens <= count_tokens(TRUNCATION_MARKER.format(tokens=total)):
+        return ""
+    keep = max_tokens - count_tokens(TRUNCATION_MARKER.format(tokens=total))
+    chars = int(len(text) * keep / total)
+    while True:
+        head = text[:chars // 2]
+        tail = text[len(text) - (chars - chars // 2):] if chars > 1 else ""
+        marker = TRUNCATION_MARKER.format(tokens=total - count_tokens(head) - count_tokens(tail))
+        result = head + marker + tail
+        if count_tokens(result) <= max_tokens or chars == 0:
+            return result
+        chars = int(chars * 0.9)
+
+
+class Section:
+    """One part of a prompt.
+
+    Sections with a lower `priority` are truncated first; none is cut below
+    `min_tokens`.
+    """
+
+    def __init__(self, name, text, priority=0, min_tokens=0):
+        self.name = name
+        self.text = text
+        self.priority = priority
+        self.min_tokens = min_tokens
+
+    @property
+    def tokens(self):
+        return count_tokens(self.text)
+
+
+def prompt_budget(model_id, max_tokens=4000, max_prompt_tokens=None):
+    """Prompt tokens a model can take while leaving room for `max_tokens` of output.
+
+    `max_prompt_tokens` optionally caps the budget below the context window
+    to keep input costs down. Unknown models only get that cap (or None).
+    """
+    config = model_config(model_id)
+    if config is None:
+        return max_prompt_tokens
+    budget = int(config["context_tokens"] * (1 - SAFETY_MARGIN)) - max_tokens - MESSAGE_OVERHEAD
+    return min(budget, max_prompt_tokens) if max_prompt_tokens is not None else budget
+
+
+def pack_sections(sections, budget, separator="\n\n"):
+    """Join sections into at most `budget` tokens, cutting low-priority ones first.
+
+    Raises ValueError if the sections do not fit even at their minimum size.
+    """
+    counts = [section.tokens for section in sections]
+    over = sum(counts) + count_tokens(separator) * max(0, len(sections) - 1) - budget
+    limits = list(counts)
+    for i in sorted(range(len(sections)), key=lambda i: sections[i].priority):
+        if over <= 0:
+            break
+        cut = min(over, limits[i] - sections[i].min_tokens)
+        if cut > 0:
+            limits[i] -= cut
+            over -= cut
+    if over > 0:
+        raise ValueError(
+            f"Prompt sections need {budget + over:,} tokens at minimum; the budget is {budget:,}"
+        )
+    texts = [
+        section.text if limit >= count else truncate(section.text, limit)
+        for section, count, limit in zip(sections, counts, limits)
+    ]
+    return separator.join(text for text in texts if text)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Patch-quality heuristics over many prediction files at once.
+
+Every patch is scanned once, line by line, for its files, hunks, added and
+removed lines and test changes. Files are spread over a process pool, and
+the rows for all predictions are written as one columnar JSON file
+({column: [values]}) that loads straight into pandas or pyarrow. A summary
+per model is printed.
+
+These are heuristics, not test runs; use evaluation/swe_bench.py, sb-cli
+or Modal for resolve rates.
+
+Usage:
+    python3 -m evaluation.analyze "testing/baseline_*.jsonl" "SWE-agent/trajectories/**/preds.json"
+    python3 -m evaluation.analyze preds.json --details --output testing/quality.json
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evaluation.predictions import load_predictions
+
+DEFAULT_OUTPUT = "testing/patch_quality.json"
+
+COLUMNS = (
+    "file", "model_name_or_path", "instance_id", "has_diff_header", "has_changes",
+    "files_changed", "hunks", "additions", "deletions", "patch_size", "has_tests", "quality",
+)
+
+# Quality tiers, as in the old evaluate_local.py: real changes over 10 lines, any change, none
+HIGH = "high"
+PARTIAL = "partial"
+EMPTY = "empty"
+HIGH_QUALITY_LINES = 10
+
+
+def analyze_patch(instance_id, patch):
+    """Quality indicators for one patch, from a single pass over its lines."""
+    files = hunks = additions = deletions = 0
+    has_tests = False
+    for line in patch.splitlines():
+        first = line[:1]
+        if first == "+":
+            if line.startswith("+++ "):
+                continue
+            additions += 1
+        elif first == "-":
+            if line.startswith("--- "):
+                continue
+            deletions += 1
+        elif first == "@" and line.startswith("@@"):
+            hunks += 1
+        elif first == "d" and line.startswith("diff --git"):
+            files += 1
+        if not has_tests and ("test_" in line or "/test" in line):
+            has_tests = True
+
+    changed = additions + deletions
+    if changed and files and changed > HIGH_QUALITY_LINES:
+        quality = HIGH
+    elif changed:
+        quality = PARTIAL
+    else:
+        quality = EMPTY
+    return {
+        "instance_id": instance_id,
+        "has_diff_header": patch.startswith("diff --git"),
+        "has_changes": changed > 0,
+        "files_changed": files,
+        "hunks": hunks,
+        "additions": additions,
+        "deletions": deletions,
+        "patch_size": len(patch),
+        "has_tests": has_tests,
+        "quality": quality,
+    }
+
+
+def analyze_file(path):
+    """One row per prediction in a prediction file (runs in a worker process)."""
+    return [
+        {
+            "file": path,
+            "model_name_or_path": prediction["model_name_or_path"],
+            **analyze_patch(prediction["instance_id"], prediction["model_patch"]),
+        }
+        for prediction in load_predictions(path)
+    ]
+
+
+def expand(patterns):
+    """Prediction files matching the glob patterns (** allowed), without duplicates."""
+    paths = OrderedDict()
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern, recursive=True)) or ([pattern] if os.path.isfile(pattern) else []):
+            if path.endswith((".json", ".jsonl")):
+                paths[path] = None
+    return list(paths)
+
+
+def analyze(paths, workers=None):
+    """Rows for every prediction in `paths`, analyzed in a process pool, in file order."""
+    if len(paths) <= 1:
+        return [row for path in paths for row in analyze_file(path)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [row for rows in pool.map(analyze_file, paths) for row in rows]
+
+
+def to_columns(rows):
+    """Rows as {column: [values]}."""
+    return {column: [row[column] for row in rows] for column in COLUMNS}
+
+
+def write_columns(path, rows):
+    """Write the columnar summary, replacing `path` atomically."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"rows": len(rows), "columns": to_columns(rows)}, f)
+    os.replace(tmp_path, path)
+
+
+def summarize(rows):
+    """Totals per model (by model_name_or_path, else by file)."""
+    groups = OrderedDict()
+    for row in rows:
+        groups.setdefault(row["model_name_or_path"] or row["file"], []).append(row)
+    summary = []
+    for model, group in groups.items():
+        total = len(group)
+        summary.append({
+            "model": model,
+            "patches": total,
+            "with_changes": sum(r["has_changes"] for r in group),
+            "with_tests": sum(r["has_tests"] for r in group),
+            "high_quality": sum(r["quality"] == HIGH for r in group),
+            "avg_size": sum(r["patch_size"] for r in group) / total,
+            "avg_files": sum(r["files_changed"] for r in group) / total,
+        })
+    return summary
+
+
+def format_summary(summary):
+    width = max([len("model")] + [len(s["model"]) for s in summary])
+    lines = [f"{'model':<{width}} {'patches':>8} {'changes':>8} {'tests':>6} {'high':>6} {'high %':>7} "
+             f"{'avg size':>9} {'avg files':>9}"]
+    lines.append("-" * len(lines[0]))
+    for s in summary:
+        lines.append(
+            f"{s['model']:<{width}} {s['patches']:>8} {s['with_changes']:>8} {s['with_tests']:>6} "
+            f"{s['high_quality']:>6} {100 * s['high_quality'] / s['patches']:>6.0f}% "
+            f"{s['avg_size']:>9.0f} {s['avg_files']:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def format_details(rows):
+    """The per-patch table, largest patches first."""
+    marks = {HIGH: "🟢", PARTIAL: "🟡", EMPTY: "🔴"}
+    lines = [f"{'Instance':<30} {'Files':>6} {'Lines':>7} {'Tests':>6} {'Size':>8}", "-" * 70]
+    for r in sorted(rows, key=lambda r: r["patch_size"], reverse=True):
+        instance = r["instance_id"].split("__")[1] if "__" in r["instance_id"] else r["instance_id"]
+        tests = "✅" if r["has_tests"] else "❌"
+        lines.append(f"{instance:<30} {r['files_changed']:>6} {r['additions'] + r['deletions']:>7} "
+                     f"{tests:>6} {r['patch_size']:>8} {marks[r['quality']]}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Patch-quality heuristics for prediction files")
+    parser.add_argument("patterns", nargs="+", help="Prediction files or glob patterns (.json / .jsonl)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Columnar JSON summary file")
+    parser.add_argument("--details", action="store_true", help="Also print one line per patch")
+    args = parser.parse_args(argv)
+
+    paths = expand(args.patterns)
+    if not paths:
+        print("❌ No prediction files matched")
+        return []
+    rows = analyze(paths, args.workers)
+    print(f"Analyzed {len(rows)} patches from {len(paths)} files\n")
+    if args.details:
+        print(format_details(rows) + "\n")
+    print(format_summary(summarize(rows)))
+    write_columns(args.output, rows)
+    print(f"\n💾 {args.output}")
+    print("💡 Quality is a heuristic, not test execution.")
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Background sb-cli submissions and report polling.
+
+CloudJobs queues each submission on a small thread pool and returns at once,
+so generation keeps going while predictions are pre-filtered
+(evaluation/validate.py) and uploaded. After a submission, its report is
+polled with exponential backoff and jitter, every job in its own thread.
+Finished reports are saved in sb-cli-reports/, which is also where
+evaluation/results.py ingests them, and a saved report is never fetched
+again.
+
+sb-cli is run without a shell and inherits SWEBENCH_API_KEY from the
+environment. Set SB_CLI to use another command, e.g. the local fake:
+
+    SB_CLI="python3 testing/fake_sb_cli.py" python3 -m evaluation.cloud submit preds.jsonl --run-id test
+
+Usage:
+    python3 -m evaluation.cloud submit testing/baseline_claude_best_50problems.jsonl --run-id baseline_claude_best_50problems
+    python3 -m evaluation.cloud poll baseline_grok_best_50problems baseline_grok_budget_50problems
+"""
+import argparse
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evaluation.validate import REPAIRED, SUBMITTABLE, filter_applicable
+
+DEFAULT_SB_CLI = "sb-cli"
+DEFAULT_REPORT_DIR = "sb-cli-reports"
+DATASET = "swe-bench_lite"
+SPLIT = "test"
+
+# Report polling: first wait, cap on the wait, and how long to keep trying
+POLL_INITIAL_SECONDS = 30.0
+POLL_MAX_SECONDS = 600.0
+POLL_TIMEOUT_SECONDS = 4 * 3600.0
+COMMAND_TIMEOUT = 600  # seconds for one sb-cli invocation
+
+# Job states
+QUEUED = "queued"
+SUBMITTING = "submitting"
+POLLING = "polling"
+DONE = "done"
+SKIPPED = "skipped"  # nothing left to submit after the pre-filter
+FAILED = "failed"
+
+
+class EvalJob:
+    """One run on its way through submission and evaluation."""
+
+    def __init__(self, run_id, predictions_file, model_key=None):
+        self.run_id = run_id
+        self.predictions_file = predictions_file
+        self.model_key = model_key
+        self.status = QUEUED
+        self.error = None
+        self.report = None
+        self.polls = 0
+        self.queued_at = time.time()
+        self.finished_at = None
+
+    @property
+    def submitted(self):
+        return self.status in (POLLING, DONE)
+
+    def to_dict(self):
+        return {
+            "run_id": self.run_id,
+            "model_key": self.model_key,
+            "predictions_file": self.predictions_file,
+            "status": self.status,
+            "error": self.error,
+            "polls": self.polls,
+            "resolved": len(self.report.get("resolved_ids", [])) if self.report else None,
+        }
+
+
+class CloudJobs:
+    """Submits runs to sb-cli in the background and collects their reports.
+
+    submit() returns immediately; wait() blocks until every job is
+    finished (or only until each is submitted, with submitted_only=True).
+    Safe to use as a context manager; leaving it waits for submissions
+    but not for reports unless `wait_for_reports`.
+    """
+
+    def __init__(self, sb_cli=DEFAULT_SB_CLI, report_dir=DEFAULT_REPORT_DIR, workers=4,
+                 poll_initial=POLL_INITIAL_SECONDS, poll_max=POLL_MAX_SECONDS,
+                 poll_timeout=POLL_TIMEOUT_SECONDS, wait_for_reports=False):
+        self.command = shlex.split(sb_cli)
+        self.report_dir = report_dir
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.poll_timeout = poll_timeout
+        self.wait_for_reports = wait_for_reports
+        self.jobs = {}
+        self._submissions = {}
+        self._polls = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._submit_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sb-submit")
+        self._poll_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="sb-poll")
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """SB_CLI and SB_CLI_REPORT_DIR from .env, else the defaults."""
+        return cls(
+            sb_cli=os.getenv("SB_CLI", DEFAULT_SB_CLI),
+            report_dir=os.getenv("SB_CLI_REPORT_DIR", DEFAULT_REPORT_DIR),
+            **kwargs,
+        )
+
+    # -- reports --------------------------------------------------------------
+
+    def report_path(self, run_id):
+        """Where sb-cli get-report saves a run's report."""
+        return os.path.join(self.report_dir, f"{DATASET}__{SPLIT}__{run_id}.json")
+
+    def cached_report(self, run_id):
+        """The saved report of a run, or None if it has not been fetched yet."""
+        try:
+            with open(self.report_path(run_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _run(self, *args):
+        result = subprocess.run(
+            self.command + list(args), capture_output=True, text=True, timeout=COMMAND_TIMEOUT,
+        )
+        return result.returncode, (result.stdout + result.stderr).strip()
+
+    def fetch_report(self, run_id):
+        """The run's report from the cache, else from sb-cli; None while it is not ready."""
+        report = self.cached_report(run_id)
+        if report is not None:
+            return report
+        os.makedirs(self.report_dir, exist_ok=True)
+        code, _ = self._run("get-report", DATASET, SPLIT, run_id, "--output_dir", self.report_dir)
+        return self.cached_report(run_id) if code == 0 else None
+
+    # -- jobs -----------------------------------------------------------------
+
+    def submit(self, predictions_file, run_id, model_key=None, prefilter=True):
+        """Queue a run for submission; returns its EvalJob straight away.
+
+        A run whose report is already saved is not submitted again.
+        """
+        job = EvalJob(run_id, predictions_file, model_key)
+        with self._lock:
+            self.jobs[run_id] = job
+        report = self.cached_report(run_id)
+        if report is not None:
+            job.report, job.status, job.finished_at = report, DONE, time.time()
+            return job
+        self._submissions[run_id] = self._submit_pool.submit(self._submit_job, job, prefilter)
+        return job
+
+    def poll(self, run_id, model_key=None, wait_first=False):
+        """Start polling the report of a run submitted earlier; returns its EvalJob.
+
+        With wait_first, the first fetch waits one poll interval; a run that
+        was just submitted cannot have a report yet.
+        """
+        with self._lock:
+            job = self.jobs.get(run_id) or EvalJob(run_id, None, model_key)
+            self.jobs[run_id] = job
+        job.status = POLLING
+        self._polls[run_id] = self._poll_pool.submit(self._poll_job, job, wait_first)
+        return job
+
+    def _submit_job(self, job, prefilter):
+        try:
+            job.status = SUBMITTING
+            predictions_file = job.predictions_file
+            if prefilter:
+                predictions_file, checks = filter_applicable(predictions_file)
+                kept = sum(1 for check in checks if check["status"] in SUBMITTABLE)
+                repaired = sum(1 for check in checks if check["status"] == REPAIRED)
+                print(f"🔎 {job.run_id}: {kept}/{len(checks)} patches apply at base_commit "
+                      f"({repaired} after hunk repair)")
+                if kept == 0:
+                    job.status, job.finished_at = SKIPPED, time.time()
+                    return
+            code, output = self._run(
+                "submit", DATASET, SPLIT, "--predictions_path", predictions_file,
+                "--run_id", job.run_id, "--wait_for_evaluation", "0",
+            )
+            if code != 0:
+                raise RuntimeError(f"sb-cli submit exited with {code}: {output[-500:]}")
+            print(f"☁️  {job.run_id}: submitted")
+        except Exception as e:
+            job.status, job.error, job.finished_at = FAILED, str(e), time.time()
+            print(f"❌ {job.run_id}: {e}")
+            return
+        self.poll(job.run_id, wait_first=True)
+
+    def _poll_job(self, job, wait_first=False):
+        """Fetch the report with backoff until it is ready or the deadline passes."""
+        delay = self.poll_initial
+        deadline = time.monotonic() + self.poll_timeout
+        if wait_first and self._closed.wait(delay * random.uniform(0.8, 1.2)):
+            return
+        while True:
+            job.polls += 1
+            try:
+                report = self.fetch_report(job.run_id)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                report, job.error = None, str(e)
+            if report is not None:
+                job.report, job.status, job.error, job.finished_at = report, DONE, None, time.time()
+                resolved = len(report.get("resolved_ids", []))
+                print(f"📊 {job.run_id}: report ready, {resolved} resolved")
+                return
+            if time.monotonic() + delay > deadline:
+                job.status, job.finished_at = FAILED, time.time()
+                job.error = job.error or f"no report after {self.poll_timeout:.0f}s"
+                return
+            if self._closed.wait(delay * random.uniform(0.8, 1.2)):
+                return  # closed without waiting; still POLLING, resume with `poll`
+            delay = min(delay * 2, self.poll_max)
+
+    def wait(self, timeout=None, submitted_only=False):
+        """Block until every job is submitted (or finished); returns the jobs."""
+        wait(list(self._submissions.values()), timeout=timeout)
+        if not submitted_only:
+            wait(list(self._polls.values()), timeout=timeout)
+        return list(self.jobs.values())
+
+    def close(self, wait_for_reports=None):
+        """Wait for submissions (and reports, if asked), then stop polling."""
+        wait_for_reports = self.wait_for_reports if wait_for_reports is None else wait_for_reports
+        self.wait(submitted_only=not wait_for_reports)
+        self._closed.set()
+        self._submit_pool.shutdown(wait=True)
+        self._poll_pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def format_status(self):
+        lines = [f"{'run_id':<45} {'status':<10} {'polls':>5} {'resolved':>8}"]
+        lines.append("-" * len(lines[0]))
+        for job in self.jobs.values():
+            resolved = "" if job.report is None else len(job.report.get("resolved_ids", []))
+            lines.append(f"{job.run_id:<45} {job.status:<10} {job.polls:>5} {resolved:>8}"
+                         + (f"  {job.error}" if job.error else ""))
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Submit runs to sb-cli and collect reports")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sub = commands.add_parser("submit", help="Submit a predictions file and wait for its report")
+    sub.add_argument("predictions")
+    sub.add_argument("--run-id", required=True)
+    sub.add_argument("--no-prefilter", action="store_true", help="Skip the git-apply pre-filter")
+    sub.add_argument("--no-wait", action="store_true", help="Return once submitted")
+    poll = commands.add_parser("poll", help="Fetch the reports of submitted runs")
+    poll.add_argument("run_ids", nargs="+")
+    parser.add_argument("--timeout", type=float, default=POLL_TIMEOUT_SECONDS,
+                        help="Seconds to keep polling each report")
+    args = parser.parse_args()
+
+    jobs = CloudJobs.from_env(poll_timeout=args.timeout)
+    try:
+        if args.command == "submit":
+            jobs.submit(args.predictions, args.run_id, prefilter=not args.no_prefilter)
+            jobs.wait(submitted_only=args.no_wait)
+        else:
+            for run_id in args.run_ids:
+                jobs.poll(run_id)
+            jobs.wait()
+    finally:
+        jobs.close()
+    print(jobs.format_status())
+
+
+if __name__ == "__main__":
+    main()
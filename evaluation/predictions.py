@@ -0,0 +1,44 @@
+"""
+Reading and writing SWE-bench prediction files.
+
+Three layouts are in use in this repo, and load_predictions() accepts all
+of them:
+- JSONL, one prediction per line (baselines, reasoning pipeline);
+- a JSON list of predictions;
+- a JSON object keyed by instance_id (SWE-agent's preds.json).
+Every prediction comes back as a dict with at least instance_id,
+model_name_or_path and model_patch.
+"""
+import json
+import os
+
+
+def load_predictions(path):
+    """All predictions in a prediction file, in file order."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            data = json.load(f)
+            if isinstance(data, dict):
+                records = [dict(value, instance_id=key) for key, value in data.items()]
+            else:
+                records = data
+    return [
+        {
+            **record,
+            "model_name_or_path": record.get("model_name_or_path") or "",
+            "model_patch": record.get("model_patch") or "",
+        }
+        for record in records
+    ]
+
+
+def write_jsonl(path, records):
+    """Write records (predictions, results) as JSONL, replacing `path` atomically."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    os.replace(tmp_path, path)
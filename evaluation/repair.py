@@ -0,0 +1,141 @@
+"""
+Repair hunk headers against the real source file.
+
+Models often write `@@ -10,7 +10,7 @@` with the wrong line numbers or
+counts, copied from the prompt's placeholder, and such patches fail to
+apply even though their edits are right. repair_patch() relocates each
+hunk by matching its context and removed lines against the file at
+base_commit, then recomputes every header from the hunk bodies.
+
+Matching uses a per-file index from whitespace-normalized line text to line
+numbers. Each old-side line of a hunk votes for the start positions where
+it occurs, and the best-voted start nearest the header's line wins. A
+relocation is kept only if every removed line matches the source there.
+Context lines that differ only in whitespace, or are simply wrong, are
+replaced with the source's own lines. Hunks that cannot be placed are left
+unchanged.
+"""
+from collections import Counter, defaultdict
+
+from core.diffs import parse_patch
+
+# Lines this common (blank lines, "}", "else:") carry no position information
+MAX_OCCURRENCES = 50
+
+# Share of a hunk's old-side lines that must match the source at its new position
+MIN_MATCH_RATIO = 0.5
+
+
+def _normalize(line):
+    return " ".join(line.split())
+
+
+class LineIndex:
+    """Lines of one source file, indexed by normalized text."""
+
+    def __init__(self, text):
+        self.lines = text.splitlines()
+        self.normalized = [_normalize(line) for line in self.lines]
+        self.positions = defaultdict(list)
+        for number, line in enumerate(self.normalized):
+            self.positions[line].append(number)
+
+    def locate(self, old_lines, expected):
+        """0-based start where `old_lines` best matches, nearest `expected`; None if nowhere."""
+        votes = Counter()
+        for offset, line in enumerate(old_lines):
+            found = self.positions.get(_normalize(line), ())
+            if not found or len(found) > MAX_OCCURRENCES or not _normalize(line):
+                continue
+            for number in found:
+                start = number - offset
+                if 0 <= start <= len(self.lines) - len(old_lines):
+                    votes[start] += 1
+        if not votes:
+            return None
+        best = max(votes.values())
+        return min((start for start, count in votes.items() if count == best),
+                   key=lambda start: abs(start - expected))
+
+    def matches(self, start, old_lines):
+        return [self.normalized[start + i] == _normalize(line) for i, line in enumerate(old_lines)]
+
+
+def _relocate(hunk, index, expected):
+    """(0-based start, repaired body lines) placing `hunk` on the source, or None."""
+    body = [line for line in hunk.lines if line[:1] in (" ", "-")]
+    old_lines = [line[1:] for line in body]
+    start = index.locate(old_lines, expected)
+    if start is None:
+        return None
+    matched = index.matches(start, old_lines)
+    removals_match = all(ok for ok, line in zip(matched, body) if line[0] == "-")
+    if not removals_match or sum(matched) < MIN_MATCH_RATIO * len(old_lines):
+        return None
+
+    source = iter(index.lines[start:start + len(old_lines)])
+    lines = [line[0] + next(source) if line[:1] in (" ", "-") else line for line in hunk.lines]
+    return start, lines
+
+
+def _place_hunks(hunks, index):
+    """[(position, body lines)] per hunk in file order, or None if they would overlap.
+
+    A position is the 0-based first old line, or for a pure insertion the
+    number of old lines before it, as in the @@ header.
+    """
+    placed = []
+    shift = 0  # how far relocated hunks have moved so far in this file
+    for hunk in hunks:
+        found = None
+        if hunk.old_lines:
+            found = _relocate(hunk, index, max(hunk.old_start - 1 + shift, 0))
+        if found is not None:
+            shift = found[0] - (hunk.old_start - 1)
+            placed.append((found[0], found[1], hunk))
+        elif hunk.old_lines:
+            placed.append((max(hunk.old_start - 1, 0), hunk.lines, hunk))
+        else:
+            placed.append((max(hunk.old_start + shift, 0), hunk.lines, hunk))
+
+    placed.sort(key=lambda item: item[0])
+    end = 0
+    for position, _, hunk in placed:
+        if position < end:
+            return None
+        end = position + hunk.old_lines
+    return placed
+
+
+def repair_patch(patch_text, read_file):
+    """Relocate and recount every hunk; returns (patch text, list of changes made).
+
+    `read_file(path)` returns a file's text at base_commit, or None if it
+    does not exist. The input text comes back unchanged if nothing was
+    repaired.
+    """
+    patch = parse_patch(patch_text)
+    changes = []
+    for f in patch.files:
+        if not f.hunks or f.is_new or not f.path:
+            continue
+        text = read_file(f.old_path or f.path)
+        placed = _place_hunks(f.hunks, LineIndex(text)) if text is not None else None
+        if placed is None:
+            continue
+
+        delta = 0  # lines added minus removed by earlier hunks
+        for number, (position, lines, hunk) in enumerate(placed, 1):
+            before = (hunk.old_start, hunk.old_count, hunk.new_start, hunk.new_count, hunk.lines)
+            hunk.lines = lines
+            old_lines, new_lines = hunk.old_lines, hunk.new_lines
+            hunk.old_start = position + 1 if old_lines else position
+            hunk.new_start = position + delta + 1 if new_lines else position + delta
+            delta += new_lines - old_lines
+            if before != (hunk.old_start, old_lines, hunk.new_start, new_lines, lines):
+                changes.append(f"{f.path} hunk {number}: {hunk.raw_header} -> {hunk.header(recount=True)}")
+        f.hunks = [hunk for _, _, hunk in placed]
+
+    if not changes:
+        return patch_text, []
+    return patch.text(recount=True), changes
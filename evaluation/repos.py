@@ -0,0 +1,226 @@
+"""
+Local checkouts of SWE-bench repositories at an instance's base_commit.
+
+Each repository is cloned once, bare, under .cache/repos/mirrors/, with
+branches and tags only: a --mirror clone of a GitHub repo would also pull
+every refs/pull/* ref, tens of thousands for django or sympy. A
+base_commit the clone lacks is fetched by itself. Every instance gets a git worktree of that mirror under
+.cache/repos/worktrees/<instance_id>. Worktrees share the mirror's object
+store, so a checkout costs one file-tree write instead of a clone, and
+they are kept and reused across runs and models. Before each reuse the
+worktree is reset to base_commit and untracked files are removed;
+ignored build output such as compiled extensions or egg-info is left in
+place.
+
+Prepare the checkouts for the first N SWE-bench Lite problems ahead of
+time with:
+
+    python3 -m evaluation.repos prepare --problems 50
+"""
+import argparse
+import contextlib
+import fcntl
+import os
+import shutil
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.dataset import load_instances
+
+DEFAULT_REPO_CACHE = ".cache/repos"
+DEFAULT_REMOTE = "https://github.com/{repo}.git"
+
+# What the mirrors track; pull-request refs are deliberately left out
+FETCH_REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
+
+
+class GitError(RuntimeError):
+    """A git command failed; the message holds its stderr."""
+
+
+def git(*args, cwd=None, check=True):
+    """Run git and return its stdout; raises GitError on failure when `check`."""
+    result = subprocess.run(
+        ["git", *args], cwd=cwd, capture_output=True, text=True,
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+    )
+    if check and result.returncode != 0:
+        raise GitError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Exclusive lock on `path` across processes, held for the with-block."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _slug(repo):
+    return repo.replace("/", "__")
+
+
+class RepoCache:
+    """Bare mirrors plus one reusable worktree per SWE-bench instance.
+
+    `remote` is a URL template filled with the "owner/name" repo, e.g. a
+    local path for tests or a closer mirror. Safe to use from several
+    processes: mirror and worktree changes are serialized with file locks.
+    """
+
+    def __init__(self, root=DEFAULT_REPO_CACHE, remote=DEFAULT_REMOTE):
+        self.root = root
+        self.remote = remote
+
+    @classmethod
+    def from_env(cls):
+        """SWE_BENCH_REPO_CACHE and SWE_BENCH_REPO_URL from .env, else the defaults."""
+        return cls(
+            root=os.getenv("SWE_BENCH_REPO_CACHE", DEFAULT_REPO_CACHE),
+            remote=os.getenv("SWE_BENCH_REPO_URL", DEFAULT_REMOTE),
+        )
+
+    def mirror_path(self, repo):
+        return os.path.join(self.root, "mirrors", f"{_slug(repo)}.git")
+
+    def worktree_path(self, name):
+        return os.path.join(self.root, "worktrees", name)
+
+    def lock(self, name):
+        """Exclusive use of a worktree, for callers that modify it (apply, run tests)."""
+        return file_lock(os.path.join(self.root, "locks", f"{name}.lock"))
+
+    def ensure_mirror(self, repo):
+        """The bare clone of `repo` (branches and tags), cloned on first use."""
+        path = self.mirror_path(repo)
+        if os.path.isdir(path):
+            return path
+        with file_lock(path + ".lock"):
+            if not os.path.isdir(path):
+                tmp_path = f"{path}.tmp{os.getpid()}"
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                print(f"📥 Mirroring {repo} into {path} (once per repo)...")
+                git("clone", "--bare", "--quiet", self.remote.format(repo=repo), tmp_path)
+                git("--git-dir", tmp_path, "config", "--unset-all", "remote.origin.fetch",
+                    check=False)
+                for refspec in FETCH_REFSPECS:
+                    git("--git-dir", tmp_path, "config", "--add", "remote.origin.fetch", refspec)
+                os.replace(tmp_path, path)
+        return path
+
+    def has_commit(self, repo, commit):
+        kind = git("--git-dir", self.mirror_path(repo), "cat-file", "-t", commit, check=False)
+        return kind.strip() == "commit"
+
+    def ensure_commit(self, repo, commit):
+        """Make sure the mirror has `commit`, fetching it if it is newer than the clone.
+
+        Only that commit is fetched; if the server will not serve a bare
+        SHA, branches and tags are updated instead.
+        """
+        mirror = self.ensure_mirror(repo)
+        if not self.has_commit(repo, commit):
+            with file_lock(mirror + ".lock"):
+                if not self.has_commit(repo, commit):
+                    try:
+                        git("--git-dir", mirror, "fetch", "--quiet", "origin", commit)
+                    except GitError:
+                        git("--git-dir", mirror, "fetch", "--quiet", "--prune", "origin",
+                            *FETCH_REFSPECS)
+            if not self.has_commit(repo, commit):
+                raise GitError(f"{repo} has no commit {commit}")
+        return mirror
+
+    def read_file(self, repo, commit, path):
+        """Text of `path` at `commit`, straight from the mirror; None if it does not exist."""
+        try:
+            return git("--git-dir", self.ensure_commit(repo, commit), "show", f"{commit}:{path}")
+        except (GitError, UnicodeDecodeError):
+            return None
+
+    def worktree(self, repo, commit, name):
+        """Path of worktree `name` checked out cleanly at `commit`."""
+        mirror = self.ensure_commit(repo, commit)
+        path = self.worktree_path(name)
+        with file_lock(mirror + ".lock"):
+            if os.path.isdir(path):
+                # Without its own .git file, git would walk up to an enclosing repo
+                has_git = os.path.isfile(os.path.join(path, ".git"))
+                head = git("rev-parse", "HEAD", cwd=path, check=False).strip() if has_git else ""
+                if head:
+                    if head != commit:
+                        git("checkout", "--quiet", "--detach", "--force", commit, cwd=path)
+                    self.reset(path)
+                    return path
+                # Left over from an interrupted checkout
+                shutil.rmtree(path)
+                git("--git-dir", mirror, "worktree", "prune")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            git("--git-dir", mirror, "worktree", "add", "--quiet", "--detach", path, commit)
+        return path
+
+    def checkout(self, instance):
+        """Worktree of a SWE-bench instance at its base_commit."""
+        return self.worktree(instance["repo"], instance["base_commit"], instance["instance_id"])
+
+    @staticmethod
+    def reset(path):
+        """Undo changes to tracked files and remove untracked ones (ignored files stay)."""
+        git("reset", "--quiet", "--hard", cwd=path)
+        git("clean", "--quiet", "-fd", cwd=path)
+
+    def remove(self, repo, name):
+        """Delete one worktree."""
+        mirror = self.mirror_path(repo)
+        with file_lock(mirror + ".lock"):
+            git("--git-dir", mirror, "worktree", "remove", "--force", self.worktree_path(name),
+                check=False)
+            git("--git-dir", mirror, "worktree", "prune")
+
+    def repos(self):
+        """The "owner/name" of every mirrored repo."""
+        mirrors = os.path.join(self.root, "mirrors")
+        if not os.path.isdir(mirrors):
+            return []
+        return sorted(
+            entry[:-len(".git")].replace("__", "/", 1)
+            for entry in os.listdir(mirrors) if entry.endswith(".git")
+        )
+
+
+def prepare(instances, cache=None):
+    """Mirror every repo and create every worktree; returns {instance_id: path}."""
+    cache = cache or RepoCache.from_env()
+    paths = {}
+    for instance in instances:
+        paths[instance["instance_id"]] = cache.checkout(instance)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local SWE-bench repository cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+    prep = commands.add_parser("prepare", help="Create worktrees at base_commit")
+    prep.add_argument("--problems", type=int, default=50)
+    commands.add_parser("list", help="List mirrored repositories")
+    args = parser.parse_args()
+
+    cache = RepoCache.from_env()
+    if args.command == "prepare":
+        instances = load_instances(args.problems, columns=["instance_id", "repo", "base_commit"])
+        paths = prepare(instances, cache)
+        print(f"✅ {len(paths)} worktrees ready under {cache.worktree_path('')}")
+    else:
+        for repo in cache.repos():
+            print(repo)
+
+
+if __name__ == "__main__":
+    main()
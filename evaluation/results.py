@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+One SQLite warehouse for every result this repo produces.
+
+Results are spread over prediction files, error logs, overnight-run logs,
+telemetry, local evaluation logs and sb-cli reports. `ingest` reads them all
+into .cache/results.sqlite (RESULTS_DB overrides), keyed by
+(run_id, model_key, instance_id):
+- predictions: testing/*.jsonl, testing/baseline_results_*.json,
+  testing/errors_*.json, logs/run_evaluation/*/*/*/patch.diff and SWE-agent's
+  SWE-agent/trajectories/*/<run>/preds.json;
+- evaluations: logs/run_evaluation/**/report.json (local evaluator or
+  harness) and sb-cli reports in sb-cli-reports/;
+- calls: telemetry records in testing/metrics/*.jsonl (tokens, cost, latency);
+- runs: the sb-cli run IDs of overnight runs in testing/overnight_run_*.json.
+
+Ingest is incremental: a file whose size and mtime are unchanged is skipped,
+and telemetry files, which only grow, are read from where the last ingest
+stopped. Rows are upserted, so re-running ingest never duplicates anything.
+The `results` view joins the three tables, so one query gives resolve
+rate, cost and latency per model or run.
+
+Usage:
+    python3 -m evaluation.results ingest
+    python3 -m evaluation.results show --by model
+    python3 -m evaluation.results query "SELECT * FROM results WHERE resolved = 1"
+"""
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.models import MODELS, get_model_key
+from evaluation.predictions import load_predictions
+
+DEFAULT_RESULTS_DB = ".cache/results.sqlite"
+
+DEFAULT_SOURCES = (
+    "testing/*.jsonl",
+    "testing/baseline_results_*.json",
+    "testing/errors_*.json",
+    "testing/overnight_run_*.json",
+    "testing/metrics/*.jsonl",
+    "logs/run_evaluation/**/report.json",
+    "logs/run_evaluation/*/*/*/patch.diff",
+    "sb-cli-reports/*.json",
+    "SWE-agent/trajectories/*/*/preds.json",
+)
+
+# Derived files that are not results of their own
+SKIPPED_SUFFIXES = (".validation.jsonl", ".applies.jsonl", ".journal.jsonl")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS predictions (
+    run_id TEXT NOT NULL,
+    model_key TEXT NOT NULL,
+    instance_id TEXT NOT NULL,
+    has_patch INTEGER,
+    patch_chars INTEGER,
+    tokens INTEGER,
+    error TEXT,
+    source TEXT,
+    PRIMARY KEY (run_id, model_key, instance_id)
+);
+CREATE TABLE IF NOT EXISTS evaluations (
+    run_id TEXT NOT NULL,
+    model_key TEXT NOT NULL,
+    instance_id TEXT NOT NULL,
+    evaluator TEXT NOT NULL,
+    status TEXT,
+    resolved INTEGER,
+    seconds REAL,
+    source TEXT,
+    PRIMARY KEY (run_id, model_key, instance_id)
+);
+CREATE TABLE IF NOT EXISTS calls (
+    source TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    run_id TEXT NOT NULL,
+    model_key TEXT NOT NULL,
+    instance_id TEXT NOT NULL,
+    stage TEXT,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    cost REAL,
+    latency_seconds REAL,
+    error TEXT,
+    PRIMARY KEY (source, line)
+);
+CREATE INDEX IF NOT EXISTS calls_key ON calls (run_id, model_key, instance_id);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    model_key TEXT,
+    submitted INTEGER,
+    timestamp TEXT,
+    source TEXT
+);
+CREATE VIEW IF NOT EXISTS call_totals AS
+    SELECT run_id, model_key, instance_id, COUNT(*) AS calls,
+           SUM(prompt_tokens + completion_tokens) AS tokens, SUM(cost) AS cost,
+           SUM(latency_seconds) AS latency_seconds
+    FROM calls GROUP BY run_id, model_key, instance_id;
+CREATE VIEW IF NOT EXISTS results AS
+    SELECT k.run_id, k.model_key, k.instance_id,
+           p.has_patch, p.patch_chars, p.error, e.evaluator, e.status, e.resolved,
+           c.calls, COALESCE(c.tokens, p.tokens) AS tokens, c.cost, c.latency_seconds
+    FROM (SELECT run_id, model_key, instance_id FROM predictions
+          UNION SELECT run_id, model_key, instance_id FROM evaluations
+          UNION SELECT run_id, model_key, instance_id FROM call_totals) AS k
+    LEFT JOIN predictions p USING (run_id, model_key, instance_id)
+    LEFT JOIN evaluations e USING (run_id, model_key, instance_id)
+    LEFT JOIN call_totals c USING (run_id, model_key, instance_id);
+"""
+
+UPSERT_PREDICTION = """
+    INSERT INTO predictions (run_id, model_key, instance_id, has_patch, patch_chars, tokens, error, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (run_id, model_key, instance_id) DO UPDATE SET
+        has_patch = COALESCE(excluded.has_patch, has_patch),
+        patch_chars = COALESCE(excluded.patch_chars, patch_chars),
+        tokens = COALESCE(excluded.tokens, tokens),
+        error = COALESCE(excluded.error, error),
+        source = excluded.source
+"""
+
+UPSERT_EVALUATION = """
+    INSERT OR REPLACE INTO evaluations (run_id, model_key, instance_id, evaluator, status, resolved, seconds, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+GROUPINGS = {"model": ("model_key",), "run": ("run_id", "model_key")}
+
+
+def _model_id(part):
+    """The OpenRouter ID in a SWE-agent name part: openrouter--anthropic--claude-opus-4.1 -> anthropic/claude-opus-4.1."""
+    model_id = part.replace("--", "/")
+    return model_id[len("openrouter/"):] if model_id.startswith("openrouter/") else model_id
+
+
+def model_key_for(*names):
+    """The MODELS key the first recognizable run ID, model ID or name refers to, else the last name."""
+    for name in names:
+        if not name:
+            continue
+        if name in MODELS:
+            return name
+        key = get_model_key(_model_id(name)) or get_model_key(name.replace("__", "/"))
+        # SWE-agent run names: default__openrouter--anthropic--claude-opus-4.1__t-0.00__...
+        key = key or next(filter(None, (get_model_key(_model_id(part))
+                                        for part in name.split("__"))), None)
+        if key:
+            return key
+        for model_key, model in MODELS.items():
+            if model["name"] == name:
+                return model_key
+        matches = [key for key in MODELS if key in name]
+        if matches:
+            return max(matches, key=len)
+    return next((name for name in reversed(names) if name), "")
+
+
+def _stem(path):
+    name = os.path.basename(path)
+    return name.rsplit(".", 1)[0]
+
+
+class ResultsStore:
+    """The SQLite warehouse plus one ingester per kind of result file."""
+
+    def __init__(self, path=DEFAULT_RESULTS_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    @classmethod
+    def from_env(cls):
+        """RESULTS_DB from .env, else the default."""
+        return cls(os.getenv("RESULTS_DB", DEFAULT_RESULTS_DB))
+
+    def close(self):
+        self.db.close()
+
+    # -- ingest ---------------------------------------------------------------
+
+    def ingest(self, patterns=DEFAULT_SOURCES):
+        """Ingest every new or changed file matching `patterns`; returns {kind: files ingested}."""
+        counts = {}
+        for pattern in patterns:
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if path.endswith(SKIPPED_SUFFIXES) or not os.path.isfile(path):
+                    continue
+                kind = self.ingest_file(path)
+                if kind:
+                    counts[kind] = counts.get(kind, 0) + 1
+        return counts
+
+    @staticmethod
+    def kind_of(path):
+        name = os.path.basename(path)
+        if path.endswith("patch.diff"):
+            return "patch_log"
+        if name == "report.json":
+            return "eval_report"
+        if os.path.basename(os.path.dirname(path)) == "metrics":
+            return "telemetry"
+        if os.path.basename(os.path.dirname(path)) == "sb-cli-reports":
+            return "sbcli_report"
+        if name.startswith("errors_"):
+            return "errors"
+        if name.startswith("overnight_run_"):
+            return "overnight"
+        if name.startswith("baseline_results_"):
+            return "solutions"
+        if name.endswith(".jsonl") or name == "preds.json":
+            return "predictions"
+        return None
+
+    def ingest_file(self, path):
+        """Ingest one file if it changed since the last ingest; returns its kind or None."""
+        kind = self.kind_of(path)
+        if kind is None:
+            return None
+        stat = os.stat(path)
+        row = self.db.execute("SELECT size, mtime_ns, offset FROM sources WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[:2] == (stat.st_size, stat.st_mtime_ns):
+            return None
+        offset = row[2] if row is not None else 0
+        if kind == "telemetry" and offset > stat.st_size:  # rewritten, not appended
+            self.db.execute("DELETE FROM calls WHERE source = ?", (path,))
+            offset = 0
+        with self.db:
+            offset = getattr(self, f"_ingest_{kind}")(path, offset)
+            self.db.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?)",
+                (path, kind, stat.st_size, stat.st_mtime_ns, offset or 0, time.time()),
+            )
+        return kind
+
+    def _ingest_predictions(self, path, offset):
+        """A predictions JSONL file, or SWE-agent's preds.json named after its trajectory dir."""
+        if os.path.basename(path) == "preds.json":
+            run_id = os.path.basename(os.path.dirname(path))
+        else:
+            run_id = _stem(path)
+        rows = []
+        for p in load_predictions(path):
+            patch = p["model_patch"]
+            model_key = model_key_for(run_id, p["model_name_or_path"])
+            rows.append((run_id, model_key, p["instance_id"], int(bool(patch.strip())),
+                         len(patch), None, None, path))
+        self.db.executemany(UPSERT_PREDICTION, rows)
+
+    def _ingest_solutions(self, path, offset):
+        """testing/baseline_results_<model>_<time>.json from the simple baseline."""
+        run_id = _stem(path)
+        with open(path, encoding="utf-8") as f:
+            results = json.load(f)
+        self.db.executemany(UPSERT_PREDICTION, [
+            (run_id, model_key_for(run_id, r.get("model_id")), r["instance_id"],
+             int(bool(r.get("solution"))), len(r.get("solution") or ""), r.get("tokens"),
+             r.get("error"), path)
+            for r in results
+        ])
+
+    def _ingest_errors(self, path, offset):
+        """testing/errors_<model>_<N>problems.json, belonging to run baseline_<model>_<N>problems."""
+        run_id = "baseline_" + _stem(path)[len("errors_"):]
+        with open(path, encoding="utf-8") as f:
+            errors = json.load(f)
+        if isinstance(errors, dict):  # {model_key: [errors]}
+            errors = [e for model_errors in errors.values() for e in model_errors]
+        model_key = model_key_for(run_id)
+        self.db.executemany(UPSERT_PREDICTION, [
+            (run_id, model_key, e["instance_id"], 0, 0, None, e.get("error") or "error", path)
+            for e in errors if e.get("instance_id")
+        ])
+
+    def _ingest_overnight(self, path, offset):
+        with open(path, encoding="utf-8") as f:
+            results = json.load(f).get("results", [])
+        self.db.executemany("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)", [
+            (r["run_id"], r.get("model_key"), int(bool(r.get("submitted"))), r.get("timestamp"), path)
+            for r in results if r.get("run_id")
+        ])
+
+    def _ingest_telemetry(self, path, offset):
+        """Telemetry JSONL, read from `offset`; returns the new offset."""
+        default_run = _stem(path)
+        rows = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            line_number = self.db.execute(
+                "SELECT COALESCE(MAX(line), -1) + 1 FROM calls WHERE source = ?", (path,)
+            ).fetchone()[0]
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # a record still being written; read it next time
+                offset += len(raw)
+                if not raw.strip():
+                    continue
+                r = json.loads(raw)
+                rows.append((
+                    path, line_number, r.get("run_id") or default_run,
+                    model_key_for(r.get("model_key"), r.get("model_id")), r.get("instance_id") or "",
+                    r.get("stage"), r.get("prompt_tokens"), r.get("completion_tokens"),
+                    r.get("cost"), r.get("latency_seconds"), r.get("error"),
+                ))
+                line_number += 1
+        self.db.executemany("INSERT OR REPLACE INTO calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return offset
+
+    def _ingest_patch_log(self, path, offset):
+        """logs/run_evaluation/<run>/<model>/<instance_id>/patch.diff."""
+        instance_dir = os.path.dirname(path)
+        model_dir = os.path.dirname(instance_dir)
+        run_id = os.path.basename(os.path.dirname(model_dir))
+        with open(path, encoding="utf-8", errors="replace") as f:
+            patch = f.read()
+        self.db.execute(UPSERT_PREDICTION, (
+            run_id, model_key_for(os.path.basename(model_dir)), os.path.basename(instance_dir),
+            int(bool(patch.strip())), len(patch), None, None, path,
+        ))
+
+    def _ingest_eval_report(self, path, offset):
+        """report.json of the local evaluator (one instance) or the harness ({instance_id: report})."""
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+        parts = path.split(os.sep)
+        if "instance_id" in report and "status" in report:
+            # logs/run_evaluation/<run>/<model>/<instance_id>/report.json
+            run_id, model = parts[-4], parts[-3]
+            self.db.execute(UPSERT_EVALUATION, (
+                run_id, model_key_for(model), report["instance_id"],
+                "local", report["status"], int(bool(report.get("resolved"))), report.get("seconds"), path,
+            ))
+        elif all(isinstance(value, dict) and "resolved" in value for value in report.values()) and len(parts) >= 4:
+            run_id, model = parts[-4], parts[-3]
+            self.db.executemany(UPSERT_EVALUATION, [
+                (run_id, model_key_for(model), instance_id, "harness",
+                 "resolved" if value["resolved"] else "unresolved", int(bool(value["resolved"])), None, path)
+                for instance_id, value in report.items()
+            ])
+
+    def _ingest_sbcli_report(self, path, offset):
+        """An sb-cli report: ID lists per outcome."""
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+        # sb-cli names reports <dataset>__<split>__<run_id>.json; run IDs may contain "__"
+        run_id = report.get("run_id") or _stem(path).split("__", 2)[-1]
+        model_key = model_key_for(run_id)
+        rows = []
+        for field, status, resolved in (("resolved_ids", "resolved", 1), ("unresolved_ids", "unresolved", 0),
+                                        ("error_ids", "error", 0), ("empty_patch_ids", "empty_patch", 0)):
+            for instance_id in report.get(field) or []:
+                rows.append((run_id, model_key, instance_id, "sb-cli", status, resolved, None, path))
+        self.db.executemany(UPSERT_EVALUATION, rows)
+
+    # -- queries --------------------------------------------------------------
+
+    def summary(self, by="run", run_like=None):
+        """Per-model (by="model") or per-run (by="run") resolve rate, cost and latency."""
+        group = ", ".join(GROUPINGS[by])
+        where, params = ("WHERE run_id LIKE ?", [run_like]) if run_like else ("", [])
+        cursor = self.db.execute(f"""
+            SELECT {group}, COUNT(*) AS instances,
+                   SUM(COALESCE(has_patch, 0)) AS patches,
+                   SUM(error IS NOT NULL) AS errors,
+                   SUM(resolved IS NOT NULL) AS evaluated,
+                   SUM(COALESCE(resolved, 0)) AS resolved,
+                   ROUND(100.0 * SUM(COALESCE(resolved, 0)) / NULLIF(SUM(resolved IS NOT NULL), 0), 1)
+                       AS resolve_rate,
+                   ROUND(SUM(cost), 4) AS cost,
+                   ROUND(AVG(latency_seconds), 2) AS avg_latency
+            FROM results {where}
+            GROUP BY {group} ORDER BY {group}
+        """, params)
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def query(self, sql, params=()):
+        """(column names, rows) of an arbitrary read query."""
+        cursor = self.db.execute(sql, params)
+        return [d[0] for d in cursor.description or ()], cursor.fetchall()
+
+
+def format_table(columns, rows):
+    """Rows as a fixed-width text table."""
+    cells = [[("" if value is None else str(value)) for value in row] for row in rows]
+    widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+    lines.append("-" * len(lines[0]))
+    lines.extend("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in cells)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local results warehouse (SQLite)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Load new or changed result files")
+    ingest.add_argument("patterns", nargs="*", help="Glob patterns (default: every known result location)")
+    ingest.add_argument("--rebuild", action="store_true", help="Start from an empty database")
+    show = commands.add_parser("show", help="Resolve rate, cost and latency")
+    show.add_argument("--by", choices=sorted(GROUPINGS), default="run")
+    show.add_argument("--run", help="Only runs whose ID matches this SQL LIKE pattern")
+    show.add_argument("--ingest", action="store_true", help="Ingest changed files first")
+    sql = commands.add_parser("query", help="Run a SQL query against the warehouse")
+    sql.add_argument("sql")
+    args = parser.parse_args()
+
+    path = os.getenv("RESULTS_DB", DEFAULT_RESULTS_DB)
+    if args.command == "ingest" and args.rebuild and os.path.exists(path):
+        os.remove(path)
+    store = ResultsStore(path)
+    try:
+        if args.command == "ingest" or getattr(args, "ingest", False):
+            started = time.perf_counter()
+            counts = store.ingest(getattr(args, "patterns", None) or DEFAULT_SOURCES)
+            changed = ", ".join(f"{n} {kind}" for kind, n in sorted(counts.items())) or "nothing new"
+            print(f"📥 Ingested {changed} in {time.perf_counter() - started:.2f}s ({path})")
+        if args.command == "show":
+            rows = store.summary(args.by, args.run)
+            columns = list(rows[0]) if rows else list(GROUPINGS[args.by])
+            print(format_table(columns, [list(row.values()) for row in rows]))
+        elif args.command == "query":
+            print(format_table(*store.query(args.sql)))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Local SWE-bench evaluation: run an instance's tests on this machine.
+
+For every prediction the evaluator takes the instance's cached worktree
+(evaluation/repos.py), applies the model patch and the instance's
+test_patch, runs the test files the test_patch touches, and reads the
+FAIL_TO_PASS and PASS_TO_PASS results out of the log. A prediction is
+resolved when every FAIL_TO_PASS and PASS_TO_PASS test passes, as in the
+official harness.
+
+Environments are virtualenvs under .cache/envs/, one per repo and version,
+created once from the version's environment_setup_commit and reused by
+every instance and model. Tests run with the instance's worktree first on
+PYTHONPATH, so one environment serves many checkouts. Repositories with
+C extensions are built in place once per worktree.
+
+Predictions run in a process pool, each under a timeout; predictions for
+the same instance take turns on its worktree. Logs follow the harness
+layout: logs/run_evaluation/<run_id>/<model>/<instance_id>/.
+
+Model-written code runs here (the in-place build and the tests), so it is
+sandboxed as far as the host allows. The environment is rebuilt from
+ENV_ALLOWLIST: PATH and locale only, so API keys and tokens are never
+passed. HOME and TMPDIR point at a fresh temporary directory. The command
+runs in its own network namespace (unshare --net) so it cannot reach the
+network. If unshare is missing or not permitted, the evaluator prints a
+warning and runs WITHOUT network isolation. It is still not a container:
+the tests can read and write anything this user can. Run untrusted
+predictions in a VM or container, or use sb-cli or Modal.
+
+Runner settings come from the swebench package's specs when it is
+installed, and from REPO_SPECS below otherwise. This is not the Docker
+harness: the Python a version needs has to be on PATH as pythonX.Y. When
+it is missing, the prediction is reported as an error rather than run
+under another interpreter. Treat results as fast feedback, and use
+sb-cli or Modal for reported numbers.
+
+Usage:
+    python3 -m evaluation.swe_bench testing/baseline_claude_best_50problems.jsonl --run-id local_claude --workers 4
+"""
+import argparse
+import functools
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.dataset import load_instances
+from evaluation.predictions import load_predictions
+from evaluation.repos import GitError, RepoCache, file_lock
+
+try:
+    from swebench.harness.constants import MAP_REPO_VERSION_TO_SPECS
+except ImportError:  # optional; REPO_SPECS covers the SWE-bench Lite repos
+    MAP_REPO_VERSION_TO_SPECS = None
+
+DEFAULT_ENV_DIR = ".cache/envs"
+DEFAULT_LOG_DIR = "logs/run_evaluation"
+DEFAULT_TIMEOUT = 1800  # seconds per test run
+INSTALL_TIMEOUT = 3600  # seconds to build one environment
+
+EVAL_COLUMNS = (
+    "instance_id", "repo", "version", "base_commit", "environment_setup_commit",
+    "test_patch", "FAIL_TO_PASS", "PASS_TO_PASS",
+)
+
+# Variables passed through to builds and test runs; everything else in the
+# caller's environment (API keys, tokens, the real HOME) is dropped
+ENV_ALLOWLIST = ("PATH", "LANG", "LC_ALL", "LC_CTYPE", "TZ")
+# Installing environments also needs the network settings pip uses
+INSTALL_ENV_ALLOWLIST = ENV_ALLOWLIST + (
+    "HTTP_PROXY", "HTTPS_PROXY", "NO_PROXY", "http_proxy", "https_proxy", "no_proxy",
+    "PIP_INDEX_URL", "PIP_EXTRA_INDEX_URL", "PIP_CERT", "SSL_CERT_FILE",
+)
+
+# Ways to start a command without network access, most direct first
+UNSHARE_PREFIXES = (
+    ["unshare", "--net", "--"],
+    ["unshare", "--user", "--map-current-user", "--net", "--"],
+    ["unshare", "--user", "--net", "--"],
+)
+
+PYTEST = ["pytest", "--no-header", "-rA", "--tb=no", "-p", "no:cacheprovider"]
+
+# Test runner, log format and install steps per repository. "python" is a
+# version for every release or a {release version: python version} dict;
+# "build" repos compile their extensions in place in each worktree.
+REPO_SPECS = {
+    "astropy/astropy": {"python": "3.9", "install": ["-e", ".[test]"], "build": True},
+    "django/django": {
+        "python": {"3.0": "3.6", "3.1": "3.6", "3.2": "3.6", "4.0": "3.8", "4.1": "3.8",
+                   "4.2": "3.9", "5.0": "3.11"},
+        "requirements": "tests/requirements/py3.txt",
+        "test_cmd": ["./tests/runtests.py", "--verbosity", "2", "--settings=test_sqlite",
+                     "--parallel", "1"],
+        "log": "django",
+    },
+    "matplotlib/matplotlib": {"python": "3.11", "build": True},
+    "mwaskom/seaborn": {"python": "3.9", "install": ["-e", ".[dev]"]},
+    "pallets/flask": {"python": "3.9"},
+    "psf/requests": {"python": "3.9"},
+    "pydata/xarray": {"python": "3.10"},
+    "pylint-dev/pylint": {"python": "3.9"},
+    "pytest-dev/pytest": {"python": "3.9"},
+    "scikit-learn/scikit-learn": {
+        "python": {"0.20": "3.6", "0.21": "3.6", "0.22": "3.6"},
+        "default_python": "3.9",
+        "build": True,
+    },
+    "sphinx-doc/sphinx": {"python": "3.9", "install": ["-e", ".[test]"]},
+    "sympy/sympy": {"python": "3.9", "test_cmd": ["bin/test", "-C", "--verbose"], "log": "sympy",
+                    "pip_packages": ["mpmath==1.3.0"]},
+}
+
+PASSED = "PASSED"
+FAILED = "FAILED"
+SKIPPED = "SKIPPED"
+PASSING = {PASSED, "XFAIL"}
+
+# Report statuses
+RESOLVED = "resolved"
+UNRESOLVED = "unresolved"
+PATCH_FAILED = "patch_failed"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+TEST_FILE = re.compile(r'^diff --git a/(\S+) b/', re.MULTILINE)
+
+
+def spec_for(repo, version):
+    """Runner settings for a repo/version: swebench's specs if installed, else REPO_SPECS."""
+    spec = dict(REPO_SPECS.get(repo, {}))
+    python = spec.get("python", "3.9")
+    if isinstance(python, dict):
+        python = python.get(version, spec.get("default_python", "3.9"))
+    spec["python"] = python
+    if MAP_REPO_VERSION_TO_SPECS is not None:
+        upstream = MAP_REPO_VERSION_TO_SPECS.get(repo, {}).get(version, {})
+        spec["python"] = upstream.get("python", spec["python"])
+        spec["pip_packages"] = upstream.get("pip_packages", spec.get("pip_packages", []))
+    return spec
+
+
+def test_files(test_patch):
+    """Files changed by an instance's test_patch, which is what the tests run on."""
+    return list(dict.fromkeys(TEST_FILE.findall(test_patch)))
+
+
+def test_command(spec, files):
+    """The command line that runs the given test files for this repo."""
+    log = spec.get("log", "pytest")
+    if log == "django":
+        # tests/a/b/test_c.py -> a.b.test_c
+        labels = [
+            path[len("tests/"):-len(".py")].replace("/", ".")
+            for path in files if path.startswith("tests/") and path.endswith(".py")
+        ]
+        return spec["test_cmd"] + labels
+    return spec.get("test_cmd", PYTEST) + files
+
+
+def parse_pytest(log):
+    """{test name: status} from pytest's -rA short summary."""
+    results = {}
+    for line in log.splitlines():
+        match = re.match(r'^(PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS) (.+?)(?: - .*)?$', line)
+        if match:
+            status = FAILED if match.group(1) == "ERROR" else match.group(1)
+            results[match.group(2)] = status
+    return results
+
+
+def parse_django(log):
+    """{test name: status} from Django's runtests.py --verbosity 2 output."""
+    results = {}
+    pending = None  # a test whose docstring pushed " ... status" to the next line
+    for line in log.splitlines():
+        match = re.match(r'^(\w+ \([\w.]+\))(?: .*)? \.\.\. (.+)$', line)
+        name, outcome = (match.group(1), match.group(2)) if match else (None, None)
+        if match is None and pending and " ... " in line:
+            name, outcome = pending, line.rsplit(" ... ", 1)[1]
+        if name is None:
+            pending = line if re.match(r'^\w+ \([\w.]+\)$', line) else None
+            continue
+        pending = None
+        if outcome.startswith("ok") or outcome == "expected failure":
+            results[name] = PASSED
+        elif outcome.startswith("skipped"):
+            results[name] = SKIPPED
+        else:
+            results[name] = FAILED
+    return results
+
+
+def parse_sympy(log):
+    """{test name: status} from sympy's bin/test --verbose output."""
+    results = {}
+    for line in log.splitlines():
+        match = re.match(r'^(test_\w+) (ok|F|E|f|X|s|Slow|w)\b', line)
+        if match:
+            outcome = match.group(2)
+            results[match.group(1)] = (PASSED if outcome in ("ok", "f")
+                                       else SKIPPED if outcome in ("s", "w") else FAILED)
+    return results
+
+
+LOG_PARSERS = {"pytest": parse_pytest, "django": parse_django, "sympy": parse_sympy}
+
+
+def _names(field):
+    """FAIL_TO_PASS / PASS_TO_PASS as a list (SWE-bench stores them as JSON strings)."""
+    return json.loads(field) if isinstance(field, str) else list(field or [])
+
+
+def _run(args, cwd, env=None, timeout=None, log=None):
+    """Run a command in its own process group; returns (exit code or None on timeout, output)."""
+    process = subprocess.Popen(
+        args, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, errors="replace", start_new_session=True,
+    )
+    try:
+        output, _ = process.communicate(timeout=timeout)
+        code = process.returncode
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        output, _ = process.communicate()
+        code = None
+    if log is not None:
+        log.write(f"$ {' '.join(args)}\n{output}\n")
+        log.flush()
+    return code, output
+
+
+def sandbox_env(home, venv=None, pythonpath=None, allowlist=ENV_ALLOWLIST):
+    """A minimal environment: allowlisted variables, `home` as HOME and TMPDIR, the venv first on PATH."""
+    env = {key: os.environ[key] for key in allowlist if key in os.environ}
+    env.update(HOME=home, TMPDIR=home)
+    if venv is not None:
+        env["PATH"] = os.pathsep.join([os.path.join(venv, "bin"), env.get("PATH", os.defpath)])
+        env["VIRTUAL_ENV"] = venv
+    if pythonpath is not None:
+        env["PYTHONPATH"] = pythonpath
+    return env
+
+
+@functools.lru_cache(maxsize=1)
+def network_isolation():
+    """Command prefix that cuts a command off the network, or None if this host has none."""
+    if shutil.which("unshare") is None:
+        return None
+    for prefix in UNSHARE_PREFIXES:
+        try:
+            if subprocess.run(prefix + ["true"], capture_output=True, timeout=30).returncode == 0:
+                return list(prefix)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+    return None
+
+
+def _run_sandboxed(args, cwd, venv, pythonpath=None, timeout=None, log=None):
+    """_run() with sandbox_env() in a fresh temporary HOME, without network if possible."""
+    prefix = network_isolation()
+    if prefix is None and log is not None:
+        log.write("WARNING: no network isolation (unshare unavailable); running unsandboxed\n")
+    with tempfile.TemporaryDirectory(prefix="swe_bench_home_") as home:
+        env = sandbox_env(home, venv, pythonpath)
+        return _run((prefix or []) + list(args), cwd, env=env, timeout=timeout, log=log)
+
+
+class EnvManager:
+    """One virtualenv per repo/version, built once and shared by every worktree."""
+
+    def __init__(self, root=DEFAULT_ENV_DIR, repos=None):
+        self.root = os.path.abspath(root)  # commands run with a worktree as cwd
+        self.repos = repos or RepoCache.from_env()
+
+    @classmethod
+    def from_env(cls, repos=None):
+        """SWE_BENCH_ENV_DIR from .env, else the default."""
+        return cls(os.getenv("SWE_BENCH_ENV_DIR", DEFAULT_ENV_DIR), repos)
+
+    def env_path(self, repo, version):
+        return os.path.join(self.root, f"{repo.replace('/', '__')}__{version}")
+
+    @staticmethod
+    def interpreter(python_version):
+        """pythonX.Y from PATH; RuntimeError if it is missing or does not run.
+
+        Another interpreter would install the wrong dependency versions and
+        report false failures, so there is no fallback.
+        """
+        candidate = shutil.which(f"python{python_version}")
+        # pyenv shims are on PATH even when that version is not selected
+        if candidate and subprocess.run([candidate, "-c", ""], capture_output=True).returncode == 0:
+            return candidate
+        raise RuntimeError(f"python{python_version} is not on PATH (needed to build this environment)")
+
+    def python(self, repo, version):
+        return os.path.join(self.env_path(repo, version), "bin", "python")
+
+    def ensure(self, instance, log=None):
+        """Path of the environment for the instance's repo/version, built if missing."""
+        repo, version = instance["repo"], instance["version"]
+        path = self.env_path(repo, version)
+        ready = os.path.join(path, ".ready")
+        if os.path.exists(ready):
+            return path
+        with file_lock(path + ".lock"):
+            if os.path.exists(ready):
+                return path
+            spec = spec_for(repo, version)
+            shutil.rmtree(path, ignore_errors=True)
+            setup = self.repos.worktree(
+                repo, instance.get("environment_setup_commit") or instance["base_commit"],
+                f"{repo.replace('/', '__')}__env{version}",
+            )
+            steps = [[self.interpreter(spec["python"]), "-m", "venv", path]]
+            pip = [os.path.join(path, "bin", "python"), "-m", "pip", "install", "--quiet"]
+            if spec.get("pip_packages"):
+                steps.append(pip + spec["pip_packages"])
+            if spec.get("requirements"):
+                steps.append(pip + ["-r", spec["requirements"]])
+            steps.append(pip + spec.get("install", ["-e", "."]))
+            if spec.get("log", "pytest") == "pytest":
+                steps.append(pip + ["pytest"])
+            with tempfile.TemporaryDirectory(prefix="swe_bench_home_") as home:
+                env = sandbox_env(home, allowlist=INSTALL_ENV_ALLOWLIST)
+                for step in steps:
+                    code, output = _run(step, setup, env=env, timeout=INSTALL_TIMEOUT, log=log)
+                    if code != 0:
+                        raise RuntimeError(f"environment setup failed: {' '.join(step)}\n{output[-2000:]}")
+            open(ready, "w").close()
+        return path
+
+    def build(self, instance, worktree, log=None):
+        """Compile C extensions in place, once per worktree (the output is git-ignored)."""
+        if not spec_for(instance["repo"], instance["version"]).get("build"):
+            return
+        marker = os.path.join(self.root, "built", instance["instance_id"])
+        if os.path.exists(marker):
+            return
+        code, output = _run_sandboxed(
+            [self.python(instance["repo"], instance["version"]), "setup.py", "build_ext", "--inplace"],
+            worktree, self.env_path(instance["repo"], instance["version"]),
+            timeout=INSTALL_TIMEOUT, log=log,
+        )
+        if code != 0:
+            raise RuntimeError(f"in-place build failed\n{output[-2000:]}")
+        os.makedirs(os.path.dirname(marker), exist_ok=True)
+        open(marker, "w").close()
+
+
+def _apply(path, patch, log):
+    """Apply a patch with git, falling back to patch --fuzz like the harness."""
+    for args in (["git", "apply", "--verbose", "-"],
+                 ["patch", "--batch", "--forward", "-p1", "--fuzz=5"]):
+        process = subprocess.run(args, cwd=path, input=patch, capture_output=True, text=True)
+        log.write(f"$ {' '.join(args)}\n{process.stdout}{process.stderr}\n")
+        if process.returncode == 0:
+            return True
+    return False
+
+
+def evaluate_prediction(prediction, instance, run_id, repos, envs, timeout=DEFAULT_TIMEOUT,
+                        log_dir=DEFAULT_LOG_DIR):
+    """Evaluate one prediction; returns its report dict (runs in a worker process)."""
+    instance_id = instance["instance_id"]
+    model = prediction["model_name_or_path"].replace("/", "__") or "model"
+    instance_dir = os.path.join(log_dir, run_id, model, instance_id)
+    os.makedirs(instance_dir, exist_ok=True)
+    with open(os.path.join(instance_dir, "patch.diff"), "w") as f:
+        f.write(prediction["model_patch"])
+
+    f2p, p2p = _names(instance["FAIL_TO_PASS"]), _names(instance["PASS_TO_PASS"])
+    report = {
+        "instance_id": instance_id,
+        "model_name_or_path": prediction["model_name_or_path"],
+        "status": ERROR,
+        "resolved": False,
+        "seconds": 0.0,
+        "FAIL_TO_PASS": {"success": [], "failure": f2p},
+        "PASS_TO_PASS": {"success": [], "failure": p2p},
+    }
+    started = time.monotonic()
+    spec = spec_for(instance["repo"], instance["version"])
+    with open(os.path.join(instance_dir, "run_instance.log"), "w") as log:
+        try:
+            env = envs.ensure(instance, log)
+            with repos.lock(instance_id):
+                path = repos.checkout(instance)
+                try:
+                    if not prediction["model_patch"].strip() or not _apply(path, prediction["model_patch"], log):
+                        report["status"] = PATCH_FAILED
+                        return report
+                    if not _apply(path, instance["test_patch"], log):
+                        raise RuntimeError("test_patch does not apply")
+                    envs.build(instance, path, log)
+                    code, output = _run_sandboxed(
+                        test_command(spec, test_files(instance["test_patch"])),
+                        path, env, pythonpath=os.path.abspath(path), timeout=timeout, log=log,
+                    )
+                finally:
+                    repos.reset(path)
+            with open(os.path.join(instance_dir, "test_output.txt"), "w") as f:
+                f.write(output)
+            if code is None:
+                report["status"] = TIMEOUT
+                return report
+            results = LOG_PARSERS[spec.get("log", "pytest")](output)
+            for key, names in (("FAIL_TO_PASS", f2p), ("PASS_TO_PASS", p2p)):
+                report[key] = {
+                    "success": [n for n in names if results.get(n) in PASSING],
+                    "failure": [n for n in names if results.get(n) not in PASSING],
+                }
+            report["resolved"] = not report["FAIL_TO_PASS"]["failure"] and not report["PASS_TO_PASS"]["failure"]
+            report["status"] = RESOLVED if report["resolved"] else UNRESOLVED
+        except (GitError, RuntimeError, OSError) as e:
+            log.write(f"ERROR: {e}\n")
+            report["error"] = str(e)
+        finally:
+            report["seconds"] = round(time.monotonic() - started, 1)
+            with open(os.path.join(instance_dir, "report.json"), "w") as f:
+                json.dump(report, f, indent=2)
+    return report
+
+
+def evaluate(predictions, instances, run_id, workers=4, timeout=DEFAULT_TIMEOUT,
+             repos=None, envs=None, log_dir=DEFAULT_LOG_DIR):
+    """Evaluate predictions in a process pool; returns (summary, per-prediction reports).
+
+    The summary has the same counts and ID lists as an sb-cli report and is
+    written to <log_dir>/<run_id>/report.json.
+    """
+    repos = repos or RepoCache.from_env()
+    envs = envs or EnvManager.from_env(repos)
+    if network_isolation() is None:
+        print("⚠️  WARNING: unshare --net is not available here; model patches and their tests "
+              "will run WITH network access. Use a VM or container for untrusted predictions.")
+    reports = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for prediction in predictions:
+            instance = instances.get(prediction["instance_id"])
+            if instance is None:
+                reports.append({"instance_id": prediction["instance_id"], "status": ERROR,
+                                "resolved": False, "error": "unknown instance"})
+                continue
+            futures[pool.submit(evaluate_prediction, prediction, instance, run_id, repos, envs,
+                                timeout, log_dir)] = prediction
+        for future in as_completed(futures):
+            report = future.result()
+            reports.append(report)
+            mark = {"resolved": "✅", "unresolved": "❌"}.get(report["status"], "⚠️ ")
+            print(f"{mark} {report['instance_id']}: {report['status']} ({report['seconds']}s)")
+
+    def ids(*statuses):
+        return sorted(r["instance_id"] for r in reports if r["status"] in statuses)
+
+    summary = {
+        "run_id": run_id,
+        "total_instances": len(instances),
+        "submitted_instances": len(predictions),
+        "completed_instances": len(ids(RESOLVED, UNRESOLVED, PATCH_FAILED)),
+        "resolved_instances": len(ids(RESOLVED)),
+        "unresolved_instances": len(ids(UNRESOLVED, PATCH_FAILED)),
+        "error_instances": len(ids(ERROR, TIMEOUT)),
+        "resolved_ids": ids(RESOLVED),
+        "unresolved_ids": ids(UNRESOLVED, PATCH_FAILED),
+        "error_ids": ids(ERROR, TIMEOUT),
+    }
+    os.makedirs(os.path.join(log_dir, run_id), exist_ok=True)
+    with open(os.path.join(log_dir, run_id, "report.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary, reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate SWE-bench predictions locally")
+    parser.add_argument("predictions", help="Prediction file (.jsonl or .json)")
+    parser.add_argument("--run-id", required=True)
+    parser.add_argument("--workers", type=int, default=4, help="Predictions evaluated at once")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT, help="Seconds per test run")
+    parser.add_argument("--instance-ids", nargs="+", help="Only evaluate these instances")
+    args = parser.parse_args()
+
+    predictions = load_predictions(args.predictions)
+    if args.instance_ids:
+        predictions = [p for p in predictions if p["instance_id"] in set(args.instance_ids)]
+    wanted = {p["instance_id"] for p in predictions}
+    instances = {
+        instance["instance_id"]: instance
+        for instance in load_instances(columns=EVAL_COLUMNS)
+        if instance["instance_id"] in wanted
+    }
+
+    print(f"Evaluating {len(predictions)} predictions locally ({args.workers} workers)...")
+    summary, _ = evaluate(predictions, instances, args.run_id, args.workers, args.timeout)
+    print(f"\n✅ Resolved: {summary['resolved_instances']}/{summary['submitted_instances']}")
+    print(f"⚠️  Errors: {summary['error_instances']}")
+    print(f"💾 Report: {os.path.join(DEFAULT_LOG_DIR, args.run_id, 'report.json')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Fast pre-filter: does each predicted patch apply at its base_commit?
+
+Every prediction is checked in its instance's cached worktree (see
+evaluation/repos.py), first with `git apply --check` and then, if that
+fails, with a dry run of `patch --fuzz`, the fallback the SWE-bench
+harness itself uses. Each prediction gets one status:
+- clean: git apply accepts the patch as it is;
+- fuzz: only patch accepts it, with offsets or fuzzy context;
+- malformed: the text is not a usable diff (empty, corrupt hunks, no headers);
+- does_not_apply: a well-formed diff whose hunks do not match the source;
+- error: the checkout itself failed, e.g. the repo could not be cloned;
+- repaired: it did not apply as written, but does once its hunk headers are
+  relocated and recounted against base_commit (evaluation/repair.py; only
+  with repair enabled).
+
+Predictions are grouped by instance, so each worktree is reset once for
+all models, and the groups are spread over a process pool. Only clean
+and fuzz predictions are worth sending to sb-cli or Modal.
+
+Usage:
+    python3 -m evaluation.validate testing/baseline_*_50problems.jsonl --workers 8
+    python3 -m evaluation.validate preds.jsonl --keep    # also write preds.applies.jsonl
+    python3 -m evaluation.validate preds.jsonl --repair --keep    # keep repaired patches too
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.dataset import load_instances
+from evaluation.predictions import load_predictions, write_jsonl
+from evaluation.repair import repair_patch
+from evaluation.repos import GitError, RepoCache
+
+CLEAN = "clean"
+FUZZ = "fuzz"
+MALFORMED = "malformed"
+DOES_NOT_APPLY = "does_not_apply"
+ERROR = "error"
+REPAIRED = "repaired"
+STATUSES = (CLEAN, FUZZ, REPAIRED, MALFORMED, DOES_NOT_APPLY, ERROR)
+
+# Statuses worth evaluating; errors are kept too, since nothing is known
+SUBMITTABLE = {CLEAN, FUZZ, REPAIRED, ERROR}
+
+# Same fuzz factor as the SWE-bench harness's `patch` fallback
+PATCH_FUZZ = 5
+
+# git apply messages that mean the diff itself is broken, not just stale
+MALFORMED_MARKERS = (
+    "corrupt patch",
+    "No valid patches in input",
+    "patch with only garbage",
+    "patch fragment without header",
+    "unrecognized input",
+    "git diff header lacks filename",
+    "bad git-diff",
+)
+
+INSTANCE_COLUMNS = ("instance_id", "repo", "base_commit")
+
+
+def _run(args, cwd, patch):
+    result = subprocess.run(args, cwd=cwd, input=patch, capture_output=True, text=True)
+    return result.returncode == 0, (result.stderr or result.stdout).strip()
+
+
+def check_patch(path, patch):
+    """(status, detail) for one patch against the checkout at `path`."""
+    if not patch.strip():
+        return MALFORMED, "empty patch"
+    applies, message = _run(["git", "apply", "--check", "-"], path, patch)
+    if applies:
+        return CLEAN, ""
+    detail = message.splitlines()[0] if message else ""
+    if any(marker in message for marker in MALFORMED_MARKERS):
+        return MALFORMED, detail
+    if shutil.which("patch"):
+        fuzzed, _ = _run(
+            ["patch", "--dry-run", "--batch", "--forward", "-p1", f"--fuzz={PATCH_FUZZ}"],
+            path, patch,
+        )
+        if fuzzed:
+            return FUZZ, detail
+    return DOES_NOT_APPLY, detail
+
+
+def _repair(cache, instance, path, patch):
+    """(REPAIRED, changes, repaired patch) if relocating the hunks makes it apply, else None."""
+    repaired, changes = repair_patch(
+        patch, lambda file: cache.read_file(instance["repo"], instance["base_commit"], file)
+    )
+    if changes and check_patch(path, repaired)[0] in (CLEAN, FUZZ):
+        return REPAIRED, "; ".join(changes), repaired
+    return None
+
+
+def _check_instance(cache, instance, predictions, repair=False):
+    """(status, detail, repaired patch or None) for every prediction of one instance.
+
+    Runs in a worker process.
+    """
+    try:
+        with cache.lock(instance["instance_id"]):
+            path = cache.checkout(instance)
+            results = []
+            for prediction in predictions:
+                status, detail = check_patch(path, prediction["model_patch"])
+                fixed = None
+                if repair and status in (MALFORMED, DOES_NOT_APPLY) and prediction["model_patch"].strip():
+                    fixed = _repair(cache, instance, path, prediction["model_patch"])
+                results.append(fixed or (status, detail, None))
+            return results
+    except (GitError, OSError) as e:
+        return [(ERROR, str(e), None)] * len(predictions)
+
+
+def validate(predictions, instances, cache=None, workers=None, repair=False):
+    """Classify predictions; returns one result dict per prediction, in input order.
+
+    `instances` maps instance_id to a dict with repo and base_commit. With
+    `repair`, patches that do not apply get their hunk headers repaired, and
+    the results of those that then apply carry the new "repaired_patch".
+    """
+    cache = cache or RepoCache.from_env()
+    groups = OrderedDict()
+    for index, prediction in enumerate(predictions):
+        groups.setdefault(prediction["instance_id"], []).append(index)
+
+    statuses = {}
+    # CloudJobs calls this from a background thread; forking a threaded
+    # process can copy a held lock into the child, so start clean workers
+    context = multiprocessing.get_context("forkserver")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {}
+        for instance_id, indices in groups.items():
+            if instance_id not in instances:
+                for index in indices:
+                    statuses[index] = (ERROR, "unknown instance", None)
+                continue
+            future = pool.submit(_check_instance, cache, instances[instance_id],
+                                 [predictions[i] for i in indices], repair)
+            futures[future] = indices
+        for future in as_completed(futures):
+            for index, status in zip(futures[future], future.result()):
+                statuses[index] = status
+
+    results = []
+    for index, prediction in enumerate(predictions):
+        status, detail, repaired = statuses[index]
+        result = {
+            "instance_id": prediction["instance_id"],
+            "model_name_or_path": prediction["model_name_or_path"],
+            "status": status,
+            "detail": detail,
+        }
+        if repaired is not None:
+            result["repaired_patch"] = repaired
+        results.append(result)
+    return results
+
+
+def _kept(prediction, result):
+    """The prediction to evaluate for a submittable result, with any repaired patch."""
+    if "repaired_patch" in result:
+        return {**prediction, "model_patch": result["repaired_patch"]}
+    return prediction
+
+
+def load_instance_index(instance_ids=None):
+    """{instance_id: {instance_id, repo, base_commit}} from the SWE-bench Lite split."""
+    wanted = set(instance_ids) if instance_ids is not None else None
+    return {
+        instance["instance_id"]: instance
+        for instance in load_instances(columns=INSTANCE_COLUMNS)
+        if wanted is None or instance["instance_id"] in wanted
+    }
+
+
+def filter_applicable(predictions_file, output_file=None, cache=None, workers=None, repair=True):
+    """Write the predictions worth evaluating to `output_file`.
+
+    Defaults to <predictions_file stem>.applies.jsonl. Repaired patches
+    replace the originals. Returns (output_file, results).
+    """
+    predictions = load_predictions(predictions_file)
+    instances = load_instance_index(p["instance_id"] for p in predictions)
+    results = validate(predictions, instances, cache, workers, repair)
+    output_file = output_file or os.path.splitext(predictions_file)[0] + ".applies.jsonl"
+    write_jsonl(output_file, [
+        _kept(prediction, result) for prediction, result in zip(predictions, results)
+        if result["status"] in SUBMITTABLE
+    ])
+    return output_file, results
+
+
+def format_counts(results):
+    """Status counts per model as a text table."""
+    by_model = OrderedDict()
+    for result in results:
+        by_model.setdefault(result["model_name_or_path"], Counter())[result["status"]] += 1
+    width = max([len("model")] + [len(model) for model in by_model])
+    lines = [f"{'model':<{width}}" + "".join(f"{status:>16}" for status in STATUSES)]
+    lines.append("-" * len(lines[0]))
+    for model, counts in by_model.items():
+        lines.append(f"{model:<{width}}" + "".join(f"{counts[s]:>16}" for s in STATUSES))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that predicted patches apply at base_commit")
+    parser.add_argument("files", nargs="+", help="Prediction files (.jsonl or .json)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--keep", action="store_true",
+                        help="Also write <file>.applies.jsonl with the predictions worth evaluating")
+    parser.add_argument("--repair", action="store_true",
+                        help="Relocate and recount the hunks of patches that do not apply")
+    args = parser.parse_args()
+
+    predictions = []
+    sources = []
+    for path in args.files:
+        loaded = load_predictions(path)
+        predictions.extend(loaded)
+        sources.extend([path] * len(loaded))
+
+    print(f"Checking {len(predictions)} predictions from {len(args.files)} files "
+          f"with {args.workers} workers...")
+    instances = load_instance_index(p["instance_id"] for p in predictions)
+    results = validate(predictions, instances, workers=args.workers, repair=args.repair)
+    print(format_counts(results))
+
+    for path in args.files:
+        file_results = [r for r, source in zip(results, sources) if source == path]
+        report_file = os.path.splitext(path)[0] + ".validation.jsonl"
+        write_jsonl(report_file, file_results)
+        print(f"💾 {report_file}")
+        if args.keep:
+            kept = [
+                _kept(p, r) for p, r, source in zip(predictions, results, sources)
+                if source == path and r["status"] in SUBMITTABLE
+            ]
+            keep_file = os.path.splitext(path)[0] + ".applies.jsonl"
+            write_jsonl(keep_file, kept)
+            print(f"💾 {keep_file} ({len(kept)}/{len(file_results)} kept)")
+
+
+if __name__ == "__main__":
+    main()
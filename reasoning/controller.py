@@ -0,0 +1,103 @@
+"""
+Per-problem budgets, stopping rules and model-tier escalation.
+
+The Controller decides, for each problem the pipeline works on:
+- when to stop spending: token, dollar and wall-clock limits per problem;
+- when a candidate is good enough: N consecutive passing verifications;
+- when more rounds stop paying off: the verification score has not improved
+  for `patience` corrections in a row;
+- when to escalate: a problem the `*_budget` model could not solve is
+  retried with the provider's `*_best` model, if budget is left.
+"""
+import time
+
+from core.models import MODELS
+
+
+class ProblemBudget:
+    """Spend of one problem so far, checked against the controller's limits."""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.tokens = 0
+        self.dollars = 0.0
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def finish(self):
+        """Freeze the wall-clock time once the problem is done."""
+        if self.finished is None:
+            self.finished = time.monotonic()
+
+    def charge(self, tokens, dollars):
+        self.tokens += tokens
+        self.dollars += dollars
+
+    def exhausted(self):
+        """Name of the first limit that has been reached, or None."""
+        limits = self.controller
+        if limits.max_tokens is not None and self.tokens >= limits.max_tokens:
+            return "tokens"
+        if limits.max_dollars is not None and self.dollars >= limits.max_dollars:
+            return "dollars"
+        if limits.max_seconds is not None and self.elapsed >= limits.max_seconds:
+            return "time"
+        return None
+
+    def to_dict(self):
+        return {
+            "tokens": self.tokens,
+            "dollars": round(self.dollars, 6),
+            "seconds": round(self.elapsed, 2),
+        }
+
+
+class Controller:
+    """Limits and stopping rules shared by every problem in a run.
+
+    Any limit left as None is unlimited. Responses that do not report their
+    own cost are priced from core.models; `prices` (model key -> dollars per
+    million tokens) overrides that for the models it names.
+    """
+
+    def __init__(self, max_tokens=None, max_dollars=None, max_seconds=None,
+                 required_passes=5, patience=2, min_gain=0.05, escalate=True, prices=None):
+        self.max_tokens = max_tokens
+        self.max_dollars = max_dollars
+        self.max_seconds = max_seconds
+        self.required_passes = required_passes
+        self.patience = patience
+        self.min_gain = min_gain
+        self.escalate = escalate
+        self.prices = prices or {}
+
+    def start(self):
+        """A fresh budget for one problem."""
+        return ProblemBudget(self)
+
+    def accepted(self, candidate):
+        return candidate.streak >= self.required_passes
+
+    def score(self, candidate, gate):
+        """Fraction of the required passes this patch got before it failed."""
+        passed = candidate.streak + sum(v.passed for v in gate.verdicts)
+        return min(1.0, passed / self.required_passes)
+
+    def stalled(self, candidate):
+        """True once `patience` rounds in a row have not beaten the best earlier score."""
+        scores = candidate.scores
+        if len(scores) <= self.patience:
+            return False
+        best_before = max(scores[:-self.patience])
+        return max(scores[-self.patience:]) < best_before + self.min_gain
+
+    def next_tier(self, model_key):
+        """The `*_best` model to escalate to from a `*_budget` one, or None."""
+        if not self.escalate or not model_key.endswith("_budget"):
+            return None
+        best = model_key[:-len("_budget")] + "_best"
+        return best if best in MODELS else None
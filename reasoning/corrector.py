@@ -0,0 +1,42 @@
+"""
+Correction step: revise a candidate using the bug reports from a failed gate.
+"""
+from core.prompts import DIFF_FORMAT, patch_sections
+from reasoning.solver import ask
+
+CORRECTOR_INSTRUCTIONS = f"""You are a rigorous software engineer. Your patch under review was rejected by reviewers.
+
+Fix every valid issue in their bug reports; if a report is wrong, keep that part and explain why in one sentence.
+Then give the complete corrected git diff patch in this EXACT format:
+
+{DIFF_FORMAT}"""
+
+
+class Corrector:
+    """Turns a rejected candidate plus its bug reports into a revised one."""
+
+    def __init__(self, client, model_key, max_tokens=4000, temperature=0.1, limit=None,
+                 prices=None):
+        self.client = client
+        self.model_key = model_key
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.limit = limit
+        self.prices = prices
+
+    async def correct(self, instance, candidate, gate):
+        bug_reports = "\n\n".join(
+            f"Reviewer {n}:\n{report}" for n, report in enumerate(gate.bug_reports, 1)
+        ) or "The reviewers rejected the patch without details; re-check it carefully."
+        text, tokens, cost = await ask(
+            self.client, self.model_key, CORRECTOR_INSTRUCTIONS,
+            patch_sections(instance, candidate.patch),
+            f"Reviewer bug reports:\n{bug_reports}",
+            max_tokens=self.max_tokens, temperature=self.temperature, limit=self.limit,
+            prices=self.prices, stage="correct", instance_id=instance["instance_id"],
+            cache_prefix=True,
+        )
+        revised = candidate.revise(text)
+        revised.tokens += tokens
+        revised.cost += cost
+        return revised
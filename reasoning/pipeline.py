@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Full solve -> verify -> correct -> iterate flow, run as an async DAG.
+
+Every stage of every candidate is a node in a TaskGraph and starts as soon
+as the node it depends on has finished, so many problems and candidates
+are in flight at once. A failed verification gate adds a correction node
+and a new gate behind it; an accepted candidate ends the problem and
+cancels the candidates still working on it. reasoning.controller decides
+when to stop spending and when to escalate to a stronger model.
+
+Usage:
+    python3 -m reasoning.pipeline --model claude_best --problems 10 --passes 3 --iterations 3
+    python3 -m reasoning.pipeline --model google_budget --max-dollars 0.50 --max-seconds 600
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from core.cache import ResponseCache
+from core.client import AsyncOpenRouterClient
+from core.dataset import load_instances
+from core.models import MODELS
+from core.patches import PatchDeduper
+from core.telemetry import Telemetry
+from reasoning.controller import Controller
+from reasoning.corrector import Corrector
+from reasoning.solver import Solver
+from reasoning.verifier import Verifier
+
+load_dotenv()
+
+
+class DependencyFailed(Exception):
+    """A node was skipped because a node it depends on failed or was cancelled."""
+
+
+class TaskGraph:
+    """Async DAG executor.
+
+    add(name, func, deps) registers a node; func is called with the results
+    of its dependencies (in order) and must return an awaitable. Nodes may
+    add further nodes while the graph is running. A node whose dependency
+    failed is skipped with DependencyFailed; errors never stop the graph.
+    """
+
+    def __init__(self):
+        self.results = {}
+        self.errors = {}
+        self.cancelled = set()
+        self._nodes = {}
+        self._tasks = {}
+        self._running = False
+
+    def add(self, name, func, deps=()):
+        if name in self._nodes:
+            raise ValueError(f"Duplicate node: {name}")
+        for dep in deps:
+            if dep not in self._nodes:
+                raise KeyError(f"Unknown dependency: {dep}")
+        self._nodes[name] = (func, tuple(deps))
+        if self._running:
+            self._start(name)
+        return name
+
+    def _start(self, name):
+        func, deps = self._nodes[name]
+        self._tasks[name] = asyncio.create_task(self._run_node(name, func, deps))
+
+    async def _run_node(self, name, func, deps):
+        try:
+            if deps:
+                # wait() rather than awaiting the tasks, so cancelling this
+                # node never cancels the nodes it depends on
+                await asyncio.wait([self._tasks[dep] for dep in deps])
+            missing = [dep for dep in deps if dep not in self.results]
+            if missing:
+                self.errors[name] = DependencyFailed(f"{name}: {missing[0]} did not finish")
+                return
+            self.results[name] = await func(*(self.results[dep] for dep in deps))
+        except asyncio.CancelledError:
+            self.cancelled.add(name)
+            raise
+        except Exception as e:
+            self.errors[name] = e
+
+    def cancel(self, prefix):
+        """Cancel every unfinished node whose name starts with `prefix`.
+
+        The calling node itself is never cancelled, so a node can end its
+        own siblings.
+        """
+        current = asyncio.current_task()
+        for name, task in list(self._tasks.items()):
+            if name.startswith(prefix) and task is not current and not task.done():
+                task.cancel()
+
+    async def run(self):
+        """Run until every node, including ones added on the way, is done."""
+        self._running = True
+        for name in self._nodes:
+            if name not in self._tasks:
+                self._start(name)
+        try:
+            while True:
+                pending = [task for task in self._tasks.values() if not task.done()]
+                if not pending:
+                    break
+                await asyncio.wait(pending)
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            self._running = False
+        return self.results
+
+
+class _Problem:
+    """Book-keeping for one problem while its nodes run."""
+
+    def __init__(self, pipeline, graph, instance, stages_for):
+        self.pipeline = pipeline
+        self.controller = pipeline.controller
+        self.graph = graph
+        self.instance = instance
+        self.stages_for = stages_for
+        self.instance_id = instance["instance_id"]
+        self.prefix = f"{self.instance_id}/"
+        self.budget = self.controller.start()
+        self.accepted = None
+        self.stopped = None
+        self.latest = {}  # (model_key, sample) -> newest candidate
+        self.patches = PatchDeduper()  # every patch generated for this problem
+        self.tiers = []
+        self.live = 0  # candidate chains still running
+
+    def stop(self, reason):
+        """Cancel all remaining work on this problem."""
+        if self.stopped is None and self.accepted is None:
+            self.stopped = reason
+        self.budget.finish()
+        self.graph.cancel(self.prefix)
+
+    def charge(self, tokens, dollars):
+        """Book spend; stops the problem and returns False once a limit is hit."""
+        self.budget.charge(tokens, dollars)
+        reason = self.budget.exhausted()
+        if reason is not None:
+            self.stop(reason)
+        return reason is None and self.accepted is None
+
+    def start_tier(self, model_key):
+        self.tiers.append(model_key)
+        for sample in range(self.pipeline.num_candidates):
+            chain = f"{self.prefix}{model_key}/{sample}/"
+            self.live += 1
+            self.graph.add(chain + "solve",
+                           lambda m=model_key, s=sample, c=chain: self._solve(m, s, c))
+
+    def _end_chain(self):
+        """Escalate once every chain of the current tier has ended unaccepted."""
+        self.live -= 1
+        if self.live or self.accepted is not None or self.stopped is not None:
+            return
+        next_tier = self.controller.next_tier(self.tiers[-1])
+        if next_tier is not None and next_tier not in self.tiers:
+            self.start_tier(next_tier)
+        else:
+            self.budget.finish()
+
+    async def _solve(self, model_key, sample, chain):
+        try:
+            candidate = await self.stages_for(model_key)[0].solve(self.instance, sample)
+        except Exception:
+            self._end_chain()
+            raise
+        self.latest[(model_key, sample)] = candidate
+        candidate.duplicate_of = self.patches.add(candidate.patch, f"{model_key}/{sample}/r0")
+        if self.charge(candidate.tokens, candidate.cost) and candidate.duplicate_of is None:
+            self._add_gate(chain, 0, chain + "solve")
+        else:
+            self._end_chain()
+        return candidate
+
+    def _add_gate(self, chain, step, dep):
+        self.graph.add(f"{chain}verify{step}",
+                       lambda candidate: self._verify(candidate, chain, step), deps=[dep])
+
+    async def _verify(self, candidate, chain, step):
+        if candidate.duplicate_of is not None:
+            # Another chain already has this exact patch
+            self._end_chain()
+            return candidate
+        verifier = self.stages_for(candidate.model_key)[1]
+        required = self.controller.required_passes
+        passes = max(1, min(self.pipeline.verification_passes, required - candidate.streak))
+        try:
+            gate = await verifier.gate(self.instance, candidate, passes,
+                                       first=candidate.streak, total=required)
+        except Exception:
+            self._end_chain()
+            raise
+        candidate.gates.append(gate)
+        candidate.tokens += gate.tokens
+        candidate.cost += gate.cost
+        within_budget = self.charge(gate.tokens, gate.cost)
+
+        if gate.passed:
+            candidate.streak += len(gate.verdicts)
+            if self.controller.accepted(candidate):
+                if self.accepted is None:
+                    self.accepted = candidate
+                    self.budget.finish()
+                    self.graph.cancel(self.prefix)
+            elif within_budget:
+                # More passes in a row are needed for the same patch
+                self._add_gate(chain, step + 1, f"{chain}verify{step}")
+                return candidate
+        else:
+            candidate.scores.append(self.controller.score(candidate, gate))
+            if (within_budget and candidate.round < self.pipeline.max_iterations
+                    and not self.controller.stalled(candidate)):
+                correct = self.graph.add(
+                    f"{chain}correct{step}",
+                    lambda c: self._correct(c),
+                    deps=[f"{chain}verify{step}"],
+                )
+                self._add_gate(chain, step + 1, correct)
+                return candidate
+        self._end_chain()
+        return candidate
+
+    async def _correct(self, candidate):
+        corrector = self.stages_for(candidate.model_key)[2]
+        try:
+            revised = await corrector.correct(self.instance, candidate, candidate.gates[-1])
+        except Exception:
+            self._end_chain()
+            raise
+        self.latest[(revised.model_key, revised.sample)] = revised
+        revised.duplicate_of = self.patches.add(
+            revised.patch, f"{revised.model_key}/{revised.sample}/r{revised.round}"
+        )
+        self.charge(revised.tokens - candidate.tokens, revised.cost - candidate.cost)
+        return revised
+
+    def result(self):
+        candidates = list(self.latest.values())
+        best = self.accepted or max(
+            candidates,
+            key=lambda c: (c.scores[-1] if c.scores else 0, -c.round),
+            default=None,
+        )
+        errors = [
+            f"{name}: {error}"
+            for name, error in self.graph.errors.items()
+            if name.startswith(self.prefix) and not isinstance(error, DependencyFailed)
+        ]
+        return {
+            "instance_id": self.instance_id,
+            "model_key": best.model_key if best else self.tiers[-1],
+            "accepted": self.accepted is not None,
+            "patch": best.patch if best else None,
+            "rounds": best.round if best else 0,
+            "tiers": self.tiers,
+            "stopped": self.stopped,
+            "tokens": self.budget.tokens,
+            "cost": round(self.budget.dollars, 6),
+            "elapsed": round(self.budget.elapsed, 2),
+            "candidates": [c.to_dict() for c in candidates],
+            "errors": errors,
+        }
+
+
+class IMOPipeline:
+    """Solve, verify with parallel passes, correct, and repeat.
+
+    Each problem gets `num_candidates` independent candidates. A gate runs
+    up to `verification_passes` verifiers in parallel, and a candidate is
+    accepted once the controller's `required_passes` verifications in a row
+    have passed, over as many gates as that takes. A failed gate leads to a
+    correction, up to `max_iterations` per candidate, unless the controller
+    sees the scores stalling. The controller's budgets cap each problem's
+    tokens, dollars and wall-clock time, and a problem the `*_budget` model
+    cannot solve is escalated to `*_best`. `max_concurrency` caps the API
+    calls in flight across all problems.
+    """
+
+    def __init__(self, model="claude_best", max_iterations=5, verification_passes=5,
+                 num_candidates=2, verifier_model=None, max_concurrency=16, client=None,
+                 controller=None):
+        self.model = model
+        self.verifier_model = verifier_model
+        self.max_iterations = max_iterations
+        self.verification_passes = verification_passes
+        self.num_candidates = num_candidates
+        self.max_concurrency = max_concurrency
+        self.controller = controller or Controller(required_passes=verification_passes)
+        self.client = client or AsyncOpenRouterClient(
+            title="Giga-Think-Reasoning",
+            cache=ResponseCache.from_env(),
+            max_concurrency=max_concurrency,
+            telemetry=Telemetry.from_env("reasoning"),
+        )
+
+    def solve(self, problem):
+        """Blocking wrapper around solve_many() for a single problem."""
+        return asyncio.run(self.solve_many([problem]))[0]
+
+    async def solve_many(self, instances):
+        """Run the pipeline on several problems at once; one result dict each."""
+        limit = asyncio.Semaphore(self.max_concurrency)
+        prices = self.controller.prices
+        stages = {}
+
+        def stages_for(model_key):
+            if model_key not in stages:
+                stages[model_key] = (
+                    Solver(self.client, model_key, limit=limit, prices=prices,
+                           cache_prefix=self.num_candidates > 1),
+                    Verifier(self.client, self.verifier_model or model_key,
+                             limit=limit, prices=prices),
+                    Corrector(self.client, model_key, limit=limit, prices=prices),
+                )
+            return stages[model_key]
+
+        graph = TaskGraph()
+        problems = [_Problem(self, graph, instance, stages_for) for instance in instances]
+        for problem in problems:
+            problem.start_tier(self.model)
+
+        deadlines = []
+        if self.controller.max_seconds is not None:
+            loop = asyncio.get_running_loop()
+            deadlines = [
+                loop.call_later(self.controller.max_seconds, problem.stop, "time")
+                for problem in problems
+            ]
+        try:
+            await graph.run()
+        finally:
+            for handle in deadlines:
+                handle.cancel()
+        return [problem.result() for problem in problems]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the solve/verify/correct pipeline on SWE-bench Lite")
+    parser.add_argument("--model", default="claude_best", choices=list(MODELS))
+    parser.add_argument("--verifier-model", choices=list(MODELS), help="Defaults to --model")
+    parser.add_argument("--problems", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=3, help="Max corrections per candidate")
+    parser.add_argument("--passes", type=int, default=3, help="Verification passes per gate")
+    parser.add_argument("--candidates", type=int, default=2, help="Independent candidates per problem")
+    parser.add_argument("--concurrency", type=int, default=16, help="Max API calls in flight")
+    parser.add_argument("--required-passes", type=int,
+                        help="Consecutive passing verifications to accept (default: --passes)")
+    parser.add_argument("--max-tokens", type=int, help="Token budget per problem")
+    parser.add_argument("--max-dollars", type=float, help="Dollar budget per problem")
+    parser.add_argument("--max-seconds", type=float, help="Wall-clock budget per problem")
+    parser.add_argument("--no-escalate", action="store_true",
+                        help="Do not retry unsolved *_budget problems with *_best")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"IMO REASONING PIPELINE - {MODELS[args.model]['name']}")
+    print("=" * 70)
+    print(f"Problems: {args.problems}, candidates: {args.candidates}, "
+          f"passes: {args.passes}, iterations: {args.iterations}")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    instances = load_instances(args.problems)
+    pipeline = IMOPipeline(
+        model=args.model,
+        max_iterations=args.iterations,
+        verification_passes=args.passes,
+        num_candidates=args.candidates,
+        verifier_model=args.verifier_model,
+        max_concurrency=args.concurrency,
+        controller=Controller(
+            max_tokens=args.max_tokens,
+            max_dollars=args.max_dollars,
+            max_seconds=args.max_seconds,
+            required_passes=args.required_passes or args.passes,
+            escalate=not args.no_escalate,
+        ),
+    )
+    results = asyncio.run(pipeline.solve_many(instances))
+
+    for result in results:
+        if result["accepted"]:
+            status = f"✅ accepted ({result['model_key']})"
+        else:
+            status = f"❌ not accepted ({result['stopped'] or 'out of rounds'})"
+        print(f"  {result['instance_id']}: {status} after {result['rounds']} corrections, "
+              f"{result['tokens']} tokens, ${result['cost']:.4f}, {result['elapsed']}s")
+        for error in result["errors"]:
+            print(f"     ⚠️  {error[:100]}")
+
+    output_file = f"testing/reasoning_{args.model}_{args.problems}problems.jsonl"
+    os.makedirs("testing", exist_ok=True)
+    with open(output_file, "w") as f:
+        for result in results:
+            if result["patch"]:
+                f.write(json.dumps({
+                    "instance_id": result["instance_id"],
+                    "model_name_or_path": f"{MODELS[result['model_key']]['name']} (reasoning)",
+                    "model_patch": result["patch"],
+                }) + "\n")
+    details_file = output_file.replace(".jsonl", "_details.json")
+    with open(details_file, "w") as f:
+        json.dump(results, f, indent=2)
+
+    accepted = sum(r["accepted"] for r in results)
+    print(f"\n✅ Accepted: {accepted}/{len(results)}")
+    print(f"💰 Cost: ${sum(r['cost'] for r in results):.2f} "
+          f"(${sum(r['cost'] for r in results) / max(1, len(results)):.4f}/problem)")
+    print(f"💾 Predictions: {output_file}")
+    print(f"💾 Details: {details_file}")
+
+    telemetry = pipeline.client.telemetry
+    if telemetry is not None and telemetry.records:
+        print(f"\n{telemetry.format_summary(by=('model_key', 'stage'))}")
+        if telemetry.path:
+            print(f"📈 Call metrics: {telemetry.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Rigor-first solver: turns a SWE-bench problem into a candidate patch.
+
+The solver asks for a root-cause analysis before the fix, and returns a
+Candidate that the verifier and corrector pass along the pipeline.
+"""
+import asyncio
+import contextlib
+
+from core.costs import usage_cost
+from core.models import MODELS
+from core.patches import extract_patch
+from core.prompts import DIFF_FORMAT, build_messages, problem_sections
+
+SOLVER_INSTRUCTIONS = f"""You are a rigorous software engineer fixing a bug. Correctness matters more than speed.
+
+Work in this order:
+1. Root cause: state precisely which code is wrong and why.
+2. Fix: the smallest change that fixes the root cause without breaking other behaviour.
+3. Check: name the edge cases you considered.
+
+Then give the complete git diff patch in this EXACT format:
+
+{DIFF_FORMAT}"""
+
+
+async def ask(client, model_key, instructions, context="", query="", max_tokens=4000,
+              temperature=0.1, limit=None, prices=None, sample=0, stage=None, instance_id=None,
+              cache_prefix=False):
+    """Run one completion; returns (text, tokens used, dollar cost).
+
+    The prompt is sent as core.prompts segments (stable instructions, then
+    per-problem context, then the per-call query) so repeated calls on the
+    same problem reuse the provider's prompt cache; pass cache_prefix=True
+    where the prefix will be sent again, so Anthropic and Google get cache
+    breakpoints. A list of core.tokens Sections as `context` is cut to fit
+    the model's context window.
+
+    `limit` is an optional asyncio.Semaphore shared by every stage, so the
+    whole pipeline stays under one concurrency cap. The cost is the one
+    OpenRouter reports; if it reports none, `prices` (model key -> dollars
+    per million tokens) overrides the core.models pricing used to estimate
+    it. `stage` and `instance_id` tag the call in the client's telemetry.
+    """
+    model_id = MODELS[model_key]["id"]
+    async with limit or contextlib.nullcontext():
+        response = await client.complete(
+            model_id=model_id,
+            messages=build_messages(model_id, instructions, context, query, max_tokens,
+                                    cache_prefix=cache_prefix),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            sample=sample,
+            tags={"model_key": model_key, "stage": stage, "instance_id": instance_id},
+        )
+    tokens = client.get_tokens_used(response)
+    cost = client.get_cost(response)
+    if cost is None and prices and model_key in prices:
+        cost = tokens * prices[model_key] / 1_000_000
+    if cost is None:
+        cost = usage_cost(model_key, getattr(response, "usage", None)) or 0.0
+    return client.get_response_text(response) or "", tokens, cost
+
+
+class Candidate:
+    """One proposed solution and its history through the pipeline."""
+
+    def __init__(self, instance_id, model_key, solution, sample=0):
+        self.instance_id = instance_id
+        self.model_key = model_key
+        self.solution = solution
+        self.patch = extract_patch(solution)
+        self.sample = sample
+        self.duplicate_of = None  # key of an identical patch seen earlier
+        self.round = 0
+        self.tokens = 0
+        self.cost = 0.0
+        self.streak = 0  # consecutive passing verifications of this patch
+        self.scores = []  # best verification score of each failed round
+        self.gates = []  # every GateResult, across rounds
+
+    @property
+    def accepted(self):
+        return bool(self.gates) and self.gates[-1].passed
+
+    def revise(self, solution):
+        """A corrected version of this candidate, keeping its history."""
+        revised = Candidate(self.instance_id, self.model_key, solution, self.sample)
+        revised.round = self.round + 1
+        revised.tokens = self.tokens
+        revised.cost = self.cost
+        revised.scores = list(self.scores)
+        revised.gates = list(self.gates)
+        return revised
+
+    def to_dict(self):
+        return {
+            "instance_id": self.instance_id,
+            "model_key": self.model_key,
+            "sample": self.sample,
+            "round": self.round,
+            "accepted": self.accepted,
+            "tokens": self.tokens,
+            "cost": round(self.cost, 6),
+            "streak": self.streak,
+            "duplicate_of": self.duplicate_of,
+            "patch": self.patch,
+            "gates": [gate.to_dict() for gate in self.gates],
+        }
+
+
+class Solver:
+    """Generates initial candidates for a problem."""
+
+    def __init__(self, client, model_key, max_tokens=4000, temperature=0.1, limit=None,
+                 prices=None, sample_temperature=0.8, cache_prefix=False):
+        self.client = client
+        self.model_key = model_key
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.sample_temperature = sample_temperature
+        self.cache_prefix = cache_prefix  # True when several samples share the prompt
+        self.limit = limit
+        self.prices = prices
+
+    async def solve(self, instance, sample=0):
+        # Sample 0 is the low-temperature answer; later samples explore
+        temperature = self.temperature if sample == 0 else self.sample_temperature
+        text, tokens, cost = await ask(
+            self.client, self.model_key, SOLVER_INSTRUCTIONS, problem_sections(instance),
+            max_tokens=self.max_tokens, temperature=temperature, limit=self.limit,
+            prices=self.prices, sample=sample, stage="solve", instance_id=instance["instance_id"],
+            cache_prefix=self.cache_prefix,
+        )
+        candidate = Candidate(instance["instance_id"], self.model_key, text, sample)
+        candidate.tokens = tokens
+        candidate.cost = cost
+        return candidate
+
+    async def solve_many(self, instance, samples):
+        """Generate `samples` candidates for one problem concurrently."""
+        return await asyncio.gather(*(self.solve(instance, s) for s in range(samples)))
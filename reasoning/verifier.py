@@ -0,0 +1,136 @@
+"""
+Strict verification with bug reports, and multi-verification gates.
+
+A gate runs k independent verification passes on a candidate at the same
+time and passes only if every one of them does. As soon as one pass fails
+the gate has failed, so the passes still running are cancelled instead of
+being waited for (and paid for).
+"""
+import asyncio
+import re
+
+from core.prompts import patch_sections
+from reasoning.solver import ask
+
+VERIFIER_INSTRUCTIONS = """You are a strict code reviewer. Decide whether the patch under review fully fixes the problem.
+
+Check, in order:
+1. Does the patch address the root cause, not just the symptom?
+2. Is the diff well-formed and does it apply (correct paths, hunk headers, context lines)?
+3. Does it break existing behaviour or miss edge cases named in the problem?
+
+List every issue you find as a bug report, one per line, starting with "- ".
+Do not suggest style changes.
+
+End with exactly one line: VERDICT: PASS or VERDICT: FAIL"""
+
+REVIEWER_QUERY = "You are reviewer {index} of {passes}, working independently."
+
+VERDICT_PATTERN = re.compile(r'VERDICT:\s*(PASS|FAIL)', re.IGNORECASE)
+
+
+def parse_verdict(text):
+    """(passed, bug report) from a verifier response; no verdict counts as a fail."""
+    matches = VERDICT_PATTERN.findall(text)
+    passed = bool(matches) and matches[-1].upper() == "PASS"
+    report = VERDICT_PATTERN.sub("", text).strip()
+    return passed, report
+
+
+class Verdict:
+    """The outcome of one verification pass."""
+
+    def __init__(self, index, passed, report, tokens=0, cost=0.0):
+        self.index = index
+        self.passed = passed
+        self.report = report
+        self.tokens = tokens
+        self.cost = cost
+
+    def to_dict(self):
+        return {"index": self.index, "passed": self.passed, "report": self.report}
+
+
+class GateResult:
+    """The verdicts a gate collected before it passed or failed."""
+
+    def __init__(self, passes, verdicts):
+        self.passes = passes
+        self.verdicts = verdicts
+
+    @property
+    def passed(self):
+        return len(self.verdicts) == self.passes and all(v.passed for v in self.verdicts)
+
+    @property
+    def cancelled(self):
+        """How many passes were cancelled once the gate had failed."""
+        return self.passes - len(self.verdicts)
+
+    @property
+    def tokens(self):
+        return sum(v.tokens for v in self.verdicts)
+
+    @property
+    def cost(self):
+        return sum(v.cost for v in self.verdicts)
+
+    @property
+    def bug_reports(self):
+        return [v.report for v in self.verdicts if not v.passed and v.report]
+
+    def to_dict(self):
+        return {
+            "passed": self.passed,
+            "passes": self.passes,
+            "cancelled": self.cancelled,
+            "verdicts": [v.to_dict() for v in self.verdicts],
+        }
+
+
+class Verifier:
+    """Reviews candidates; gate() runs several reviews in parallel."""
+
+    def __init__(self, client, model_key, max_tokens=2000, temperature=0.3, limit=None,
+                 prices=None):
+        self.client = client
+        self.model_key = model_key
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.limit = limit
+        self.prices = prices
+
+    async def verify(self, instance, candidate, index=0, passes=1):
+        text, tokens, cost = await ask(
+            self.client, self.model_key, VERIFIER_INSTRUCTIONS,
+            patch_sections(instance, candidate.patch),
+            REVIEWER_QUERY.format(index=index + 1, passes=passes),
+            max_tokens=self.max_tokens, temperature=self.temperature, limit=self.limit,
+            prices=self.prices, stage="verify", instance_id=instance["instance_id"],
+            cache_prefix=True,
+        )
+        passed, report = parse_verdict(text)
+        return Verdict(index, passed, report, tokens, cost)
+
+    async def gate(self, instance, candidate, passes, first=0, total=None):
+        """Run `passes` verifications concurrently, stopping at the first failure.
+
+        `first` and `total` number the reviewers when one patch goes through
+        several gates in a row, so every review is a distinct request.
+        """
+        total = max(total or passes, first + passes)
+        tasks = [
+            asyncio.create_task(self.verify(instance, candidate, index, total))
+            for index in range(first, first + passes)
+        ]
+        verdicts = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                verdict = await next_done
+                verdicts.append(verdict)
+                if not verdict.passed:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+        return GateResult(passes, verdicts)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the harness itself (not the models).
+
+Drives generate_predictions_for_model, patch extraction and SWE-bench
+format conversion against the local mock API (testing/mock_openrouter.py,
+run as a separate process so its CPU is not counted) at several
+concurrency levels. Reports problems/sec, latency percentiles, CPU time per
+problem and peak RSS as JSON, so runs can be compared between commits.
+
+Usage:
+    python3 scripts/benchmark_harness.py
+    python3 scripts/benchmark_harness.py --levels 10,100 --latency lognormal:-2,0.5 --output bench.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "baselines"))
+sys.path.insert(0, os.path.join(ROOT, "testing"))
+
+os.environ["RESPONSE_CACHE_MODE"] = "off"  # every request must reach the mock
+
+from core.client import AsyncOpenRouterClient
+from core.diffs import parse_patch
+from core.patches import DiffStreamExtractor, extract_patch
+from core.ratelimit import configure_shared_rate_limiter
+from mock_openrouter import CANNED_RESPONSE
+import multi_model_baseline
+from convert_to_swebench_format import convert_results
+
+
+class TimedClient(AsyncOpenRouterClient):
+    """Records the client-side latency of every completion in a batch."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+
+    async def complete_many(self, *args, **kwargs):
+        async for result in super().complete_many(*args, **kwargs):
+            self.latencies.append(result["elapsed"])
+            yield result
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def mock_server(latency, tokens_per_second):
+    """Run testing/mock_openrouter.py in its own process; yields the base URL."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "testing", "mock_openrouter.py"),
+         "--port", str(port), "--latency", latency,
+         "--tokens-per-second", str(tokens_per_second)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}/api/v1"
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"{base_url}/models", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.05)
+        else:
+            raise RuntimeError("Mock server did not start")
+        yield base_url
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def synthetic_instances(count):
+    return [
+        {
+            "instance_id": f"bench__repo-{i}",
+            "repo": "bench/repo",
+            "problem_statement": f"Problem {i}: handler() crashes on None input. " * 20,
+        }
+        for i in range(count)
+    ]
+
+
+def bench_generation(base_url, concurrency, problems, stream):
+    """Time generate_predictions_for_model at one concurrency level."""
+    client = TimedClient(api_key="mock", base_url=base_url, max_concurrency=concurrency)
+    instances = synthetic_instances(problems)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "testing"))
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            cpu_start = cpu_seconds()
+            start = time.perf_counter()
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                _, num_preds, num_errors = multi_model_baseline.generate_predictions_for_model(
+                    "claude_budget", instances, num_problems=problems,
+                    max_concurrency=concurrency, stream=stream, client=client,
+                )
+            wall = time.perf_counter() - start
+            cpu = cpu_seconds() - cpu_start
+        finally:
+            os.chdir(cwd)
+
+    latencies_ms = [l * 1000 for l in client.latencies]
+    return {
+        "concurrency": concurrency,
+        "problems": problems,
+        "stream": stream,
+        "predictions": num_preds,
+        "errors": num_errors,
+        "wall_seconds": round(wall, 4),
+        "problems_per_second": round(problems / wall, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies_ms, 50), 2),
+            "p90": round(percentile(latencies_ms, 90), 2),
+            "p99": round(percentile(latencies_ms, 99), 2),
+            "max": round(max(latencies_ms), 2),
+        },
+        "cpu_ms_per_problem": round(cpu * 1000 / problems, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def bench_extraction(iterations):
+    """Time extract_patch, the streaming extractor and parse_patch on a chatty completion."""
+    completion = ("Let me think about this step by step. " * 200) + CANNED_RESPONSE + ("Extra notes. " * 200)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        extract_patch(completion)
+    extract_seconds = time.perf_counter() - start
+
+    chunks = [completion[i:i + 16] for i in range(0, len(completion), 16)]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        extractor = DiffStreamExtractor()
+        for chunk in chunks:
+            if extractor.feed(chunk):
+                break
+        extractor.patch()
+    stream_seconds = time.perf_counter() - start
+
+    patch = extract_patch(completion)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse_patch(patch)
+    parse_seconds = time.perf_counter() - start
+
+    return {
+        "iterations": iterations,
+        "completion_chars": len(completion),
+        "extract_patch_us": round(extract_seconds * 1e6 / iterations, 2),
+        "stream_extractor_us": round(stream_seconds * 1e6 / iterations, 2),
+        "parse_patch_us": round(parse_seconds * 1e6 / iterations, 2),
+    }
+
+
+def bench_conversion(records):
+    """Time convert_to_swebench_format.convert_results on a results file."""
+    results = [
+        {"instance_id": f"bench__repo-{i}", "model": "bench", "solution": CANNED_RESPONSE}
+        for i in range(records)
+    ]
+    with tempfile.TemporaryDirectory() as workdir:
+        input_file = os.path.join(workdir, "results.json")
+        output_file = os.path.join(workdir, "preds.jsonl")
+        with open(input_file, "w") as f:
+            json.dump(results, f)
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            convert_results(input_file, output_file)
+        seconds = time.perf_counter() - start
+    return {
+        "records": records,
+        "seconds": round(seconds, 4),
+        "records_per_second": round(records / seconds, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark harness throughput against the mock API")
+    parser.add_argument("--levels", default="10,100,1000", help="Comma-separated concurrency levels")
+    parser.add_argument("--problems", type=int, default=0,
+                        help="Problems per level (default: 2x the concurrency, at least 200)")
+    parser.add_argument("--latency", default="lognormal:-2.5,0.5",
+                        help="Mock time-to-first-token distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=0)
+    parser.add_argument("--no-stream", action="store_true", help="Use plain (non-streamed) completions")
+    parser.add_argument("--extract-iterations", type=int, default=2000)
+    parser.add_argument("--convert-records", type=int, default=5000)
+    parser.add_argument("--output", help="JSON file to write (default: testing/benchmarks/harness_<time>.json)")
+    args = parser.parse_args()
+
+    # Measure the harness, not our own client-side throttling
+    configure_shared_rate_limiter({})
+
+    levels = [int(level) for level in args.levels.split(",")]
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mock": {"latency": args.latency, "tokens_per_second": args.tokens_per_second},
+        "generation": [],
+    }
+
+    print("=" * 70)
+    print("HARNESS THROUGHPUT BENCHMARK")
+    print("=" * 70)
+
+    with mock_server(args.latency, args.tokens_per_second) as base_url:
+        for level in levels:
+            problems = args.problems or max(200, 2 * level)
+            print(f"\n⏱️  concurrency={level}, problems={problems}...")
+            result = bench_generation(base_url, level, problems, stream=not args.no_stream)
+            report["generation"].append(result)
+
+    print("\n⏱️  patch extraction...")
+    report["extraction"] = bench_extraction(args.extract_iterations)
+    print("⏱️  format conversion...")
+    report["conversion"] = bench_conversion(args.convert_records)
+
+    print(f"\n{'Concurrency':>11} {'Problems':>9} {'Prob/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'CPU ms/p':>9} {'RSS MB':>8}")
+    print("-" * 70)
+    for r in report["generation"]:
+        print(f"{r['concurrency']:>11} {r['problems']:>9} {r['problems_per_second']:>9} "
+              f"{r['latency_ms']['p50']:>9} {r['latency_ms']['p99']:>9} "
+              f"{r['cpu_ms_per_problem']:>9} {r['peak_rss_mb']:>8}")
+    print(f"\nextract_patch: {report['extraction']['extract_patch_us']} µs/completion, "
+          f"stream extractor: {report['extraction']['stream_extractor_us']} µs/completion, "
+          f"parse_patch: {report['extraction']['parse_patch_us']} µs/patch")
+    print(f"convert_results: {report['conversion']['records_per_second']} records/s")
+
+    output = args.output or f"testing/benchmarks/harness_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,46 @@ This validates that each model ID is correct and returns reasonable responses.
 
 import os
 import time
+import asyncio
 from dotenv import load_dotenv
 from openai import OpenAI
 from models_config import MODELS, list_all_models
+from core.client import AsyncOpenRouterClient
 
 load_dotenv()
 
 
+def report_model_result(key: str, model_config: dict, response=None, elapsed=0.0, error=None):
+    """Print and summarize the outcome of one model's test call"""
+    
+    model_name = model_config["name"]
+    
+    if error is not None:
+        print(f"❌ {model_name} FAILED: {error}")
+        return {
+            "success": False,
+            "key": key,
+            "model": model_name,
+            "error": str(error)
+        }
+    
+    result = response.choices[0].message.content
+    tokens = response.usage.total_tokens
+    
+    print(f"✅ {model_name} SUCCESS ({elapsed:.2f}s, {tokens} tokens)")
+    print(f"\nResponse preview (first 200 chars):")
+    print(f"{result[:200]}...")
+    
+    return {
+        "success": True,
+        "key": key,
+        "model": model_name,
+        "tokens": tokens,
+        "time": elapsed,
+        "response": result
+    }
+
+
 def test_single_model(client: OpenAI, key: str, model_config: dict, problem: str):
     """Test a single model with a simple problem"""
     
@@ -41,30 +74,38 @@ def test_single_model(client: OpenAI, key: str, model_config: dict, problem: str
         )
         
         elapsed = time.time() - start_time
-        result = response.choices[0].message.content
-        tokens = response.usage.total_tokens
-        
-        print(f"✅ SUCCESS ({elapsed:.2f}s, {tokens} tokens)")
-        print(f"\nResponse preview (first 200 chars):")
-        print(f"{result[:200]}...")
-        
-        return {
-            "success": True,
-            "key": key,
-            "model": model_name,
-            "tokens": tokens,
-            "time": elapsed,
-            "response": result
-        }
+        return report_model_result(key, model_config, response, elapsed)
         
     except Exception as e:
-        print(f"❌ FAILED: {e}")
-        return {
-            "success": False,
+        return report_model_result(key, model_config, error=e)
+
+
+def test_models_concurrently(models: dict, problem: str):
+    """Send the problem to every model at once and report as answers arrive"""
+    
+    client = AsyncOpenRouterClient()
+    requests = [
+        {
+            "model_id": model_config["id"],
+            "messages": [{"role": "user", "content": problem}],
+            "max_tokens": 300,
+            "temperature": 0.1,
             "key": key,
-            "model": model_name,
-            "error": str(e)
         }
+        for key, model_config in models.items()
+    ]
+    
+    async def collect():
+        results = []
+        async for item in client.complete_many(requests):
+            key = item["request"]["key"]
+            results.append(report_model_result(
+                key, models[key], item["response"], item["elapsed"], item["error"]
+            ))
+        return results
+    
+    print(f"\n🔄 Querying {len(requests)} models concurrently...")
+    return asyncio.run(collect())
 
 
 def test_all_models():
@@ -79,11 +120,6 @@ def test_all_models():
         print("❌ No OPENROUTER_API_KEY found in .env")
         return
     
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key,
-    )
-    
     # Simple test problem
     problem = """Solve: If 2x + 3 = 11, what is x?
     
@@ -92,15 +128,8 @@ Show your work briefly."""
     print(f"\n📝 Test problem: {problem}")
     print("\n" + "="*70)
     
-    results = []
-    
-    # Test each model
-    for key, model_config in MODELS.items():
-        result = test_single_model(client, key, model_config, problem)
-        results.append(result)
-        
-        # Small delay to avoid rate limits
-        time.sleep(0.5)
+    # Test every model at once; total time is the slowest model, not the sum
+    results = test_models_concurrently(MODELS, problem)
     
     # Print summary
     print("\n" + "="*70)
@@ -152,11 +181,6 @@ def test_quick():
         print("❌ No OPENROUTER_API_KEY found in .env")
         return
     
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key,
-    )
-    
     problem = "What is 5 + 3? Just say the number."
     
     # Test one from each provider
@@ -167,11 +191,7 @@ def test_quick():
         "grok_budget": MODELS["grok_budget"],
     }
     
-    results = []
-    for key, model_config in quick_models.items():
-        result = test_single_model(client, key, model_config, problem)
-        results.append(result)
-        time.sleep(0.5)
+    results = test_models_concurrently(quick_models, problem)
     
     successful = [r for r in results if r["success"]]
     print(f"\n✅ Quick test: {len(successful)}/4 providers working")
@@ -5,40 +5,16 @@ SWE-bench expects JSONL with: instance_id, model_name_or_path, model_patch
 """
 
 import json
+import os
 import sys
-import re
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.patches import extract_patch
 
 def extract_patch_from_solution(solution):
     """Extract the diff patch from the model's solution."""
-    # Look for code blocks with diff
-    diff_pattern = r'```(?:diff)?\n(.*?)```'
-    matches = re.findall(diff_pattern, solution, re.DOTALL)
-    
-    if matches:
-        # Return the first diff block
-        patch = matches[0].strip()
-        # Ensure it starts with diff or ---
-        if not patch.startswith('diff') and not patch.startswith('---'):
-            # Add diff header if missing
-            patch = f"diff --git a/file.py b/file.py\n{patch}"
-        return patch
-    
-    # If no code block, try to find diff-like content
-    lines = solution.split('\n')
-    patch_lines = []
-    in_patch = False
-    
-    for line in lines:
-        if line.startswith('---') or line.startswith('+++') or line.startswith('@@'):
-            in_patch = True
-        if in_patch:
-            patch_lines.append(line)
-    
-    if patch_lines:
-        return '\n'.join(patch_lines)
-    
-    # Last resort: return the whole solution
-    return solution
+    return extract_patch(solution)
 
 def convert_results(input_file, output_file):
     """Convert our format to SWE-bench format."""
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for sb-cli, for testing evaluation/cloud.py without quota.
+
+Implements `submit`, `get-report` and `list-runs` with sb-cli's arguments.
+Submissions are stored under FAKE_SB_CLI_DIR (default .cache/fake_sb_cli).
+Uploads take FAKE_SB_CLI_SUBMIT_SECONDS (default 0), and a run's report
+becomes available FAKE_SB_CLI_EVAL_SECONDS after it was submitted
+(default 2); until then get-report fails like sb-cli does for an
+unfinished run. An instance counts as resolved when its patch is non-empty
+and the hash of its ID is even, so results are stable across calls. Every
+invocation is appended to calls.jsonl in the state directory, so tests can
+check how often the real service would have been hit.
+
+Usage:
+    SB_CLI="python3 testing/fake_sb_cli.py" python3 -m evaluation.cloud submit preds.jsonl --run-id test
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evaluation.predictions import load_predictions
+
+
+def state_dir():
+    return os.getenv("FAKE_SB_CLI_DIR", ".cache/fake_sb_cli")
+
+
+def run_path(run_id):
+    return os.path.join(state_dir(), "runs", f"{run_id}.json")
+
+
+def log_call(argv):
+    os.makedirs(state_dir(), exist_ok=True)
+    with open(os.path.join(state_dir(), "calls.jsonl"), "a") as f:
+        f.write(json.dumps({"time": time.time(), "argv": argv}) + "\n")
+
+
+def resolved(prediction):
+    digest = hashlib.sha256(prediction["instance_id"].encode()).digest()
+    return bool(prediction["model_patch"].strip()) and digest[0] % 2 == 0
+
+
+def submit(args):
+    if os.path.exists(run_path(args.run_id)):
+        print(f"Run {args.run_id} already exists", file=sys.stderr)
+        return 1
+    predictions = load_predictions(args.predictions_path)
+    time.sleep(float(os.getenv("FAKE_SB_CLI_SUBMIT_SECONDS", "0")))
+    os.makedirs(os.path.dirname(run_path(args.run_id)), exist_ok=True)
+    with open(run_path(args.run_id), "w") as f:
+        json.dump({"submitted_at": time.time(), "dataset": args.dataset, "split": args.split,
+                   "predictions": predictions}, f)
+    print(f"Submitted {len(predictions)} predictions as {args.run_id}")
+    if args.wait_for_evaluation:
+        time.sleep(float(os.getenv("FAKE_SB_CLI_EVAL_SECONDS", "2")))
+    return 0
+
+
+def get_report(args):
+    if not os.path.exists(run_path(args.run_id)):
+        print(f"No run {args.run_id}", file=sys.stderr)
+        return 1
+    with open(run_path(args.run_id)) as f:
+        run = json.load(f)
+    if time.time() - run["submitted_at"] < float(os.getenv("FAKE_SB_CLI_EVAL_SECONDS", "2")):
+        print(f"Evaluation of {args.run_id} is still running", file=sys.stderr)
+        return 1
+    predictions = run["predictions"]
+    ids = [p["instance_id"] for p in predictions]
+    resolved_ids = sorted(p["instance_id"] for p in predictions if resolved(p))
+    empty_ids = sorted(p["instance_id"] for p in predictions if not p["model_patch"].strip())
+    report = {
+        "run_id": args.run_id,
+        "total_instances": 300,
+        "submitted_instances": len(ids),
+        "completed_instances": len(ids) - len(empty_ids),
+        "resolved_instances": len(resolved_ids),
+        "unresolved_instances": len(ids) - len(empty_ids) - len(resolved_ids),
+        "empty_patch_instances": len(empty_ids),
+        "error_instances": 0,
+        "completed_ids": sorted(set(ids) - set(empty_ids)),
+        "resolved_ids": resolved_ids,
+        "unresolved_ids": sorted(set(ids) - set(empty_ids) - set(resolved_ids)),
+        "empty_patch_ids": empty_ids,
+        "error_ids": [],
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"{run['dataset']}__{run['split']}__{args.run_id}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resolved (submitted): {len(resolved_ids)}/{len(ids)}")
+    return 0
+
+
+def list_runs(args):
+    runs = os.path.join(state_dir(), "runs")
+    for name in sorted(os.listdir(runs)) if os.path.isdir(runs) else []:
+        print(name[:-len(".json")])
+    return 0
+
+
+def main():
+    log_call(sys.argv[1:])
+    parser = argparse.ArgumentParser(description="Fake sb-cli for local tests")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sub = commands.add_parser("submit")
+    sub.add_argument("dataset")
+    sub.add_argument("split")
+    sub.add_argument("--predictions_path", required=True)
+    sub.add_argument("--run_id", required=True)
+    sub.add_argument("--wait_for_evaluation", type=int, default=1)
+    report = commands.add_parser("get-report")
+    report.add_argument("dataset")
+    report.add_argument("split")
+    report.add_argument("run_id")
+    report.add_argument("--output_dir", default="sb-cli-reports")
+    runs = commands.add_parser("list-runs")
+    runs.add_argument("dataset")
+    runs.add_argument("split")
+    args = parser.parse_args()
+    handler = {"submit": submit, "get-report": get_report, "list-runs": list_runs}[args.command]
+    sys.exit(handler(args))
+
+
+if __name__ == "__main__":
+    main()
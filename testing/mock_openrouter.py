@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stand-in for the OpenRouter API.
+
+Serves /chat/completions (plain and streamed) with configurable latency,
+token throughput, per-minute rate limits and injected 429/5xx errors.
+Responses are canned, or replayed from a core.cache response store.
+Point OpenRouterClient at it with base_url= or OPENROUTER_BASE_URL.
+
+Usage:
+    python testing/mock_openrouter.py --port 8089 --latency uniform:0.2,1.5 --error-429 0.05
+    OPENROUTER_BASE_URL=http://127.0.0.1:8089/api/v1 python3 -m baselines.multi_model_baseline
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.cache import ResponseCache
+from core.client import SAMPLE_HEADER
+from core.diffs import parse_patch
+from core.patches import extract_patch
+from core.ratelimit import TokenBucket
+
+CANNED_RESPONSE = """The bug is a missing guard; this adds it.
+
+```diff
+diff --git a/module.py b/module.py
+--- a/module.py
++++ b/module.py
+@@ -1,2 +1,4 @@
+ def handler(value):
++    if value is None:
++        return None
+     return value.strip()
+```
+
+This keeps the existing behaviour for every non-None input.
+"""
+
+
+class LatencyModel:
+    """Time-to-first-token distribution, parsed from specs such as:
+
+    fixed:0.5, uniform:0.2,1.5, normal:0.8,0.2, lognormal:-0.5,0.6
+    """
+
+    def __init__(self, spec="fixed:0"):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+        samplers = {
+            "fixed": lambda: self.params[0],
+            "uniform": lambda: random.uniform(*self.params),
+            "normal": lambda: random.gauss(*self.params),
+            "lognormal": lambda: random.lognormvariate(*self.params),
+        }
+        if kind not in samplers:
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        self._sample = samplers[kind]
+
+    def sample(self):
+        return max(0.0, self._sample())
+
+
+class MockConfig:
+    """Knobs for the mock server; every field has a harmless default."""
+
+    def __init__(self, latency="fixed:0", tokens_per_second=0, requests_per_minute=0,
+                 tokens_per_minute=0, error_429=0.0, error_5xx=0.0, retry_after=1.0,
+                 response_text=CANNED_RESPONSE, replay_cache=None, stream_chunk_chars=16):
+        self.latency = LatencyModel(latency)
+        self.tokens_per_second = tokens_per_second
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.error_429 = error_429
+        self.error_5xx = error_5xx
+        self.retry_after = retry_after
+        self.response_text = response_text
+        self.replay_cache = replay_cache
+        self.stream_chunk_chars = stream_chunk_chars
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under load tests
+    request_queue_size = 1024
+
+
+def _count_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class MockOpenRouterServer:
+    """Threaded HTTP server speaking the chat-completions protocol.
+
+    Use as a context manager to run it on a background thread:
+
+        with MockOpenRouterServer(MockConfig(latency="uniform:0.1,0.3")) as server:
+            client = OpenRouterClient(api_key="mock", base_url=server.base_url)
+    """
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or MockConfig()
+        self.stats = {"requests": 0, "completed": 0, "streamed": 0,
+                      "rate_limited": 0, "server_errors": 0, "replayed": 0}
+        self._stats_lock = threading.Lock()
+        self._requests = (TokenBucket(self.config.requests_per_minute / 60,
+                                      self.config.requests_per_minute)
+                          if self.config.requests_per_minute else None)
+        self._tokens = (TokenBucket(self.config.tokens_per_minute / 60,
+                                    self.config.tokens_per_minute)
+                        if self.config.tokens_per_minute else None)
+        self._replay = (ResponseCache(self.config.replay_cache, replay=True)
+                        if self.config.replay_cache else None)
+        self.httpd = _Server((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def count(self, stat):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def over_limit(self, prompt_tokens):
+        """True if this request would exceed a per-minute budget."""
+        for bucket, amount in ((self._requests, 1), (self._tokens, prompt_tokens)):
+            if bucket is not None and bucket.reserve(amount) > 0:
+                bucket.refund(amount)
+                return True
+        return False
+
+    def response_texts(self, body, sample=0):
+        """Replayed choices for this exact request (keyed like core.client), else the canned response."""
+        n = body.get("n", 1)
+        if self._replay is not None:
+            key = ResponseCache.key(body.get("model"), body.get("messages"),
+                                    body.get("max_tokens"), body.get("temperature"), n, sample)
+            payload = self._replay.get(key)
+            if payload is not None:
+                self.count("replayed")
+                texts = [c["message"]["content"] or "" for c in json.loads(payload)["choices"]]
+                return (texts * n)[:n]
+        return [self.config.response_text] * n
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": []})
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+                server.count("requests")
+                config = server.config
+
+                prompt_tokens = _count_tokens(json.dumps(body.get("messages", [])))
+                if random.random() < config.error_429 or server.over_limit(prompt_tokens):
+                    server.count("rate_limited")
+                    self._send_json(429, {"error": {"message": "Rate limit exceeded", "code": 429}},
+                                    {"Retry-After": str(config.retry_after)})
+                    return
+                if random.random() < config.error_5xx:
+                    server.count("server_errors")
+                    status = random.choice([500, 502, 503])
+                    self._send_json(status, {"error": {"message": "Upstream error", "code": status}})
+                    return
+
+                time.sleep(config.latency.sample())
+                sample = int(self.headers.get(SAMPLE_HEADER, 0))
+                max_chars = body.get("max_tokens", 4000) * 4
+                texts = server.response_texts(body, sample)
+                finish_reason = "length" if any(len(t) > max_chars for t in texts) else "stop"
+                texts = [t[:max_chars] for t in texts]
+                text = texts[0]
+                completion_tokens = sum(_count_tokens(t) for t in texts)
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                }
+                meta = {
+                    "id": f"gen-mock-{uuid.uuid4().hex[:12]}",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                }
+
+                if body.get("stream"):
+                    server.count("streamed")
+                    self._stream(text, finish_reason, usage, meta, body)
+                else:
+                    if config.tokens_per_second:
+                        time.sleep(usage["completion_tokens"] / config.tokens_per_second)
+                    self._send_json(200, dict(meta, object="chat.completion", choices=[{
+                        "index": index,
+                        "finish_reason": finish_reason,
+                        "message": {"role": "assistant", "content": choice},
+                    } for index, choice in enumerate(texts)], usage=usage))
+                server.count("completed")
+
+            def _stream(self, text, finish_reason, usage, meta, body):
+                config = server.config
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                step = config.stream_chunk_chars
+                delay = (_count_tokens("x" * step) / config.tokens_per_second
+                         if config.tokens_per_second else 0)
+                try:
+                    for start in range(0, len(text), step):
+                        self._event(dict(meta, object="chat.completion.chunk", choices=[{
+                            "index": 0,
+                            "delta": {"content": text[start:start + step]},
+                            "finish_reason": None,
+                        }]))
+                        if delay:
+                            time.sleep(delay)
+                    self._event(dict(meta, object="chat.completion.chunk", choices=[{
+                        "index": 0, "delta": {}, "finish_reason": finish_reason,
+                    }]))
+                    if (body.get("stream_options") or {}).get("include_usage"):
+                        self._event(dict(meta, object="chat.completion.chunk",
+                                         choices=[], usage=usage))
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client stopped the stream early
+
+            def _event(self, payload):
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    for name, value in (headers or {}).items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True  # the client cancelled the request
+
+        return Handler
+
+
+def self_check():
+    """The canned response must carry a well-formed patch; benchmarks measure against it."""
+    parsed = parse_patch(extract_patch(CANNED_RESPONSE))
+    assert parsed.valid and parsed.files, f"CANNED_RESPONSE patch is malformed: {parsed.errors}"
+
+
+def main():
+    self_check()
+    parser = argparse.ArgumentParser(description="Local mock of the OpenRouter chat API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="fixed:S | uniform:LO,HI | normal:MU,SIGMA | lognormal:MU,SIGMA")
+    parser.add_argument("--tokens-per-second", type=float, default=0,
+                        help="Generation speed (0 = instant)")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429s")
+    parser.add_argument("--tpm", type=int, default=0, help="Prompt tokens per minute before 429s")
+    parser.add_argument("--error-429", type=float, default=0.0, help="Random 429 probability")
+    parser.add_argument("--error-5xx", type=float, default=0.0, help="Random 5xx probability")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--response-file", help="Text file to serve as the canned response")
+    parser.add_argument("--replay-cache", help="core.cache SQLite file to replay responses from")
+    args = parser.parse_args()
+
+    response_text = CANNED_RESPONSE
+    if args.response_file:
+        with open(args.response_file, "r") as f:
+            response_text = f.read()
+
+    config = MockConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        error_429=args.error_429,
+        error_5xx=args.error_5xx,
+        retry_after=args.retry_after,
+        response_text=response_text,
+        replay_cache=args.replay_cache,
+    )
+    server = MockOpenRouterServer(config, host=args.host, port=args.port)
+    print(f"🧪 Mock OpenRouter listening on {server.base_url}")
+    print(f"   export OPENROUTER_BASE_URL={server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStats: {json.dumps(server.stats)}")
+
+
+if __name__ == "__main__":
+    main()
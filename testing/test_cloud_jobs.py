@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Smoke test for evaluation/cloud.py against the local fake sb-cli (no quota, no network)."""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from evaluation.cloud import DONE, CloudJobs
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix="fake_sb_cli_")
+    os.environ["FAKE_SB_CLI_DIR"] = os.path.join(workdir, "state")
+    os.environ["FAKE_SB_CLI_SUBMIT_SECONDS"] = "1"
+    os.environ["FAKE_SB_CLI_EVAL_SECONDS"] = "2"
+    sb_cli = f"{sys.executable} {os.path.join(ROOT, 'testing', 'fake_sb_cli.py')}"
+    report_dir = os.path.join(workdir, "reports")
+
+    run_ids = []
+    for model in ("model_a", "model_b", "model_c"):
+        path = os.path.join(workdir, f"{model}.jsonl")
+        with open(path, "w") as f:
+            for i in range(10):
+                patch = f"diff --git a/x.py b/x.py\n# {model} {i}\n" if i % 3 else ""
+                f.write(json.dumps({"instance_id": f"repo__repo-{i}", "model_name_or_path": model,
+                                    "model_patch": patch}) + "\n")
+        run_ids.append((path, f"smoke_{model}"))
+
+    print("="*70)
+    print("CLOUD JOB MANAGER SMOKE TEST (fake sb-cli)")
+    print("="*70)
+
+    jobs = CloudJobs(sb_cli=sb_cli, report_dir=report_dir, poll_initial=0.5, poll_max=2, poll_timeout=60)
+    start = time.perf_counter()
+    for path, run_id in run_ids:
+        jobs.submit(path, run_id, prefilter=False)
+    queued = time.perf_counter() - start
+    print(f"\nQueued {len(run_ids)} submissions in {queued * 1000:.0f} ms")
+    assert queued < 0.5, "submit() blocked on sb-cli"
+
+    # Stand-in for generation continuing while the jobs are in flight
+    ticks = 0
+    while any(job.status != DONE for job in jobs.jobs.values()) and time.perf_counter() - start < 60:
+        ticks += 1
+        time.sleep(0.1)
+    jobs.close(wait_for_reports=True)
+    print(f"Kept working for {ticks} ticks while jobs were pending")
+    print(jobs.format_status())
+    assert all(job.status == DONE for job in jobs.jobs.values()), "not every report arrived"
+    assert any(job.polls > 1 for job in jobs.jobs.values()), "reports were never retried"
+
+    calls_file = os.path.join(os.environ["FAKE_SB_CLI_DIR"], "calls.jsonl")
+    with open(calls_file) as f:
+        calls_before = sum(1 for _ in f)
+    again = CloudJobs(sb_cli=sb_cli, report_dir=report_dir)
+    for path, run_id in run_ids:
+        assert again.submit(path, run_id, prefilter=False).status == DONE
+    again.close()
+    with open(calls_file) as f:
+        calls_after = sum(1 for _ in f)
+    assert calls_after == calls_before, "a cached report was fetched again"
+    print(f"\n✅ Reports cached in {report_dir}; resubmitting made no sb-cli calls")
+
+
+if __name__ == "__main__":
+    main()
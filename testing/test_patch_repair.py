@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Smoke test for hunk repair (evaluation/repair.py) and the local evaluator's log parsers."""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.diffs import parse_patch
+from evaluation.repair import repair_patch
+from evaluation.swe_bench import FAILED, PASSED, SKIPPED, parse_django, parse_pytest, parse_sympy
+
+SOURCE = "".join(f"line {i}\n" for i in range(1, 41))
+
+# The edit is right, but the header points at line 1 and promises 7 old
+# lines for a hunk that has 6, as models often write it
+BROKEN_PATCH = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,7 +1,7 @@
+ line 20
+ line 21
+ line 22
+-line 23
++line 23 fixed
+ line 24
+ line 25
+"""
+
+PYTEST_LOG = """============================= test session starts ==============================
+collected 3 items
+
+tests/test_app.py .FE                                                    [100%]
+
+=========================== short test summary info ============================
+PASSED tests/test_app.py::test_ok
+FAILED tests/test_app.py::test_broken - AssertionError: assert 1 == 2
+ERROR tests/test_app.py::test_setup - RuntimeError: boom
+==================== 1 failed, 1 passed, 1 error in 0.05s ======================
+"""
+
+DJANGO_LOG = """Creating test database for alias 'default'...
+test_create (model_fields.tests.ModelTests) ... ok
+test_delete (model_fields.tests.ModelTests) ... FAIL
+test_remote (model_fields.tests.ModelTests) ... skipped 'no network'
+test_docstring (model_fields.tests.ModelTests)
+Fields keep their defaults. ... ok
+test_known_bug (model_fields.tests.ModelTests) ... expected failure
+"""
+
+SYMPY_LOG = """============================= test process starts ==============================
+sympy/core/tests/test_basic.py[3]
+test_subs ok
+test_atoms F
+test_slow_thing s
+================== tests finished: 1 passed, 1 failed, 1 skipped ===============
+"""
+
+
+def git(*args, cwd):
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True)
+
+
+def check_repair():
+    print("\n🔧 Hunk repair")
+    repo = tempfile.mkdtemp(prefix="patch_repair_")
+    with open(os.path.join(repo, "app.py"), "w") as f:
+        f.write(SOURCE)
+    git("init", "-q", cwd=repo)
+
+    patch = parse_patch(BROKEN_PATCH)
+    assert not patch.valid and patch.errors, "the header count mismatch was not flagged"
+    print(f"   parse_patch: {patch.errors[0]}")
+    broken = subprocess.run(["git", "apply", "--check", "-"], cwd=repo, input=BROKEN_PATCH,
+                            capture_output=True, text=True)
+    assert broken.returncode != 0, "the broken patch applied as written"
+
+    def read_file(path):
+        with open(os.path.join(repo, path)) as f:
+            return f.read()
+
+    repaired, changes = repair_patch(BROKEN_PATCH, read_file)
+    print(f"   repair_patch: {'; '.join(changes)}")
+    assert changes, "repair_patch changed nothing"
+    assert "@@ -20,6 +20,6 @@" in repaired, repaired
+    assert parse_patch(repaired).valid
+    fixed = subprocess.run(["git", "apply", "--check", "-"], cwd=repo, input=repaired,
+                           capture_output=True, text=True)
+    assert fixed.returncode == 0, fixed.stderr
+    print("   git apply --check accepts the repaired patch")
+
+
+def check_log_parsers():
+    print("\n📋 Log parsers")
+    pytest_results = parse_pytest(PYTEST_LOG)
+    assert pytest_results == {
+        "tests/test_app.py::test_ok": PASSED,
+        "tests/test_app.py::test_broken": FAILED,
+        "tests/test_app.py::test_setup": FAILED,
+    }, pytest_results
+    print(f"   pytest: {len(pytest_results)} tests")
+
+    django_results = parse_django(DJANGO_LOG)
+    assert django_results == {
+        "test_create (model_fields.tests.ModelTests)": PASSED,
+        "test_delete (model_fields.tests.ModelTests)": FAILED,
+        "test_remote (model_fields.tests.ModelTests)": SKIPPED,
+        "test_docstring (model_fields.tests.ModelTests)": PASSED,
+        "test_known_bug (model_fields.tests.ModelTests)": PASSED,
+    }, django_results
+    print(f"   django: {len(django_results)} tests")
+
+    sympy_results = parse_sympy(SYMPY_LOG)
+    assert sympy_results == {"test_subs": PASSED, "test_atoms": FAILED, "test_slow_thing": SKIPPED}, sympy_results
+    print(f"   sympy: {len(sympy_results)} tests")
+
+
+def main():
+    print("="*70)
+    print("PATCH REPAIR AND LOG PARSER SMOKE TEST")
+    print("="*70)
+    check_repair()
+    check_log_parsers()
+    print("\n✅ Repaired patch applies; pytest, django and sympy logs parse as expected")
+
+
+if __name__ == "__main__":
+    main()
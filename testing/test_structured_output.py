@@ -1,44 +1,24 @@
 #!/usr/bin/env python3
 """Test if strict diff formatting fixes the patch errors."""
 
-import os, sys, json, re
+import os, sys, json
 from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
 from openai import OpenAI
-from datasets import load_dataset
+from core.dataset import iter_instances
+from core.diffs import parse_patch
+from core.patches import extract_patch, find_diff_block
+from core.prompts import structured_messages
 from models_config import MODELS
 
 load_dotenv()
 
-STRUCTURED_PROMPT = """You are a software engineer. Provide a COMPLETE, VALID git diff patch.
-
-Repository: {repo}
-Problem: {problem_statement}
-
-CRITICAL - Output Format:
-1. Brief explanation (1-2 sentences)
-2. Complete git diff patch in this EXACT format:
-
-```diff
-diff --git a/filename.py b/filename.py
---- a/filename.py
-+++ b/filename.py
-@@ -10,7 +10,7 @@
- context line
--old line
-+new line
- context line
-```
-
-Make the patch COMPLETE - do not truncate. End with newline."""
-
 def main():
     # Test on 2 problems
     client = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=os.getenv("OPENROUTER_API_KEY"))
     model = MODELS["google_budget"]
-    dataset = load_dataset("princeton-nlp/SWE-bench_Lite", split="test")
     
     print("="*70)
     print("STRUCTURED OUTPUT TEST - Gemini 2.5 Flash")
@@ -46,16 +26,14 @@ def main():
     print("Testing 2 problems with STRICT diff formatting\n")
     
     results = []
-    for i, inst in enumerate(list(dataset)[:2]):
+    for i, inst in enumerate(iter_instances(2)):
         print(f"\n{'='*70}")
         print(f"Problem {i+1}/2: {inst['instance_id']}")
         print(f"{'='*70}")
         
         response = client.chat.completions.create(
             model=model["id"],
-            messages=[{"role": "user", "content": STRUCTURED_PROMPT.format(
-                repo=inst['repo'], problem_statement=inst['problem_statement']
-            )}],
+            messages=structured_messages(model["id"], inst),
             max_tokens=4000,
             temperature=0.1,
             extra_headers={"HTTP-Referer": "http://localhost:3000", "X-Title": "Giga-Think"}
@@ -63,19 +41,23 @@ def main():
         
         solution = response.choices[0].message.content
         tokens = response.usage.total_tokens
+        details = response.usage.prompt_tokens_details
+        cached = (details.cached_tokens or 0) if details else 0
         
-        print(f"✅ Response received ({tokens} tokens)")
+        print(f"✅ Response received ({tokens} tokens, {cached} cached)")
         
-        # Extract diff
-        diff_match = re.search(r'```diff\n(.*?)```', solution, re.DOTALL)
-        if diff_match:
-            patch = diff_match.group(1).strip()
+        # Extract diff the same way the baseline does
+        patch = extract_patch(solution)
+        if find_diff_block(solution) is not None:
             print(f"✅ Found diff block ({len(patch)} chars)")
             print(f"   Starts: {patch[:60]}...")
             print(f"   Ends: ...{patch[-60:]}")
         else:
-            patch = solution
             print(f"⚠️  No diff block found")
+        parsed = parse_patch(patch)
+        if not parsed.valid:
+            problem = parsed.errors[0] if parsed.errors else "no hunks found"
+            print(f"⚠️  Malformed patch: {problem}")
         
         results.append({
             "instance_id": inst['instance_id'],